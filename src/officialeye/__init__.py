@@ -15,7 +15,7 @@ from officialeye._api.context import Context
 
 # Misc
 # noinspection PyProtectedMember
-from officialeye._api.future import Future, wait
+from officialeye._api.future import Future, wait, wait_async
 
 # Image-processing
 # noinspection PyProtectedMember
@@ -4,33 +4,78 @@ Module represeting the OfficialEye context.
 
 from __future__ import annotations
 
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from concurrent.futures import Future as PythonFuture
-from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.context import BaseContext
 from types import TracebackType
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List
 
 from officialeye._api.future import Future
+from officialeye._api.image import IImage
 from officialeye._api.mutator import IMutator
 
 # noinspection PyProtectedMember
 from officialeye._api_builtins.init import initialize_builtins
 
+# noinspection PyProtectedMember
+from officialeye._internal.api.warm_up import worker_warm_up
+
+# noinspection PyProtectedMember
+from officialeye._internal.cancellation import CancellationFlag
+
+# noinspection PyProtectedMember
+from officialeye._internal.executors import InlineExecutor, initialize_worker_thread
+
 # noinspection PyProtectedMember
 from officialeye._internal.feedback.abstract import AbstractFeedbackInterface
 
 # noinspection PyProtectedMember
 from officialeye._internal.feedback.dummy import DummyFeedbackInterface
+
+# noinspection PyProtectedMember
+from officialeye._internal.shared_image import SharedImageSegment
 from officialeye.error.errors.general import ErrInvalidIdentifier
 from officialeye.error.errors.internal import ErrInvalidState
 from officialeye.error.errors.template import ErrTemplateInvalidMutator
 
 if TYPE_CHECKING:
+    from officialeye._api.template.template import Template
     from officialeye.types import ConfigDict, InterpretationFactory, MatcherFactory, MutatorFactory, SupervisorFactory
 
 
+# the tasks run in a pool of worker processes
+EXECUTOR_PROCESS = "process"
+# the tasks run in a pool of worker threads of the current process
+EXECUTOR_THREAD = "thread"
+# the tasks run synchronously in the thread submitting them
+EXECUTOR_INLINE = "inline"
+
+_EXECUTORS = (EXECUTOR_PROCESS, EXECUTOR_THREAD, EXECUTOR_INLINE)
+
+
 class Context:
 
-    def __init__(self, /, *, afi: AbstractFeedbackInterface | None = None):
+    def __init__(self, /, *, afi: AbstractFeedbackInterface | None = None, executor: str = EXECUTOR_PROCESS, workers: int | None = None,
+                 mp_context: BaseContext | str | None = None, interpretation_threads: int | None = None):
+        """
+        Arguments:
+            afi: The interface through which the progress of the tasks is reported.
+            executor: Where the tasks run, that is, in a pool of worker processes ("process"), in a pool of worker threads ("thread"),
+                or synchronously in the thread submitting them ("inline"). Heavy lifting is done by native code mostly, so threads avoid
+                the costs of transferring data between processes, whereas the inline executor suits small jobs and tests best.
+            workers: The number of worker processes or threads, by default one per processor.
+            mp_context: The multiprocessing context (or the name of its start method) used to start the worker processes.
+            interpretation_threads: The number of threads interpreting the features of a single document in parallel.
+                Only the features whose interpretation methods are concurrent are interpreted in parallel. Every worker uses that many threads,
+                hence by default the processors are split evenly among the workers, which amounts to a single thread per worker,
+                i.e., to interpreting the features one by one, unless fewer workers than processors are requested.
+        """
+
         self._entered: bool = False
         self._disposed: bool = False
 
@@ -39,7 +84,39 @@ class Context:
         else:
             self._afi = afi
 
-        self._executor = ProcessPoolExecutor()
+        if executor not in _EXECUTORS:
+            raise ErrInvalidIdentifier(
+                "while creating the api context.",
+                f"Unknown executor '{executor}', expected one of: {', '.join(_EXECUTORS)}."
+            )
+
+        self._executor_type = executor
+
+        if executor == EXECUTOR_INLINE:
+            self._workers = 1
+        else:
+            self._workers = workers if workers is not None else (os.cpu_count() or 1)
+
+        assert self._workers >= 1
+
+        self._mp_context = multiprocessing.get_context(mp_context) if isinstance(mp_context, str) else mp_context
+
+        if interpretation_threads is None:
+            # every worker interprets the features of its own document, so the threads of all workers compete for the same processors
+            interpretation_threads = max(1, (os.cpu_count() or 1) // self._workers)
+
+        self._interpretation_threads = interpretation_threads
+        assert self._interpretation_threads >= 1
+
+        # paths to templates that every worker loads as soon as it starts
+        self._warm_template_paths: List[str] = []
+
+        # the executor is created once the first task is submitted
+        self._executor: Executor | None = None
+        self._executor_lock = threading.Lock()
+
+        # shared memory segments holding the images needed by the tasks, destroyed at the latest when the context is disposed
+        self._shared_image_segments: List[SharedImageSegment] = []
 
         self._mutator_factories: Dict[str, MutatorFactory] = {}
         self._matcher_factories: Dict[str, MatcherFactory] = {}
@@ -52,11 +129,91 @@ class Context:
     def _get_afi(self) -> AbstractFeedbackInterface:
         return self._afi
 
-    def _submit_task(self, task, description: str, *args, **kwargs) -> Future:
+    def _create_executor(self) -> Executor:
+
+        initializer = None
+
+        if len(self._warm_template_paths) > 0:
+            # every worker, including the ones replacing workers that have died, loads the templates before handling any task
+            initializer = functools.partial(
+                worker_warm_up,
+                list(self._warm_template_paths),
+                afi=DummyFeedbackInterface(),
+                mutator_factories=self._mutator_factories,
+                matcher_factories=self._matcher_factories,
+                supervisor_factories=self._supervisor_factories,
+                interpretation_factories=self._interpretation_factories
+            )
+
+        if self._executor_type == EXECUTOR_INLINE:
+            return InlineExecutor(initializer=initializer)
+
+        if self._executor_type == EXECUTOR_THREAD:
+            return ThreadPoolExecutor(max_workers=self._workers, initializer=initialize_worker_thread, initargs=(initializer,))
+
+        assert self._executor_type == EXECUTOR_PROCESS
+
+        # the worker processes must share the resource tracker of this process, otherwise they would consider the shared memory segments
+        # they have attached to as leaked, and try to destroy them once they exit
+        resource_tracker.ensure_running()
+
+        return ProcessPoolExecutor(max_workers=self._workers, mp_context=self._mp_context, initializer=initializer)
+
+    def _get_executor(self) -> Executor:
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+
+            return self._executor
+
+    def _share_image(self, image: IImage, /) -> SharedImageSegment:
+        """
+        Publishes the pixels of the given image in a shared memory segment, decoding the image only if it is not shared already.
+        The returned segment has been acquired on behalf of the caller, who is responsible for releasing the reference.
+        """
+
+        # images implemented by third parties might not call the constructor of IImage, in which case the attribute is missing
+        segment = getattr(image, "_shared_image_segment", None)
+
+        if segment is not None and segment.acquire():
+            return segment
+
+        segment = SharedImageSegment(image.load())
+        segment.acquire()
+
+        # noinspection PyProtectedMember
+        image._shared_image_segment = segment
+
+        # forget the segments that have already been destroyed
+        self._shared_image_segments = [s for s in self._shared_image_segments if not s.released]
+        self._shared_image_segments.append(segment)
+
+        return segment
+
+    def _submit_task(self, task, description: str, *args, shared_image_segments: Iterable[SharedImageSegment] = (),
+                     cancellable: bool = False, result_preprocessor: Callable[[Any], Any] | None = None, **kwargs) -> Future:
+        """
+        Submits the task to the pool of worker processes. The given shared image segments are kept alive until the task is done.
+        If the task is cancellable, cancelling the returned future stops the task even if it is already running,
+        provided that the task checks for cancellation regularly.
+        The optional result preprocessor is applied to the value returned by the task, before it is handed over to the caller.
+        """
+
+        shared_image_segments = list(shared_image_segments)
+
+        for segment in shared_image_segments:
+            acquired = segment.acquire()
+            assert acquired, "The shared image segment has been released before the task using it has been submitted."
 
         afi_fork = self._afi.fork(description)
 
-        python_future: PythonFuture = self._executor.submit(
+        cancellation_flag = CancellationFlag() if cancellable else None
+
+        if cancellation_flag is not None:
+            kwargs["cancellation_token"] = cancellation_flag.token
+
+        python_future: PythonFuture = self._get_executor().submit(
             task,
             *args,
             **kwargs,
@@ -70,7 +227,48 @@ class Context:
             interpretation_factories=self._interpretation_factories
         )
 
-        return Future(self, python_future, afi_fork=afi_fork)
+        for segment in shared_image_segments:
+            python_future.add_done_callback(lambda _, _segment=segment: _segment.release_reference())
+
+        if cancellation_flag is not None:
+            python_future.add_done_callback(lambda _: cancellation_flag.release())
+
+        return Future(self, python_future, afi_fork=afi_fork, cancellation_flag=cancellation_flag, result_preprocessor=result_preprocessor)
+
+    def warm_up(self, *templates: Template | str) -> None:
+        """
+        Preloads the given templates (or templates located at the given paths) into every worker,
+        so that no task has to wait for a template to be loaded. Workers started later load the templates as well.
+
+        Since the workers are restarted, this method should be called before submitting any tasks,
+        and after registering all custom mutators, matchers, supervisors and interpretations the templates depend on.
+        """
+
+        if self._disposed:
+            raise ErrInvalidState(
+                "while warming up the worker processes.",
+                "The resources have already been disposed."
+            )
+
+        for template in templates:
+            # noinspection PyProtectedMember
+            template_path = template if isinstance(template, str) else template._path
+
+            if template_path not in self._warm_template_paths:
+                self._warm_template_paths.append(template_path)
+
+        # replace the workers by ones that load the templates on startup
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+
+            self._executor = self._create_executor()
+
+        # start all workers right away, instead of once the first tasks arrive
+        python_futures = [self._get_executor().submit(os.getpid) for _ in range(self._workers)]
+
+        for python_future in python_futures:
+            python_future.result()
 
     def register_mutator(self, mutator_id: str, factory: MutatorFactory, /) -> None:
 
@@ -147,5 +345,15 @@ class Context:
 
     def dispose(self, exception_type: any = None, exception_value: BaseException | None = None, traceback: TracebackType | None = None) -> None:
         self._afi.dispose(exception_type, exception_value, traceback)
-        self._executor.shutdown(wait=True)
+
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+        for segment in self._shared_image_segments:
+            segment.release()
+
+        self._shared_image_segments = []
+
         self._disposed = True
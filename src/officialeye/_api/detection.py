@@ -1,37 +1,376 @@
 from __future__ import annotations
 
-from concurrent.futures import ALL_COMPLETED
-from typing import TYPE_CHECKING, List
+import asyncio
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED
+from typing import TYPE_CHECKING, Deque, Dict, Iterable, Iterator, List, Set, Tuple
 
-from officialeye._api.future import Future, wait
+from officialeye._api.future import Future, wait, wait_async
 from officialeye._api.template.supervision_result import ISupervisionResult
+from officialeye._api.template.template import Template
+
+# noinspection PyProtectedMember
+from officialeye._internal.api.rank import templates_rank
 
 # noinspection PyProtectedMember
 from officialeye._internal.feedback.verbosity import Verbosity
 
 # noinspection PyProtectedMember
 from officialeye._internal.template.external_supervision_result import ExternalSupervisionResult
+
+# noinspection PyProtectedMember
+from officialeye._internal.template.external_template import ExternalTemplate
 from officialeye.error.error import OEError
+from officialeye.error.errors.general import ErrOperationCancelled
 from officialeye.error.errors.internal import ErrInternal
 from officialeye.error.errors.supervision import ErrSupervisionCorrespondenceNotFound
 
 if TYPE_CHECKING:
     from officialeye._api.context import Context
     from officialeye._api.image import IImage
+    from officialeye._api.template.interpretation_result import IInterpretationResult
     from officialeye._api.template.template_interface import ITemplate
 
+    # noinspection PyProtectedMember
+    from officialeye._internal.template.template_ranking import TemplateRanking
+
+
+def _get_external_template(template: ITemplate, /) -> ExternalTemplate | None:
+
+    if isinstance(template, Template):
+        # noinspection PyProtectedMember
+        return template._get_external_template()
+
+    if isinstance(template, ExternalTemplate):
+        return template
+
+    return None
+
+
+class _DetectionJob:
+    """
+    Analysis of a single target image against multiple templates, advancing without blocking.
+    The features of the target image are extracted only once for all templates sharing the same target features key,
+    in which case the analysis tasks of these templates are submitted only once the extraction is done.
+
+    Optionally, the templates are first ranked by the similarity of their coarse signatures to the target image,
+    and only the best ranking templates, or the templates whose similarity reaches a cut-off, are analyzed at all.
+
+    Optionally, as soon as the result of a template meets the acceptance thresholds, the analyses of the remaining templates are cancelled,
+    and the result is accepted without waiting for them.
+    """
+
+    def __init__(self, context: Context, templates: Iterable[ITemplate], target: IImage, /, *,
+                 top_k: int | None = None, min_similarity: float | None = None,
+                 accept_score: float | None = None, accept_confidence: float | None = None):
+
+        assert top_k is None or top_k >= 1
+        assert min_similarity is None or 0.0 <= min_similarity <= 1.0
+        assert accept_confidence is None or 0.0 <= accept_confidence <= 1.0
+
+        self._context = context
+        self._templates = list(templates)
+        self._target = target
+
+        self._top_k = top_k
+        self._min_similarity = min_similarity
+
+        self._accept_score = accept_score
+        self._accept_confidence = accept_confidence
 
-def detect(context: Context, *templates: ITemplate, target: IImage) -> ISupervisionResult:
+        self._futures: List[Future] = []
 
-    futures: List[Future] = [
-        template.detect_async(target=target) for template in templates
-    ]
+        # the completed futures whose results have already been checked against the acceptance thresholds
+        self._checked_futures: Set[Future] = set()
+
+        # the future whose result meets the acceptance thresholds, None if there is no such future yet
+        self._accepted_future: Future | None = None
+
+        # the future ranking the templates by their coarse similarity to the target image, None if there is nothing to rank
+        self._ranking_future: Future | None = None
+
+        # keys: target features keys
+        # values: the extraction future and the templates waiting for it
+        self._pending_groups: Dict[str, Tuple[Future, List[ExternalTemplate]]] = {}
+
+        # the error that has prevented the tasks from being submitted at all, if any
+        self._error: OEError | None = None
+
+        try:
+            # keep the target image shared while the tasks are being submitted, so that it is decoded only once
+            # noinspection PyProtectedMember
+            self._target_segment = context._share_image(target)
+        except OEError as err:
+            self._target_segment = None
+            self._error = err
+            return
+
+        template_paths = [
+            external_template.get_path() for external_template in map(_get_external_template, self._templates) if external_template is not None
+        ]
+
+        if (top_k is not None or min_similarity is not None) and len(template_paths) > 0:
+            # noinspection PyProtectedMember
+            self._ranking_future = context._submit_task(
+                templates_rank,
+                "Ranking templates...",
+                template_paths,
+                target=self._target_segment.handle,
+                shared_image_segments=[self._target_segment],
+                cancellable=True
+            )
+        else:
+            self._submit(self._templates)
+
+        self._release_target_if_submitted()
+
+    def _submit(self, templates: Iterable[ITemplate], /) -> None:
+
+        # keys: target features keys
+        # values: templates with the corresponding target features key
+        template_groups: Dict[str, List[ExternalTemplate]] = {}
+
+        for template in templates:
+            external_template = _get_external_template(template)
+
+            if external_template is None or external_template.get_target_features_key() is None:
+                self._futures.append(template.detect_async(target=self._target))
+                continue
+
+            template_groups.setdefault(external_template.get_target_features_key(), []).append(external_template)
+
+        for target_features_key, template_group in template_groups.items():
+
+            if len(template_group) == 1:
+                # there is nothing to share
+                self._futures.append(template_group[0].detect_async(target=self._target))
+                continue
 
-    done, not_done = wait(futures, return_when=ALL_COMPLETED)
+            self._pending_groups[target_features_key] = (
+                template_group[0].extract_target_features_async(target=self._target), template_group
+            )
+
+    def _prune(self, ranking: TemplateRanking | None, /) -> List[ITemplate]:
+        """
+        Returns the templates that should be analyzed, given their ranking. Templates that could not be ranked are never pruned.
+        """
+
+        if ranking is None:
+            return self._templates
 
-    if len(not_done) > 0:
         # noinspection PyProtectedMember
-        context._get_afi().warn(Verbosity.DEBUG, "Some template analysis futures were not completed.")
+        afi = self._context._get_afi()
+
+        selected_templates: List[ITemplate] = []
+        ranked_templates: List[Tuple[float, ITemplate]] = []
+
+        for template in self._templates:
+            external_template = _get_external_template(template)
+            similarity = ranking.get_similarity(external_template.get_path()) if external_template is not None else None
+
+            if similarity is None:
+                selected_templates.append(template)
+            else:
+                ranked_templates.append((similarity, template))
+
+        # the sort is stable, so that templates with the same similarity keep their order
+        ranked_templates.sort(key=lambda ranked_template: ranked_template[0], reverse=True)
+
+        for rank, (similarity, template) in enumerate(ranked_templates):
+
+            if self._min_similarity is not None and similarity < self._min_similarity:
+                afi.info(
+                    Verbosity.INFO,
+                    f"Pruned template '{template.identifier}', its similarity {similarity:.3f} is below {self._min_similarity:.3f}."
+                )
+                continue
+
+            if self._top_k is not None and rank >= self._top_k:
+                afi.info(
+                    Verbosity.INFO,
+                    f"Pruned template '{template.identifier}', its similarity {similarity:.3f} ranks #{rank + 1} out of {len(ranked_templates)}."
+                )
+                continue
+
+            afi.info(Verbosity.DEBUG, f"Kept template '{template.identifier}' with similarity {similarity:.3f} ranking #{rank + 1}.")
+            selected_templates.append(template)
+
+        return selected_templates
+
+    @property
+    def target(self) -> IImage:
+        return self._target
+
+    def _release_target_if_submitted(self):
+        if self._ranking_future is None and len(self._pending_groups) == 0 and self._target_segment is not None:
+            self._target_segment.release_reference()
+            self._target_segment = None
+
+    def advance(self) -> None:
+        """
+        Submits the analysis tasks of the templates that have survived the ranking,
+        as well as of the templates whose target features have been extracted in the meantime.
+        """
+
+        if self._ranking_future is not None and self._ranking_future.done():
+
+            ranking_future = self._ranking_future
+            self._ranking_future = None
+
+            if not ranking_future.cancelled() and ranking_future.exception() is None:
+                ranking = ranking_future.result()
+            else:
+                # noinspection PyProtectedMember
+                self._context._get_afi().warn(Verbosity.DEBUG, "Could not rank the templates, analyzing all of them.")
+                ranking = None
+
+            self._submit(self._prune(ranking))
+
+        for target_features_key, (extraction_future, template_group) in list(self._pending_groups.items()):
+
+            if not extraction_future.done():
+                continue
+
+            del self._pending_groups[target_features_key]
+
+            if not extraction_future.cancelled() and extraction_future.exception() is None:
+                target_features = extraction_future.result()
+            else:
+                # let each of the analysis workers extract the features on its own, so that the errors are reported consistently
+                # noinspection PyProtectedMember
+                self._context._get_afi().warn(
+                    Verbosity.DEBUG, "Could not extract the features of the target image, falling back to per-template extraction."
+                )
+                target_features = None
+
+            for external_template in template_group:
+                self._futures.append(external_template.detect_async(target=self._target, target_features=target_features))
+
+        self._release_target_if_submitted()
+
+        self._accept_if_decisive()
+
+    def _is_decisive(self, result: ISupervisionResult, /) -> bool:
+        """
+        Decides whether the given result meets all the specified acceptance thresholds.
+        The confidence of a result is the portion of the matches of its template supporting it, i.e., its score divided by the number of matches.
+        """
+
+        if self._accept_score is None and self._accept_confidence is None:
+            return False
+
+        if self._accept_score is not None and result.score < self._accept_score:
+            return False
+
+        if self._accept_confidence is not None:
+            match_count = result.matching_result.get_total_match_count()
+
+            if match_count == 0 or result.score / match_count < self._accept_confidence:
+                return False
+
+        return True
+
+    def _accept_if_decisive(self) -> None:
+        """
+        Accepts the first completed result meeting the acceptance thresholds, and cancels the analyses of all the other templates.
+        """
+
+        if self._accepted_future is not None or (self._accept_score is None and self._accept_confidence is None):
+            return
+
+        for future in self._futures:
+
+            if future in self._checked_futures or not future.done():
+                continue
+
+            self._checked_futures.add(future)
+
+            if future.cancelled() or future.exception() is not None:
+                continue
+
+            result = future.result()
+
+            if not self._is_decisive(result):
+                continue
+
+            # noinspection PyProtectedMember
+            self._context._get_afi().info(
+                Verbosity.INFO,
+                f"Template '{result.template.identifier}' yielded a result with score {result.score} meeting the acceptance thresholds, "
+                f"cancelling the analysis of the remaining templates."
+            )
+
+            self._accepted_future = future
+            self.cancel()
+
+            return
+
+    def get_pending_futures(self) -> List[Future]:
+        """ Returns the futures this job is waiting for. """
+        pending_futures = [future for future in self._futures if not future.done()] + [
+            extraction_future for extraction_future, _ in self._pending_groups.values()
+        ]
+
+        if self._ranking_future is not None:
+            pending_futures.append(self._ranking_future)
+
+        return pending_futures
+
+    def done(self) -> bool:
+
+        if self._accepted_future is not None:
+            return True
+
+        return self._ranking_future is None and len(self._pending_groups) == 0 and all(future.done() for future in self._futures)
+
+    def wait(self) -> None:
+        while not self.done():
+            wait(self.get_pending_futures(), return_when=FIRST_COMPLETED)
+            self.advance()
+
+    async def wait_async(self) -> None:
+        try:
+            while not self.done():
+                await wait_async(self.get_pending_futures(), return_when=FIRST_COMPLETED)
+                self.advance()
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+
+    def cancel(self) -> None:
+
+        for future in self._futures:
+            if future is not self._accepted_future:
+                # the analyses that are already running are asked to stop
+                future.cancel()
+
+        for extraction_future, _ in self._pending_groups.values():
+            extraction_future.cancel()
+
+        if self._ranking_future is not None:
+            self._ranking_future.cancel()
+
+        self._ranking_future = None
+        self._pending_groups = {}
+        self._release_target_if_submitted()
+
+    def result(self) -> ISupervisionResult:
+        """
+        Returns the best result among the results of the individual templates. The job must be done.
+        """
+
+        assert self.done()
+
+        if self._error is not None:
+            raise self._error
+
+        if self._accepted_future is not None:
+            return self._accepted_future.result()
+
+        return _choose_best_result(self._context, self._futures)
+
+
+def _choose_best_result(context: Context, done: Iterable[Future], /) -> ISupervisionResult:
 
     regular_errors: List[OEError] = []
 
@@ -42,7 +381,7 @@ def detect(context: Context, *templates: ITemplate, target: IImage) -> ISupervis
 
         assert isinstance(completed_future, Future)
 
-        if completed_future.cancelled():
+        if completed_future.cancelled() or isinstance(completed_future.exception(), ErrOperationCancelled):
             # noinspection PyProtectedMember
             context._get_afi().warn(Verbosity.DEBUG, "A template analysis future was cancelled.")
             continue
@@ -100,3 +439,157 @@ def detect(context: Context, *templates: ITemplate, target: IImage) -> ISupervis
         raise error
 
     return best_result
+
+
+def detect(context: Context, *templates: ITemplate, target: IImage, top_k: int | None = None, min_similarity: float | None = None,
+           accept_score: float | None = None, accept_confidence: float | None = None) -> ISupervisionResult:
+    """
+    Analyzes the target image against the given templates, returning the best supervision result.
+
+    With many templates, most of them can be pruned before the full analysis is run. To this end, the templates are ranked
+    by the similarity of their coarse signatures to the target image, a number between 0 and 1,
+    and the decisions about which templates have been pruned are reported through the feedback interface.
+
+    Moreover, the analysis can stop as soon as the result of one of the templates is decisive, i.e., meets all the specified acceptance thresholds.
+    In that case, the analyses of the remaining templates are cancelled, or asked to stop if they are already running.
+
+    Arguments:
+        context: The context whose worker processes should be used.
+        templates: The templates to match the target image against.
+        target: The target image.
+        top_k: If specified, only the given number of best ranking templates is analyzed.
+        min_similarity: If specified, only the templates whose similarity reaches the given cut-off are analyzed.
+        accept_score: If specified, a result whose score reaches the given value is decisive.
+        accept_confidence: If specified, a result is decisive if the portion of the matches of its template supporting it,
+            i.e., its score divided by the number of matches, reaches the given value between 0 and 1.
+
+    Returns:
+        The first decisive result, or the best supervision result among the results of the analyzed templates if there is none.
+    """
+
+    job = _DetectionJob(context, templates, target, top_k=top_k, min_similarity=min_similarity, accept_score=accept_score,
+                        accept_confidence=accept_confidence)
+    job.wait()
+
+    return job.result()
+
+
+def detect_and_interpret(context: Context, *templates: ITemplate, target: IImage, interpretation_target: IImage | None = None,
+                         top_k: int | None = None, min_similarity: float | None = None, accept_score: float | None = None,
+                         accept_confidence: float | None = None) -> IInterpretationResult:
+    """
+    Detects the best matching template in the target image, and interprets its features in the interpretation target image,
+    by default in the target image itself. The supervision result is available in the returned interpretation result.
+
+    If there is only one template, the detection and the interpretation are performed by a single task,
+    which saves transferring the supervision result back and forth between the processes, as well as decoding the images twice.
+    Otherwise, the templates are pruned and the decisive results are accepted as described by the detect function.
+    """
+
+    if interpretation_target is None:
+        interpretation_target = target
+
+    if len(templates) == 1:
+        return templates[0].detect_and_interpret(target=target, interpretation_target=interpretation_target)
+
+    # interpreting the features in advance for every template would be a waste, since only the best result is interpreted
+    supervision_result = detect(context, *templates, target=target, top_k=top_k, min_similarity=min_similarity, accept_score=accept_score,
+                                accept_confidence=accept_confidence)
+
+    return supervision_result.interpret(target=interpretation_target)
+
+
+async def async_detect(context: Context, *templates: ITemplate, target: IImage, top_k: int | None = None, min_similarity: float | None = None,
+                       accept_score: float | None = None, accept_confidence: float | None = None) -> ISupervisionResult:
+    """
+    The counterpart of the detect function that does not block the running event loop while the templates are being loaded and analyzed.
+    """
+
+    # load the templates concurrently, instead of one by one as the analysis tasks are being submitted
+    await asyncio.gather(*(template.load_async() for template in templates if isinstance(template, Template)))
+
+    job = _DetectionJob(context, templates, target, top_k=top_k, min_similarity=min_similarity, accept_score=accept_score,
+                        accept_confidence=accept_confidence)
+    await job.wait_async()
+
+    return job.result()
+
+
+def detect_many(context: Context, *templates: ITemplate, targets: Iterable[IImage], ordered: bool = True,
+                max_in_flight: int | None = None, top_k: int | None = None,
+                min_similarity: float | None = None, accept_score: float | None = None,
+                accept_confidence: float | None = None) -> Iterator[Tuple[IImage, ISupervisionResult | OEError]]:
+    """
+    Analyzes each of the target images against the given templates, yielding the target images together with their results.
+    The analyses of different target images overlap, and the targets are consumed only as fast as the results are consumed.
+
+    Arguments:
+        context: The context whose worker processes should be used.
+        templates: The templates to match the target images against.
+        targets: The target images, possibly a lazily evaluated iterable.
+        ordered: Whether the results should be yielded in the order of the targets, or as soon as they are available.
+        max_in_flight: The maximal number of target images being analyzed at the same time. By default, twice the number of workers.
+        top_k: If specified, only the given number of best ranking templates is analyzed for each target image, see the detect function.
+        min_similarity: If specified, only the templates whose similarity reaches the given cut-off are analyzed, see the detect function.
+        accept_score: If specified, a result whose score reaches the given value is accepted immediately, see the detect function.
+        accept_confidence: If specified, a result whose confidence reaches the given value is accepted immediately, see the detect function.
+
+    Returns:
+        An iterator over pairs consisting of a target image and either its best supervision result,
+        or the error that has prevented the image from being analyzed.
+    """
+
+    if max_in_flight is None:
+        # noinspection PyProtectedMember
+        max_in_flight = 2 * context._workers
+
+    assert max_in_flight >= 1
+
+    targets = iter(targets)
+    targets_exhausted = False
+
+    jobs: Deque[_DetectionJob] = deque()
+
+    try:
+        while True:
+
+            # start analyzing further target images, unless too many of them are being analyzed already
+            while not targets_exhausted and len(jobs) < max_in_flight:
+                try:
+                    jobs.append(_DetectionJob(context, templates, next(targets), top_k=top_k, min_similarity=min_similarity,
+                                              accept_score=accept_score, accept_confidence=accept_confidence))
+                except StopIteration:
+                    targets_exhausted = True
+
+            if len(jobs) == 0:
+                return
+
+            if ordered:
+                finished_jobs = []
+                while len(jobs) > 0 and jobs[0].done():
+                    finished_jobs.append(jobs.popleft())
+            else:
+                finished_jobs = [job for job in jobs if job.done()]
+                for job in finished_jobs:
+                    jobs.remove(job)
+
+            if len(finished_jobs) == 0:
+                pending_futures = [future for job in jobs for future in job.get_pending_futures()]
+                wait(pending_futures, return_when=FIRST_COMPLETED)
+
+                for job in jobs:
+                    job.advance()
+
+                continue
+
+            for job in finished_jobs:
+                try:
+                    result = job.result()
+                except OEError as err:
+                    yield job.target, err
+                else:
+                    yield job.target, result
+    finally:
+        # the consumer may stop early, in which case the remaining work is abandoned
+        for job in jobs:
+            job.cancel()
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 from concurrent.futures import ALL_COMPLETED
 from concurrent.futures import Future as PythonFuture
 from concurrent.futures import wait as python_wait
-from typing import TYPE_CHECKING, Any, Dict, Iterable, Set, Tuple
+from contextlib import suppress
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generator, Iterable, Set, Tuple
 
 # noinspection PyProtectedMember
 from officialeye._internal.api_implementation import IApiInterfaceImplementation
@@ -14,14 +16,24 @@ from officialeye._internal.feedback.abstract import AbstractFeedbackInterface
 if TYPE_CHECKING:
     from officialeye._api.context import Context
 
+    # noinspection PyProtectedMember
+    from officialeye._internal.cancellation import CancellationFlag
+
 
 class Future:
 
-    def __init__(self, context: Context, python_future: PythonFuture, /, *, afi_fork: AbstractFeedbackInterface):
+    def __init__(self, context: Context, python_future: PythonFuture, /, *, afi_fork: AbstractFeedbackInterface,
+                 cancellation_flag: CancellationFlag | None = None, result_preprocessor: Callable[[Any], Any] | None = None):
         self._context = context
         self._future = python_future
         self._afi_fork = afi_fork
 
+        # applied to the value returned by the call, e.g., to attach objects the parent process holds already
+        self._result_preprocessor = result_preprocessor
+
+        # the flag asking the task to stop, None if the task cannot be stopped once it is running
+        self._cancellation_flag = cancellation_flag
+
         self._afi_joined = False
 
     def cancel(self) -> bool:
@@ -29,8 +41,18 @@ class Future:
         Attempt to cancel the call.
         If the call is currently being executed and cannot be canceled, then the method will return False,
         otherwise the call will be canceled, and the method will return True.
+
+        A call that is already being executed, but supports cooperative cancellation, is asked to stop as soon as possible,
+        in which case it finishes with an ErrOperationCancelled error.
         """
-        return self._future.cancel()
+
+        if self._future.cancel():
+            return True
+
+        if self._cancellation_flag is not None and not self._future.done():
+            self._cancellation_flag.set()
+
+        return False
 
     def cancelled(self) -> bool:
         """ Return True if the call was successfully canceled. """
@@ -63,6 +85,9 @@ class Future:
 
         result = self._future.result(timeout=timeout)
 
+        if self._result_preprocessor is not None:
+            result = self._result_preprocessor(result)
+
         assert isinstance(result, IApiInterfaceImplementation), \
             "Every call to an internal API function should return a proper public API interface implementation"
 
@@ -72,6 +97,26 @@ class Future:
 
         return result
 
+    def __await__(self) -> Generator[Any, None, Any]:
+        """
+        Waits for the call to complete without blocking the running event loop, and returns the value returned by the call.
+        Cancelling the awaiting task attempts to cancel the call.
+        """
+        return self._await_result().__await__()
+
+    async def _await_result(self) -> Any:
+
+        try:
+            # the exception raised by the call, if any, is raised again below
+            with suppress(Exception):
+                await asyncio.wrap_future(self._future)
+        except asyncio.CancelledError:
+            # the wrapper only cancels calls that have not started yet, whereas running calls have to be asked to stop
+            self.cancel()
+            raise
+
+        return self.result()
+
     def exception(self, timeout: float | None = None) -> Any:
         """
         Return the exception raised by the call.
@@ -109,3 +154,25 @@ def wait(futures: Iterable[Future], /, *, timeout: float | None = None, return_w
     corresponding_not_done = set((original_futures[d] for d in not_done))
 
     return corresponding_done, corresponding_not_done
+
+
+async def wait_async(futures: Iterable[Future], /, *, return_when=ALL_COMPLETED) -> Tuple[Set[Future], Set[Future]]:
+    """
+    The counterpart of the wait function that does not block the running event loop.
+    """
+
+    original_futures: Dict[asyncio.Future, Future] = {}
+
+    for future in futures:
+        # noinspection PyProtectedMember
+        original_futures[asyncio.wrap_future(future._future)] = future
+
+    if len(original_futures) == 0:
+        return set(), set()
+
+    done, not_done = await asyncio.wait(original_futures.keys(), return_when=return_when)
+
+    corresponding_done = set((original_futures[d] for d in done))
+    corresponding_not_done = set((original_futures[d] for d in not_done))
+
+    return corresponding_done, corresponding_not_done
@@ -7,18 +7,24 @@ from typing import TYPE_CHECKING, List
 import cv2
 import numpy as np
 
-from officialeye.error.errors.io import ErrIOInvalidPath
+from officialeye.error.errors.io import ErrIOInvalidImage, ErrIOInvalidPath
 
 if TYPE_CHECKING:
     from officialeye._api.context import Context
     from officialeye._api.mutator import IMutator
 
+    # noinspection PyProtectedMember
+    from officialeye._internal.shared_image import SharedImageSegment
+
 
 class IImage(ABC):
 
     def __init__(self):
         super().__init__()
 
+        # the shared memory segment through which the worker processes access the pixels of this image, if there is one
+        self._shared_image_segment: SharedImageSegment | None = None
+
     @abstractmethod
     def load(self) -> np.ndarray:
         raise NotImplementedError()
@@ -29,15 +35,34 @@ class IImage(ABC):
 
 
 class Image(IImage):
+    """
+    An image that is either read from a file located at the given `path`, taken from the given BGR `array`,
+    or decoded from the given encoded `data`, such as the contents of a JPEG or PNG file.
+    Exactly one of these sources must be specified.
+    """
 
-    def __init__(self, context: Context, /, *, path: str):
+    def __init__(self, context: Context, /, *, path: str | None = None, array: np.ndarray | None = None, data: bytes | None = None):
         super().__init__()
 
+        if sum(source is not None for source in (path, array, data)) != 1:
+            raise ErrIOInvalidImage(
+                "while creating an image.",
+                "Exactly one of the `path`, `array` and `data` arguments must be specified."
+            )
+
+        if array is not None and (array.dtype != np.uint8 or array.ndim not in (2, 3) or array.ndim == 3 and array.shape[2] not in (1, 3, 4)):
+            raise ErrIOInvalidImage(
+                "while creating an image from an array.",
+                f"Expected an 8-bit grayscale, BGR or BGRA image, got an array of shape {array.shape} and type {array.dtype}."
+            )
+
         self._context = context
         self._mutators: List[IMutator] = []
         self._path = path
+        self._array = array
+        self._data = data
 
-    def load(self) -> np.ndarray:
+    def _load_from_path(self) -> np.ndarray:
 
         if not os.path.isfile(self._path):
             raise ErrIOInvalidPath(
@@ -51,7 +76,39 @@ class Image(IImage):
                 "The file at this path is not readable."
             )
 
-        img = cv2.imread(self._path, cv2.IMREAD_COLOR)
+        return cv2.imread(self._path, cv2.IMREAD_COLOR)
+
+    def _load_from_array(self) -> np.ndarray:
+
+        if self._array.ndim == 2 or self._array.shape[2] == 1:
+            return cv2.cvtColor(self._array, cv2.COLOR_GRAY2BGR)
+
+        if self._array.shape[2] == 4:
+            return cv2.cvtColor(self._array, cv2.COLOR_BGRA2BGR)
+
+        # the array is copied, so that neither the mutators nor the caller can modify the pixels seen by the other
+        return self._array.copy()
+
+    def _load_from_data(self) -> np.ndarray:
+
+        img = cv2.imdecode(np.frombuffer(self._data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+        if img is None:
+            raise ErrIOInvalidImage(
+                "while decoding an image from memory.",
+                "The data does not represent an image in any of the supported formats."
+            )
+
+        return img
+
+    def load(self) -> np.ndarray:
+
+        if self._path is not None:
+            img = self._load_from_path()
+        elif self._array is not None:
+            img = self._load_from_array()
+        else:
+            img = self._load_from_data()
 
         for mutator in self._mutators:
             img = mutator.mutate(img)
@@ -60,3 +117,6 @@ class Image(IImage):
 
     def apply_mutators(self, *mutators: IMutator):
         self._mutators += mutators
+
+        # the pixels changed, so they need to be shared anew
+        self._shared_image_segment = None
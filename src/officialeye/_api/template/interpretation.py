@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Hashable, List
 
 import numpy as np
 
@@ -22,6 +22,28 @@ class IInterpretation(ABC):
     def interpret(self, feature_img: np.ndarray, feature: IFeature, /) -> FeatureInterpretation:
         raise NotImplementedError()
 
+    def is_concurrent(self) -> bool:
+        """
+        Returns True if the interpretation may interpret multiple feature images at the same time, from different threads.
+        This is worthwhile for interpretations spending most of their time outside the Python interpreter,
+        for example in external processes, in which case the features of a document are interpreted in parallel.
+        """
+        return False
+
+    def get_batch_key(self) -> Hashable | None:
+        """
+        Returns a key identifying the features that may be interpreted together, or None if the feature should be interpreted on its own.
+        All features of a document whose interpretations have equal keys are passed to a single call of the interpret_batch method.
+        """
+        return None
+
+    def interpret_batch(self, feature_imgs: List[np.ndarray], features: List[IFeature], /) -> List[FeatureInterpretation]:
+        """
+        Interprets multiple feature images at once, returning the interpretations in the order of the features.
+        By default, the features are interpreted one by one.
+        """
+        return [self.interpret(feature_img, feature) for feature_img, feature in zip(feature_imgs, features, strict=True)]
+
 
 class Interpretation(IInterpretation, ABC):
 
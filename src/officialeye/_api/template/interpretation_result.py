@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING
 from officialeye._api.template.feature import IFeature
 
 if TYPE_CHECKING:
+    from officialeye._api.template.supervision_result import ISupervisionResult
     from officialeye._api.template.template_interface import ITemplate
     from officialeye.types import FeatureInterpretation
 
@@ -17,6 +18,11 @@ class IInterpretationResult(ABC):
     def template(self) -> ITemplate:
         raise NotImplementedError()
 
+    @property
+    def supervision_result(self) -> ISupervisionResult | None:
+        """ The supervision result according to which the features have been interpreted, or None if it is not known. """
+        return None
+
     @abstractmethod
     def get_feature_interpretation(self, feature: IFeature, /) -> FeatureInterpretation:
         raise NotImplementedError()
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Tuple, Union
 
 from officialeye._api.template.region import IRegion
 
@@ -15,5 +16,14 @@ class IKeypoint(IRegion, ABC):
     def matches_max(self) -> int:
         raise NotImplementedError()
 
+    @property
+    def search_region(self) -> Union[Tuple[float, float, float, float], None]:
+        """
+        The region of the target image in which the keypoint is expected to be located, as the (x, y, w, h) tuple
+        of coordinates relative to the size of the target image, i.e., between 0 and 1. None if the entire target image should be searched,
+        which is the default.
+        """
+        return None
+
     def __str__(self) -> str:
         return f"Keypoint '{self.identifier}'"
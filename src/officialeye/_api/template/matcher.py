@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Iterable
+from typing import TYPE_CHECKING, Any, Iterable, List, Tuple
 
 import numpy as np
 
@@ -33,6 +33,57 @@ class IMatcher(ABC):
     def get_matches_for_keypoint(self, keypoint: IKeypoint, /) -> Iterable[IMatch]:
         raise NotImplementedError()
 
+    def get_match_arrays_for_keypoint(self, keypoint: IKeypoint, /) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns the matches found for the given keypoint in a compact form, consisting of three arrays:
+        the (N, 2) array of points lying in the keypoint, the (N, 2) array of the corresponding points in the target image,
+        and the array of the N scores of the matches.
+
+        The default implementation collects the matches returned by `get_matches_for_keypoint`.
+        Matchers producing many matches should override this method, so that no IMatch instances need to be created.
+        """
+
+        matches: List[IMatch] = list(self.get_matches_for_keypoint(keypoint))
+
+        keypoint_points = np.array([match.keypoint_point for match in matches], dtype=np.int32).reshape(-1, 2)
+        target_points = np.array([match.target_point for match in matches], dtype=np.int32).reshape(-1, 2)
+        scores = np.array([match.get_score() for match in matches], dtype=np.float64)
+
+        return keypoint_points, target_points, scores
+
+    def get_cache_dir(self) -> str | None:
+        """
+        Returns the directory in which the data derived from the template, such as its features, should be persisted,
+        or None if the data should only be kept in memory, which is the default.
+        """
+        return None
+
+    def get_target_features_key(self) -> str | None:
+        """
+        Matchers that can extract features of the target image independently of the template (see `extract_target_features`)
+        should return a string here, such that two matchers returning the same string extract identical features from identical images.
+        Features extracted once can then be shared between all templates being matched against the same target image.
+
+        Returns None if the features extracted by this matcher cannot be shared, which is the default.
+        """
+        return None
+
+    def extract_target_features(self, target: np.ndarray, /) -> Any:
+        """
+        Extracts the features of the target image required by this matcher.
+        The returned object should be picklable and will be passed to `setup_with_target_features` later.
+        Needs to be implemented only if `get_target_features_key` does not return None.
+        """
+        raise NotImplementedError()
+
+    def setup_with_target_features(self, target_features: Any, template: ITemplate, /) -> None:
+        """
+        Serves the same purpose as `setup`, except that instead of the target image, the features extracted
+        from it via `extract_target_features` are provided.
+        Needs to be implemented only if `get_target_features_key` does not return None.
+        """
+        raise NotImplementedError()
+
 
 class Matcher(IMatcher, ABC):
 
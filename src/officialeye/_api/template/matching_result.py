@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Iterable
+from typing import TYPE_CHECKING, Iterable, List
+
+import numpy as np
 
 from officialeye._api.template.match import IMatch
 
@@ -27,3 +29,28 @@ class IMatchingResult(ABC):
     @abstractmethod
     def get_matches_for_keypoint(self, keypoint_id: str, /) -> Iterable[IMatch]:
         raise NotImplementedError()
+
+    # The methods below expose the matches in a columnar form, i.e., as arrays whose i-th rows all describe the i-th match
+    # yielded by `get_all_matches`. The default implementations collect the matches one by one,
+    # and should be overridden by implementations storing the matches in arrays in the first place.
+
+    def get_keypoint_ids(self) -> List[str]:
+        """ Returns the identifiers of the keypoints, in the order in which they are referred to by `get_keypoint_indices`. """
+        return [keypoint.identifier for keypoint in self.template.keypoints]
+
+    def get_keypoint_indices(self) -> np.ndarray:
+        """ Returns the array of N indices into `get_keypoint_ids` of the keypoints of the matches. """
+        keypoint_index = {keypoint_id: i for i, keypoint_id in enumerate(self.get_keypoint_ids())}
+        return np.array([keypoint_index[match.keypoint.identifier] for match in self.get_all_matches()], dtype=np.int32)
+
+    def get_template_points(self) -> np.ndarray:
+        """ Returns the (N, 2) array of the matched points, in the coordinate system of the template. """
+        return np.array([match.template_point for match in self.get_all_matches()], dtype=np.int32).reshape(-1, 2)
+
+    def get_target_points(self) -> np.ndarray:
+        """ Returns the (N, 2) array of the matched points, in the coordinate system of the target image. """
+        return np.array([match.target_point for match in self.get_all_matches()], dtype=np.int32).reshape(-1, 2)
+
+    def get_scores(self) -> np.ndarray:
+        """ Returns the array of the N scores of the matches. """
+        return np.array([match.get_score() for match in self.get_all_matches()], dtype=np.float64)
@@ -21,6 +21,12 @@ if TYPE_CHECKING:
 
 class ISupervisionResult(ABC):
 
+    def __init__(self):
+        super().__init__()
+
+        # the weighted mean squared error is computed on demand, and only once
+        self._weighted_mse: float | None = None
+
     @property
     @abstractmethod
     def template(self) -> ITemplate:
@@ -51,13 +57,14 @@ class ISupervisionResult(ABC):
     def transformation_matrix(self) -> np.ndarray:
         raise NotImplementedError()
 
-    def translate(self, template_point: np.ndarray, /) -> np.ndarray:
+    def translate(self, template_points: np.ndarray, /) -> np.ndarray:
         """
         Translates the given template point into a target point. That is, given a position in the template's coordinate system, this function
         outputs the corresponding position in the target image's coordinate system, according to the affine transformation model.
+        Multiple points can be translated at once by passing an array of shape (N, 2), in which case an array of the same shape is returned.
         """
-        assert template_point.shape == (2,)
-        return self.transformation_matrix @ (template_point - self.delta) + self.delta_prime
+        assert template_points.shape[-1] == 2 and template_points.ndim in (1, 2)
+        return (template_points - self.delta) @ self.transformation_matrix.T + self.delta_prime
 
     @abstractmethod
     def get_match_weight(self, match: IMatch, /) -> float:
@@ -71,41 +78,43 @@ class ISupervisionResult(ABC):
     def interpret(self, /, **kwargs) -> IInterpretationResult:
         raise NotImplementedError()
 
-    def get_weighted_mse(self, /) -> float:
-
-        error = 0.0
-        singificant_match_count = 0
+    def get_match_weights(self) -> np.ndarray:
+        """
+        Returns the array of weights of all matches, in the order in which the arrays of the matching result list them.
+        """
+        return np.array([self.get_match_weight(match) for match in self.matching_result.get_all_matches()], dtype=np.float64)
 
-        for match in self.matching_result.get_all_matches():
+    def get_weighted_mse(self, /) -> float:
 
-            match_weight = self.get_match_weight(match)
+        # subclasses are not required to call the constructor of this class, hence the attribute might be missing
+        if getattr(self, "_weighted_mse", None) is None:
+            self._weighted_mse = self._compute_weighted_mse()
 
-            if match_weight < sys.float_info.epsilon:
-                continue
+        return self._weighted_mse
 
-            singificant_match_count += 1
+    def _compute_weighted_mse(self, /) -> float:
 
-            s = match.template_point
+        match_weights = self.get_match_weights()
+        significant_matches = match_weights >= sys.float_info.epsilon
 
-            # calculate prediction
-            p = self.translate(s)
+        singificant_match_count = int(np.count_nonzero(significant_matches))
 
-            # calculate destination
-            d = match.target_point
+        s = self.matching_result.get_template_points()[significant_matches]
+        d = self.matching_result.get_target_points()[significant_matches]
 
-            current_error = p - d
-            current_error_value = np.dot(current_error, current_error)
+        # calculate predictions
+        p = self.translate(s)
 
-            error += current_error_value * match_weight
+        current_error = p - d
+        error = float(np.sum(np.sum(current_error * current_error, axis=1) * match_weights[significant_matches]))
 
         return error / singificant_match_count
 
     def warp_feature(self, feature: IFeature, target: np.ndarray, /) -> np.ndarray:
 
-        target_tl = self.translate(feature.top_left)
-        target_tr = self.translate(feature.top_right)
-        target_bl = self.translate(feature.bottom_left)
-        target_br = self.translate(feature.bottom_right)
+        target_tl, target_tr, target_br, target_bl = self.translate(
+            np.array([feature.top_left, feature.top_right, feature.bottom_right, feature.bottom_left])
+        )
 
         dest_tl = np.array([0, 0], dtype=np.float64)
         dest_tr = np.array([feature.w, 0], dtype=np.float64)
@@ -141,6 +150,10 @@ class SupervisionResult:
         # by default, the weight is 1.
         self._match_weights: Dict[IMatch, float] = {}
 
+        # alternatively, the weights of all matches can be specified at once,
+        # in the order in which the arrays of the matching result list the matches
+        self._match_weights_array: np.ndarray | None = None
+
         # an optional value the supervision engine can set, representing how confident the engine is in the result
         self._score = 0.0
 
@@ -168,6 +181,21 @@ class SupervisionResult:
         assert weight >= 0
         self._match_weights[match] = weight
 
+    def set_match_weights(self, weights: np.ndarray, /):
+        assert weights.ndim == 1
+        assert np.all(weights >= 0)
+        self._match_weights_array = weights
+
+    def get_match_weights(self, matching_result: IMatchingResult, /) -> np.ndarray:
+
+        if self._match_weights_array is not None:
+            assert self._match_weights_array.shape == (matching_result.get_total_match_count(),)
+            return self._match_weights_array
+
+        return np.array([
+            self._match_weights.get(match, 1.0) for match in matching_result.get_all_matches()
+        ], dtype=np.float64)
+
     def get_score(self) -> float:
         assert self._score >= 0.0
         return self._score
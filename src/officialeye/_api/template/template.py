@@ -15,6 +15,7 @@ from officialeye._internal.template.external_template import ExternalTemplate
 if TYPE_CHECKING:
     from officialeye._api.context import Context
     from officialeye._api.template.feature import IFeature
+    from officialeye._api.template.interpretation_result import IInterpretationResult
     from officialeye._api.template.keypoint import IKeypoint
     from officialeye._api.template.supervision_result import ISupervisionResult
 
@@ -51,6 +52,27 @@ class Template(ITemplate):
         assert self._external_template is not None
         assert isinstance(self._external_template, ExternalTemplate)
 
+    async def load_async(self) -> None:
+        """
+        The counterpart of the load method that does not block the running event loop.
+        """
+
+        if self._external_template is not None:
+            return
+
+        # noinspection PyProtectedMember
+        external_template = await self._context._submit_task(template_load, "Loading template...", self._path)
+
+        assert isinstance(external_template, ExternalTemplate)
+
+        # the template might have been loaded concurrently in the meantime
+        if self._external_template is None:
+            self._external_template = external_template
+
+    def _get_external_template(self) -> ExternalTemplate:
+        self.load()
+        return self._external_template
+
     def detect_async(self, /, *, target: IImage) -> Future:
         self.load()
         return self._external_template.detect_async(target=target)
@@ -59,6 +81,14 @@ class Template(ITemplate):
         self.load()
         return self._external_template.detect(**kwargs)
 
+    def detect_and_interpret_async(self, /, *, target: IImage, interpretation_target: IImage | None = None) -> Future:
+        self.load()
+        return self._external_template.detect_and_interpret_async(target=target, interpretation_target=interpretation_target)
+
+    def detect_and_interpret(self, /, **kwargs) -> IInterpretationResult:
+        self.load()
+        return self._external_template.detect_and_interpret(**kwargs)
+
     def get_image(self) -> IImage:
         self.load()
         return self._external_template.get_image()
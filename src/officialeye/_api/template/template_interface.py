@@ -4,6 +4,7 @@ from typing import Any, Iterable
 from officialeye._api.future import Future
 from officialeye._api.image import IImage
 from officialeye._api.template.feature import IFeature
+from officialeye._api.template.interpretation_result import IInterpretationResult
 from officialeye._api.template.keypoint import IKeypoint
 from officialeye._api.template.supervision_result import ISupervisionResult
 
@@ -33,6 +34,27 @@ class ITemplate(ABC):
     def detect(self, /, **kwargs) -> ISupervisionResult:
         raise NotImplementedError()
 
+    def detect_and_interpret_async(self, /, *, target: IImage, interpretation_target: IImage | None = None) -> Future:
+        """
+        Detects the template in the target image and interprets its features within a single task,
+        saving the round trip of the supervision result between the detection and the interpretation.
+        The features are interpreted in the interpretation target image, by default in the target image itself.
+
+        Implementations that do not override this method support only the blocking detect_and_interpret method.
+        """
+        raise NotImplementedError()
+
+    def detect_and_interpret(self, /, *, target: IImage, interpretation_target: IImage | None = None) -> IInterpretationResult:
+        """
+        The blocking counterpart of detect_and_interpret_async.
+        By default, the template is detected and the features of the supervision result are interpreted one after the other.
+        """
+
+        if interpretation_target is None:
+            interpretation_target = target
+
+        return self.detect(target=target).interpret(target=interpretation_target)
+
     @abstractmethod
     def get_image(self) -> IImage:
         raise NotImplementedError()
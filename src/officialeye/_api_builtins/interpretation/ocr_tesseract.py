@@ -1,18 +1,30 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Hashable, List
 
 import numpy as np
 from pytesseract import pytesseract
 
 # noinspection PyProtectedMember
 from officialeye._api.template.interpretation import Interpretation
+from officialeye._api_builtins.interpretation import tesseract_engine
+from officialeye._api_builtins.interpretation.tesseract_batch import FeatureCanvas, get_batch_config
+from officialeye.error.errors.template import ErrTemplateInvalidInterpretation
 
 if TYPE_CHECKING:
     # noinspection PyProtectedMember
     from officialeye._api.template.feature import IFeature
     from officialeye.types import ConfigDict, FeatureInterpretation
 
+# use persistent engines whenever possible, otherwise fall back to running the tesseract executable
+_ENGINE_AUTO = "auto"
+# always use persistent engines, provided by the tesserocr package
+_ENGINE_PERSISTENT = "persistent"
+# run the tesseract executable for every feature
+_ENGINE_EXECUTABLE = "executable"
+
+_ENGINES = (_ENGINE_AUTO, _ENGINE_PERSISTENT, _ENGINE_EXECUTABLE)
+
 
 class TesseractInterpretation(Interpretation):
 
@@ -24,5 +36,86 @@ class TesseractInterpretation(Interpretation):
         self._tesseract_lang = self.config.get("lang", default="eng", value_preprocessor=str)
         self._tesseract_config = self.config.get("config", default="", value_preprocessor=str)
 
+        def _engine_preprocessor(v: str) -> str:
+
+            v = str(v)
+
+            if v not in _ENGINES:
+                raise ErrTemplateInvalidInterpretation(
+                    f"while loading the '{TesseractInterpretation.INTERPRETATION_ID}' interpretation.",
+                    f"The `engine` value '{v}' is invalid, expected one of: {', '.join(_ENGINES)}."
+                )
+
+            return v
+
+        engine = self.config.get("engine", default=_ENGINE_AUTO, value_preprocessor=_engine_preprocessor)
+
+        def _batch_preprocessor(v: str) -> bool:
+
+            v = str(v).lower()
+
+            if v not in ("yes", "true", "no", "false"):
+                raise ErrTemplateInvalidInterpretation(
+                    f"while loading the '{TesseractInterpretation.INTERPRETATION_ID}' interpretation.",
+                    f"The `batch` value '{v}' is invalid, expected one of: yes, no."
+                )
+
+            return v in ("yes", "true")
+
+        # whether the features of a document sharing the language and configuration should be recognized in a single pass
+        self._batch = self.config.get("batch", default=False, value_preprocessor=_batch_preprocessor)
+        self._batch_config = get_batch_config(self._tesseract_config)
+
+        self._engine = engine
+
+        # None indicates that the tesseract executable should be run instead
+        self._engine_pool = self._get_engine_pool(self._tesseract_config)
+        self._batch_engine_pool = self._get_engine_pool(self._batch_config) if self._batch else None
+
+    def _get_engine_pool(self, config: str, /) -> tesseract_engine.TesseractEnginePool | None:
+
+        if self._engine == _ENGINE_EXECUTABLE:
+            return None
+
+        engine_options = tesseract_engine.parse_tesseract_config(self._tesseract_lang, config)
+
+        if tesseract_engine.is_available() and engine_options is not None:
+            return tesseract_engine.get_engine_pool(self._tesseract_lang, config, engine_options)
+
+        if self._engine == _ENGINE_PERSISTENT:
+            raise ErrTemplateInvalidInterpretation(
+                f"while loading the '{TesseractInterpretation.INTERPRETATION_ID}' interpretation.",
+                "Persistent engines require the tesserocr package to be installed, and support only the "
+                "--psm, --oem, --dpi, --tessdata-dir and -c options in `config`."
+            )
+
+        return None
+
     def interpret(self, feature_img: np.ndarray, feature: IFeature, /) -> FeatureInterpretation:
+
+        if self._engine_pool is not None:
+            return self._engine_pool.recognize(feature_img).strip()
+
         return pytesseract.image_to_string(feature_img, lang=self._tesseract_lang, config=self._tesseract_config).strip()
+
+    def is_concurrent(self) -> bool:
+        # every call either runs a separate tesseract process, or uses an engine no other thread is using at the same time
+        return True
+
+    def get_batch_key(self) -> Hashable | None:
+
+        if not self._batch:
+            return None
+
+        return TesseractInterpretation.INTERPRETATION_ID, self._tesseract_lang, self._tesseract_config, self._engine
+
+    def interpret_batch(self, feature_imgs: List[np.ndarray], features: List[IFeature], /) -> List[FeatureInterpretation]:
+
+        canvas = FeatureCanvas(feature_imgs)
+
+        if self._batch_engine_pool is not None:
+            tsv = self._batch_engine_pool.recognize(canvas.image, tsv=True)
+        else:
+            tsv = pytesseract.image_to_data(canvas.image, lang=self._tesseract_lang, config=self._batch_config)
+
+        return [text.strip() for text in canvas.split_tsv(tsv)]
@@ -0,0 +1,160 @@
+"""
+Module implementing the recognition of multiple feature images in a single Tesseract OCR pass.
+The feature images are stacked on top of each other into a single canvas, separated by blank space,
+and the words recognized on the canvas are mapped back to the feature images according to their bounding boxes.
+"""
+
+from __future__ import annotations
+
+import bisect
+import shlex
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+# page segmentation mode used for the canvas, assuming a single column of text lines of variable sizes
+BATCH_PSM = 4
+
+# the blank space between two feature images, relative to the height of the higher one
+_SEPARATOR_FACTOR = 0.5
+_MIN_SEPARATOR = 10
+
+# the blank space around the feature images
+_MARGIN = 10
+
+_BACKGROUND = 255
+
+
+def get_batch_config(config: str, /) -> str:
+    """
+    Replaces the page segmentation mode in the given tesseract configuration by the one suitable for the canvas,
+    since modes like the single line one cannot be used for multiple feature images at once.
+    """
+
+    args = shlex.split(config)
+    batch_args = []
+
+    i = 0
+
+    while i < len(args):
+        if args[i] == "--psm":
+            i += 2
+            continue
+
+        batch_args.append(args[i])
+        i += 1
+
+    batch_args += ["--psm", str(BATCH_PSM)]
+
+    return shlex.join(batch_args)
+
+
+class FeatureCanvas:
+    """
+    A canvas holding multiple feature images, stacked on top of each other.
+    """
+
+    def __init__(self, feature_imgs: List[np.ndarray], /):
+
+        assert len(feature_imgs) > 0
+
+        color = any(img.ndim == 3 for img in feature_imgs)
+
+        feature_imgs = [self._normalize(img, color) for img in feature_imgs]
+
+        width = max(img.shape[1] for img in feature_imgs) + 2 * _MARGIN
+
+        # the vertical ranges of the canvas occupied by the feature images
+        self._tops: List[int] = []
+        self._bottoms: List[int] = []
+
+        y = _MARGIN
+
+        for i, img in enumerate(feature_imgs):
+
+            if i > 0:
+                y += max(_MIN_SEPARATOR, int(_SEPARATOR_FACTOR * max(img.shape[0], feature_imgs[i - 1].shape[0])))
+
+            self._tops.append(y)
+            self._bottoms.append(y + img.shape[0])
+
+            y += img.shape[0]
+
+        height = y + _MARGIN
+
+        shape = (height, width, 3) if color else (height, width)
+        self._canvas = np.full(shape, _BACKGROUND, dtype=np.uint8)
+
+        for img, top in zip(feature_imgs, self._tops, strict=True):
+            self._canvas[top:top + img.shape[0], _MARGIN:_MARGIN + img.shape[1]] = img
+
+    @staticmethod
+    def _normalize(img: np.ndarray, color: bool, /) -> np.ndarray:
+
+        img = img.astype(np.uint8, copy=False)
+
+        if img.ndim == 3 and img.shape[2] == 1:
+            img = img[:, :, 0]
+
+        if img.ndim == 3 and img.shape[2] == 4:
+            img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+
+        if color and img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+
+        return img
+
+    @property
+    def image(self) -> np.ndarray:
+        return self._canvas
+
+    def get_feature_index(self, top: int, bottom: int, /) -> int:
+        """ Returns the index of the feature image a box with the given vertical range belongs to. """
+
+        center = (top + bottom) / 2
+
+        i = bisect.bisect_right(self._tops, center) - 1
+
+        if i < 0:
+            return 0
+
+        if center < self._bottoms[i] or i + 1 == len(self._tops):
+            return i
+
+        # the box lies in the blank space between two feature images, take the closer one
+        return i if center - self._bottoms[i] <= self._tops[i + 1] - center else i + 1
+
+    def split_tsv(self, tsv: str, /) -> List[str]:
+        """
+        Maps the words of the given recognition result, in the TSV format of tesseract, back to the feature images.
+        Returns the text of every feature image, with the words of a line separated by spaces, and the lines separated by newlines.
+        """
+
+        # keys: feature indices
+        # values: lines of the feature image, in the order of recognition, each being identified by the block, paragraph and line number
+        feature_lines: Dict[int, Dict[Tuple[int, int, int], List[str]]] = {}
+
+        for row in tsv.splitlines():
+
+            columns = row.split("\t")
+
+            # skip the header, malformed rows, as well as the rows not describing words
+            if len(columns) < 12 or columns[0] != "5":
+                continue
+
+            text = columns[11].strip()
+
+            if text == "":
+                continue
+
+            block, paragraph, line = int(columns[2]), int(columns[3]), int(columns[4])
+            top, height = int(columns[7]), int(columns[9])
+
+            feature_index = self.get_feature_index(top, top + height)
+
+            feature_lines.setdefault(feature_index, {}).setdefault((block, paragraph, line), []).append(text)
+
+        return [
+            "\n".join(" ".join(words) for words in feature_lines.get(i, {}).values()) for i in range(len(self._tops))
+        ]
@@ -0,0 +1,219 @@
+"""
+Module implementing a pool of persistent Tesseract OCR engines.
+Running the tesseract executable for every feature means starting a process, writing the image to a temporary file,
+and loading the language model over and over again. Instead, the engines provided by the optional tesserocr package
+are initialized once per language and configuration, and then reused by all subsequent interpretations within the process.
+"""
+
+from __future__ import annotations
+
+import os
+import shlex
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+
+def is_available() -> bool:
+    return tesserocr is not None
+
+
+class TesseractEngineOptions:
+    """
+    The options of the tesseract executable, translated to the initialization parameters of an engine.
+    """
+
+    def __init__(self, lang: str, /):
+        self.lang = lang
+        self.psm: int | None = None
+        self.oem: int | None = None
+        self.tessdata_dir: str | None = None
+        self.variables: Dict[str, str] = {}
+
+
+def parse_tesseract_config(lang: str, config: str, /) -> TesseractEngineOptions | None:
+    """
+    Translates the command line options of the tesseract executable into the options of an engine.
+    Returns None if the options contain something an engine cannot reproduce, in which case the executable should be used instead.
+    """
+
+    options = TesseractEngineOptions(lang)
+
+    args = shlex.split(config)
+
+    i = 0
+
+    while i < len(args):
+
+        arg = args[i]
+
+        if arg in ("--psm", "--oem", "--dpi", "--tessdata-dir", "-l", "-c") and i + 1 < len(args):
+            value = args[i + 1]
+            i += 2
+        elif arg.startswith("-c") and len(arg) > 2:
+            value = arg[2:]
+            arg = "-c"
+            i += 1
+        else:
+            return None
+
+        if arg == "--psm":
+            if not value.isdigit():
+                return None
+            options.psm = int(value)
+        elif arg == "--oem":
+            if not value.isdigit():
+                return None
+            options.oem = int(value)
+        elif arg == "--dpi":
+            options.variables["user_defined_dpi"] = value
+        elif arg == "--tessdata-dir":
+            options.tessdata_dir = value
+        elif arg == "-l":
+            options.lang = value
+        else:
+            assert arg == "-c"
+
+            if "=" not in value:
+                return None
+
+            variable, variable_value = value.split("=", 1)
+            options.variables[variable] = variable_value
+
+    return options
+
+
+class _TesseractEngine:
+
+    def __init__(self, options: TesseractEngineOptions, /):
+
+        assert tesserocr is not None
+
+        kwargs = {
+            "lang": options.lang,
+            "variables": options.variables
+        }
+
+        if options.psm is not None:
+            kwargs["psm"] = options.psm
+
+        if options.oem is not None:
+            kwargs["oem"] = options.oem
+
+        if options.tessdata_dir is not None:
+            kwargs["path"] = options.tessdata_dir
+
+        self._api = tesserocr.PyTessBaseAPI(**kwargs)
+
+    def is_healthy(self) -> bool:
+        # an engine that has lost its language model cannot recognize anything
+        return self._api.GetInitLanguagesAsString() != ""
+
+    def recognize(self, img: np.ndarray, /, *, tsv: bool = False) -> str:
+        """
+        Recognizes the text in the given image. Returns either the plain text,
+        or the words together with their bounding boxes in the TSV format of tesseract, without the header.
+        """
+
+        if img.ndim == 2:
+            img = img[:, :, np.newaxis]
+
+        # the pixels are passed in the same channel order as by pytesseract, so that both yield the same results
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+
+        height, width, channels = img.shape
+
+        self._api.SetImageBytes(img.tobytes(), width, height, channels, width * channels)
+
+        try:
+            if tsv:
+                return self._api.GetTSVText(0)
+
+            return self._api.GetUTF8Text()
+        finally:
+            self._api.Clear()
+
+    def end(self) -> None:
+        self._api.End()
+
+
+class TesseractEnginePool:
+    """
+    A pool of engines sharing the same language and configuration.
+    Every engine is used by at most one thread at a time, and new engines are started as the number of concurrent interpretations grows.
+    """
+
+    def __init__(self, options: TesseractEngineOptions, /):
+        self._options = options
+
+        self._idle_engines: List[_TesseractEngine] = []
+        self._lock = Lock()
+
+    @contextmanager
+    def _engine(self) -> Iterator[_TesseractEngine]:
+
+        engine = None
+
+        with self._lock:
+            while len(self._idle_engines) > 0 and engine is None:
+                engine = self._idle_engines.pop()
+
+                if not engine.is_healthy():
+                    engine.end()
+                    engine = None
+
+        if engine is None:
+            engine = _TesseractEngine(self._options)
+
+        try:
+            yield engine
+        except BaseException:
+            # the engine might have been left in an inconsistent state, so it is not given back to the pool
+            engine.end()
+            raise
+
+        with self._lock:
+            self._idle_engines.append(engine)
+
+    def recognize(self, img: np.ndarray, /, *, tsv: bool = False) -> str:
+
+        try:
+            with self._engine() as engine:
+                return engine.recognize(img, tsv=tsv)
+        except RuntimeError:
+            # the engine has crashed, retry once with a fresh one
+            with self._engine() as engine:
+                return engine.recognize(img, tsv=tsv)
+
+
+# keys: languages and configurations
+# values: the corresponding engine pools of the current process
+_engine_pools: Dict[Tuple[str, str], TesseractEnginePool] = {}
+_engine_pools_lock = Lock()
+_engine_pools_pid = os.getpid()
+
+
+def get_engine_pool(lang: str, config: str, options: TesseractEngineOptions, /) -> TesseractEnginePool:
+
+    global _engine_pools, _engine_pools_pid
+
+    with _engine_pools_lock:
+
+        if _engine_pools_pid != os.getpid():
+            # the engines of the parent process cannot be shared with a forked child process
+            _engine_pools = {}
+            _engine_pools_pid = os.getpid()
+
+        key = (lang, config)
+
+        if key not in _engine_pools:
+            _engine_pools[key] = TesseractEnginePool(options)
+
+        return _engine_pools[key]
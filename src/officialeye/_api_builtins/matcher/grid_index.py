@@ -0,0 +1,75 @@
+"""
+Module implementing a spatial index over the locations of the features of an image.
+The image is divided into a grid of cells, and the features are sorted by the cell they are located in,
+so that the features within a rectangle can be found by visiting only the cells overlapping with the rectangle.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+# the average number of points per cell the grid is dimensioned for
+_POINTS_PER_CELL = 16
+
+
+class GridIndex:
+
+    def __init__(self, points: np.ndarray, width: int, height: int, /):
+
+        assert points.ndim == 2 and points.shape[1] == 2
+
+        self._width = max(width, 1)
+        self._height = max(height, 1)
+
+        # the number of columns and rows of the grid, chosen such that the cells are roughly square
+        cell_count = max(1, points.shape[0] // _POINTS_PER_CELL)
+        cell_size = max(1.0, float(np.sqrt(self._width * self._height / cell_count)))
+
+        self._cell_size = cell_size
+        self._columns = max(1, int(np.ceil(self._width / cell_size)))
+        self._rows = max(1, int(np.ceil(self._height / cell_size)))
+
+        columns, rows = self._get_cells(points)
+        cells = rows * self._columns + columns
+
+        # the indices of the points, sorted by their cells
+        self._order = np.argsort(cells, kind="stable")
+
+        # the points of the i-th cell are located at self._order[self._offsets[i]:self._offsets[i + 1]]
+        self._offsets = np.zeros(self._rows * self._columns + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=self._rows * self._columns), out=self._offsets[1:])
+
+        self._points = points
+
+    def _get_cells(self, points: np.ndarray, /) -> Tuple[np.ndarray, np.ndarray]:
+        columns = np.clip((points[:, 0] // self._cell_size).astype(np.int64), 0, self._columns - 1)
+        rows = np.clip((points[:, 1] // self._cell_size).astype(np.int64), 0, self._rows - 1)
+        return columns, rows
+
+    def query(self, x: float, y: float, w: float, h: float, /) -> np.ndarray:
+        """
+        Returns the indices of the points located within the given rectangle, in ascending order.
+        """
+
+        columns, rows = self._get_cells(np.array([[x, y], [x + w, y + h]], dtype=np.float64))
+
+        first_column, last_column = int(columns[0]), int(columns[1])
+        first_row, last_row = int(rows[0]), int(rows[1])
+
+        candidates = [
+            self._order[self._offsets[row * self._columns + first_column]:self._offsets[row * self._columns + last_column + 1]]
+            for row in range(first_row, last_row + 1)
+        ]
+
+        candidates = np.sort(np.concatenate(candidates))
+
+        candidate_points = self._points[candidates]
+
+        inside = (
+            (candidate_points[:, 0] >= x) & (candidate_points[:, 0] <= x + w)
+            & (candidate_points[:, 1] >= y) & (candidate_points[:, 1] <= y + h)
+        )
+
+        return candidates[inside]
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict, Iterable, List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
 
 import cv2
 import numpy as np
@@ -13,6 +13,16 @@ from officialeye._api.template.match import IMatch, Match
 
 # noinspection PyProtectedMember
 from officialeye._api.template.matcher import Matcher
+from officialeye._api_builtins.matcher.grid_index import GridIndex
+
+# noinspection PyProtectedMember
+from officialeye._internal.context.singleton import get_internal_afi, get_internal_context
+
+# noinspection PyProtectedMember
+from officialeye._internal.feature_cache import FeatureCache, make_cache_key
+
+# noinspection PyProtectedMember
+from officialeye._internal.feedback.verbosity import Verbosity
 from officialeye.error.errors.matching import ErrMatchingInvalidEngineConfig
 
 if TYPE_CHECKING:
@@ -21,6 +31,16 @@ if TYPE_CHECKING:
     from officialeye.types import ConfigDict
 
 
+# keypoint locations and descriptors computed for the template keypoints, shared by all matcher instances of the process
+_keypoint_features_cache = FeatureCache(capacity=1024)
+
+# the minimal number of coarse matches agreeing on the transformation needed to trust the predicted keypoint locations
+_MIN_REFINEMENT_INLIERS = 8
+
+# the bounds of the plausible scale of the template in the target image
+_MIN_REFINEMENT_SCALE = 0.05
+
+
 def _preprocess_sensitivity(value: str, /) -> float:
 
     value = float(value)
@@ -40,6 +60,36 @@ def _preprocess_sensitivity(value: str, /) -> float:
     return value
 
 
+def _preprocess_coarse_scale(value: str, /) -> float:
+
+    value = float(value)
+
+    if value <= 0.0 or value > 1.0:
+        raise ErrMatchingInvalidEngineConfig(
+            f"while loading the '{SiftFlannMatcher.MATCHER_ID}' keypoint matcher",
+            f"The `coarse_scale` value ({value}) must be positive and cannot exceed 1.0."
+        )
+
+    return value
+
+
+def _preprocess_refinement_margin(value: str, /) -> float:
+
+    value = float(value)
+
+    if value < 0.0:
+        raise ErrMatchingInvalidEngineConfig(
+            f"while loading the '{SiftFlannMatcher.MATCHER_ID}' keypoint matcher",
+            f"The `refinement_margin` value ({value}) cannot be negative."
+        )
+
+    return value
+
+
+def _no_matches() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return np.empty((0, 2), dtype=np.int32), np.empty((0, 2), dtype=np.int32), np.empty(0, dtype=np.float64)
+
+
 class SiftFlannMatcher(Matcher):
 
     MATCHER_ID = "sift_flann"
@@ -49,101 +99,396 @@ class SiftFlannMatcher(Matcher):
 
         self._sensitivity = self.config.get("sensitivity", default=0.7, value_preprocessor=_preprocess_sensitivity)
 
+        # directory in which the template keypoint features should be persisted, empty if they should only be kept in memory
+        self._cache_dir = self.config.get("cache_dir", default="", value_preprocessor=str)
+
+        # the factor by which the target image is downscaled for the coarse matching, 1.0 meaning that the full resolution is used right away
+        # otherwise, the coarse matches are used to predict where the keypoints are located in the target image,
+        # and only these neighbourhoods are matched once again at full resolution
+        self._coarse_scale = self.config.get("coarse_scale", default=1.0, value_preprocessor=_preprocess_coarse_scale)
+
+        # the size of the neighbourhood searched around a predicted keypoint location, relative to the size of the predicted location
+        self._refinement_margin = self.config.get("refinement_margin", default=0.5, value_preprocessor=_preprocess_refinement_margin)
+
         self._img: np.ndarray | None = None
+
+        # the full resolution grayscale target image used to refine the coarse matches, None if the matches are not refined
+        self._refinement_img: np.ndarray | None = None
+
         self._sift = None
 
-        self._keypoints_target = None
-        self._destination_target = None
+        self._keypoints_target: np.ndarray | None = None
+        self._destination_target: np.ndarray | None = None
         self._template: ITemplate | None = None
         self._matches: Dict[IKeypoint, List[Match]] | None = {}
 
+        # keys: keypoints
+        # values: points in the keypoint, the corresponding points in the target image, and the scores of the matches
+        self._match_arrays: Dict[IKeypoint, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+        # the size of the target image as the (width, height) array, needed to locate the search regions of the keypoints
+        self._target_size: np.ndarray | None = None
+
+        # index over the descriptors of the target image, built once and queried for all keypoints
+        self._flann_index = None
+
+        # index over the locations of the features of the target image, built only once a keypoint with a search region is matched
+        self._grid_index: GridIndex | None = None
+
+        # keypoints submitted for matching, whose nearest neighbours in the target image have not been looked up yet
+        self._pending_keypoints: List[Tuple[IKeypoint, np.ndarray, np.ndarray]] = []
+
+    def _get_sift(self):
+
+        if self._sift is None:
+            # initialize the SIFT engine in CV2
+            # noinspection PyUnresolvedReferences
+            self._sift = cv2.SIFT_create()
+
+        return self._sift
+
     def setup(self, target: np.ndarray, template: ITemplate, /) -> None:
 
+        if self._coarse_scale == 1.0:
+            self.setup_with_target_features(self.extract_target_features(target), template)
+            return
+
         self._img = cv2.cvtColor(target, cv2.COLOR_BGR2GRAY)
 
-        # initialize the SIFT engine in CV2
-        # noinspection PyUnresolvedReferences
-        self._sift = cv2.SIFT_create()
+        coarse_img = cv2.resize(self._img, None, fx=self._coarse_scale, fy=self._coarse_scale, interpolation=cv2.INTER_AREA)
+
+        keypoints_target, destination_target = self._detect_and_compute(coarse_img)
+
+        # the coarse matches are expressed in the coordinates of the full resolution image as well
+        keypoints_target /= self._coarse_scale
+
+        self.setup_with_target_features((keypoints_target, destination_target, self._get_size(self._img)), template)
+
+        self._refinement_img = self._img
+
+    def get_cache_dir(self) -> str | None:
+        return self._cache_dir if self._cache_dir != "" else None
+
+    def get_target_features_key(self) -> str | None:
+
+        if self._coarse_scale != 1.0:
+            # the refinement needs the full resolution target image, which is not a part of the shared features
+            return None
+
+        # the features of the target image do not depend on the configuration of the matcher
+        return SiftFlannMatcher.MATCHER_ID
+
+    def _detect_and_compute(self, img: np.ndarray, /) -> Tuple[np.ndarray, np.ndarray]:
+
+        keypoints, destination = self._get_sift().detectAndCompute(img, None)
+
+        # cv2.KeyPoint instances cannot be pickled, so only the locations of the keypoints are kept
+        keypoints = np.array([kp.pt for kp in keypoints], dtype=np.float32).reshape(-1, 2)
+
+        if destination is None:
+            destination = np.empty((0, 128), dtype=np.float32)
+
+        return keypoints, destination
+
+    @staticmethod
+    def _get_size(img: np.ndarray, /) -> np.ndarray:
+        return np.array([img.shape[1], img.shape[0]], dtype=np.int64)
+
+    def extract_target_features(self, target: np.ndarray, /) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+
+        self._img = cv2.cvtColor(target, cv2.COLOR_BGR2GRAY)
 
         # pre-compute the sift keypoints in the target image
-        self._keypoints_target, self._destination_target = self._sift.detectAndCompute(self._img, None)
+        keypoints_target, destination_target = self._detect_and_compute(self._img)
+
+        # the size of the image is needed to locate the search regions of the keypoints
+        return keypoints_target, destination_target, self._get_size(self._img)
+
+    def setup_with_target_features(self, target_features: Tuple[np.ndarray, np.ndarray, np.ndarray], template: ITemplate, /) -> None:
+
+        self._keypoints_target, self._destination_target, self._target_size = target_features
 
         self._template = template
+        self._refinement_img = None
+        self._grid_index = None
 
         self._matches = {}
+        self._match_arrays = {}
+        self._pending_keypoints = []
+
+        self._build_index()
+
+    def _build_index(self) -> None:
+
+        if self._destination_target.shape[0] >= 2:
+            self._flann_index = cv2.flann_Index(self._destination_target, {
+                "algorithm": 1,
+                "trees": 5
+            })
+        else:
+            # not enough features could be found in the target image
+            self._flann_index = None
 
     def match(self, keypoint: IKeypoint, /) -> None:
 
-        _original_pattern_image = keypoint.get_image().load()
+        assert keypoint not in self._match_arrays
+        assert all(pending_keypoint != keypoint for pending_keypoint, _, _ in self._pending_keypoints)
 
-        pattern = cv2.cvtColor(_original_pattern_image, cv2.COLOR_BGR2GRAY)
+        keypoints_pattern, destination_pattern = self._get_keypoint_features(keypoint)
+
+        # the nearest neighbours of all submitted keypoints are looked up in one batch, once the matches are requested
+        self._pending_keypoints.append((keypoint, keypoints_pattern, destination_pattern))
+
+    def _run_pending_queries(self) -> None:
+
+        pending_keypoints = self._pending_keypoints
+        self._pending_keypoints = []
 
-        keypoints_pattern, destination_pattern = self._sift.detectAndCompute(pattern, None)
+        self._query_index(pending_keypoints)
 
-        index_params = {
+        if self._refinement_img is not None and not self._refine_matches(pending_keypoints):
+            get_internal_afi().warn(
+                Verbosity.DEBUG, "Could not predict the locations of the keypoints from the coarse matches, matching at full resolution instead."
+            )
+
+            self._keypoints_target, self._destination_target = self._detect_and_compute(self._refinement_img)
+            self._refinement_img = None
+
+            self._grid_index = None
+            self._build_index()
+            self._query_index(pending_keypoints)
+
+        # TODO: visualization generation
+
+    def _query_index(self, pending_keypoints: List[Tuple[IKeypoint, np.ndarray, np.ndarray]], /) -> None:
+
+        # the keypoints that may be located anywhere in the target image are looked up in a single batch
+        unrestricted_keypoints = [pending_keypoint for pending_keypoint in pending_keypoints if pending_keypoint[0].search_region is None]
+
+        for keypoint, keypoints_pattern, destination in pending_keypoints:
+            if keypoint.search_region is not None:
+                self._match_arrays[keypoint] = self._query_search_region(keypoint, keypoints_pattern, destination)
+
+        if len(unrestricted_keypoints) == 0:
+            return
+
+        destination_pattern = np.concatenate([destination for _, _, destination in unrestricted_keypoints], axis=0)
+
+        if self._flann_index is None or destination_pattern.shape[0] == 0:
+            # not enough features could be found in the images
+            for keypoint, _, _ in unrestricted_keypoints:
+                self._match_arrays[keypoint] = _no_matches()
+            return
+
+        indices, distances = self._flann_index.knnSearch(destination_pattern, 2, params={
+            "checks": 50
+        })
+
+        offset = 0
+
+        for keypoint, keypoints_pattern, destination in unrestricted_keypoints:
+            keypoint_queries = slice(offset, offset + destination.shape[0])
+
+            self._match_arrays[keypoint] = self._apply_ratio_test(
+                keypoints_pattern, self._keypoints_target, indices[keypoint_queries], distances[keypoint_queries]
+            )
+
+            offset += destination.shape[0]
+
+    def _get_search_region(self, keypoint: IKeypoint, /) -> Tuple[float, float, float, float]:
+        """ Returns the search region of the given keypoint, in pixels of the target image. """
+
+        search_x, search_y, search_w, search_h = keypoint.search_region
+        target_width, target_height = self._target_size
+
+        return search_x * target_width, search_y * target_height, search_w * target_width, search_h * target_height
+
+    def _query_search_region(self, keypoint: IKeypoint, keypoints_pattern: np.ndarray, destination: np.ndarray,
+                             /) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Matches the given keypoint only against the features of the target image located within its search region.
+        """
+
+        if self._grid_index is None:
+            self._grid_index = GridIndex(self._keypoints_target, int(self._target_size[0]), int(self._target_size[1]))
+
+        candidates = self._grid_index.query(*self._get_search_region(keypoint))
+
+        if candidates.shape[0] < 2 or destination.shape[0] == 0:
+            return _no_matches()
+
+        flann_index = cv2.flann_Index(self._destination_target[candidates], {
             "algorithm": 1,
             "trees": 5
-        }
+        })
 
-        search_params = {
+        indices, distances = flann_index.knnSearch(destination, 2, params={
             "checks": 50
-        }
+        })
+
+        return self._apply_ratio_test(keypoints_pattern, self._keypoints_target[candidates], indices, distances)
+
+    def _apply_ratio_test(self, keypoints_pattern: np.ndarray, keypoints_target: np.ndarray, indices: np.ndarray, distances: np.ndarray,
+                          /) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+
+        # ratio test; note that the index reports squared euclidean distances
+        accepted = distances[:, 0] < (self._sensitivity ** 2) * distances[:, 1]
+
+        accepted_indices = indices[accepted]
+        accepted_distances = np.sqrt(distances[accepted].astype(np.float64))
+
+        return (
+            keypoints_pattern[accepted].astype(np.int32),
+            keypoints_target[accepted_indices[:, 0]].astype(np.int32),
+            self._sensitivity * accepted_distances[:, 1] - accepted_distances[:, 0]
+        )
+
+    def _refine_matches(self, pending_keypoints: List[Tuple[IKeypoint, np.ndarray, np.ndarray]], /) -> bool:
+        """
+        Replaces the coarse matches of the given keypoints by the matches found at full resolution,
+        searching only the neighbourhoods of the target image in which the keypoints are predicted to be located.
+        Returns False if the locations of the keypoints could not be predicted, in which case the coarse matches are kept.
+        """
 
-        flann = cv2.FlannBasedMatcher(index_params, search_params)
-        matches = flann.knnMatch(destination_pattern, self._destination_target, k=2)
+        template_points = np.concatenate([
+            self._match_arrays[keypoint][0] + keypoint.top_left for keypoint, _, _ in pending_keypoints
+        ], axis=0).astype(np.float32)
 
-        # we need to draw only good matches, so create a mask
-        matches_mask = [[0, 0] for _ in range(len(matches))]
+        target_points = np.concatenate([
+            self._match_arrays[keypoint][1] for keypoint, _, _ in pending_keypoints
+        ], axis=0).astype(np.float32)
 
-        result: List[Match] = []
+        if template_points.shape[0] < _MIN_REFINEMENT_INLIERS:
+            return False
 
-        # filter matches
-        for i, (m, n) in enumerate(matches):
+        # the coarse matches are only as precise as the pixels of the downscaled image
+        transformation_matrix, inliers = cv2.estimateAffinePartial2D(template_points, target_points, method=cv2.RANSAC,
+                                                                     ransacReprojThreshold=3.0 / self._coarse_scale)
 
-            if m.distance >= self._sensitivity * n.distance:
+        if transformation_matrix is None or np.count_nonzero(inliers) < _MIN_REFINEMENT_INLIERS:
+            return False
+
+        # many coarse matches might point to the same few pixels, yielding a degenerate transformation
+        scale = np.sqrt(abs(np.linalg.det(transformation_matrix[:, :2])))
+
+        if not _MIN_REFINEMENT_SCALE <= scale <= 1.0 / _MIN_REFINEMENT_SCALE:
+            return False
+
+        img_height, img_width = self._refinement_img.shape[:2]
+
+        for keypoint, keypoints_pattern, destination in pending_keypoints:
+
+            corners = np.array([[
+                [keypoint.x, keypoint.y],
+                [keypoint.x + keypoint.w, keypoint.y],
+                [keypoint.x + keypoint.w, keypoint.y + keypoint.h],
+                [keypoint.x, keypoint.y + keypoint.h]
+            ]], dtype=np.float32)
+
+            predicted_corners = cv2.transform(corners, transformation_matrix)[0]
+
+            top_left = predicted_corners.min(axis=0)
+            bottom_right = predicted_corners.max(axis=0)
+
+            margin = self._refinement_margin * (bottom_right - top_left)
+
+            x0, y0 = np.clip(np.floor(top_left - margin), 0, [img_width, img_height]).astype(int)
+            x1, y1 = np.clip(np.ceil(bottom_right + margin), 0, [img_width, img_height]).astype(int)
+
+            if keypoint.search_region is not None:
+                search_x, search_y, search_w, search_h = self._get_search_region(keypoint)
+
+                x0, y0 = max(x0, int(search_x)), max(y0, int(search_y))
+                x1, y1 = min(x1, int(np.ceil(search_x + search_w))), min(y1, int(np.ceil(search_y + search_h)))
+
+            if x1 - x0 < 2 or y1 - y0 < 2 or destination.shape[0] == 0:
+                self._match_arrays[keypoint] = _no_matches()
                 continue
 
-            matches_mask[i] = [1, 0]
+            keypoints_neighbourhood, destination_neighbourhood = self._detect_and_compute(self._refinement_img[y0:y1, x0:x1])
 
-            pattern_point = keypoints_pattern[m.queryIdx].pt
-            target_point = self._keypoints_target[m.trainIdx].pt
+            if destination_neighbourhood.shape[0] < 2:
+                self._match_arrays[keypoint] = _no_matches()
+                continue
 
-            pattern_point_vec = np.array(pattern_point, dtype=int)
-            target_point_vec = np.array(target_point, dtype=int)
+            keypoints_neighbourhood += np.array([x0, y0], dtype=np.float32)
 
-            match = Match(
-                self._template,
-                keypoint,
-                keypoint_point=pattern_point_vec,
-                target_point=target_point_vec
-            )
+            flann_index = cv2.flann_Index(destination_neighbourhood, {
+                "algorithm": 1,
+                "trees": 5
+            })
 
-            match.set_score(self._sensitivity * n.distance - m.distance)
+            indices, distances = flann_index.knnSearch(destination, 2, params={
+                "checks": 50
+            })
 
-            result.append(match)
+            self._match_arrays[keypoint] = self._apply_ratio_test(keypoints_pattern, keypoints_neighbourhood, indices, distances)
 
-        # TODO: visualization generation
+        return True
+
+    def _get_keypoint_features(self, keypoint: IKeypoint, /) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the locations of the SIFT keypoints found in the image of the given template keypoint, as well as their descriptors.
+        Since template images rarely change, the results are cached and reused by subsequent detections.
         """
-        # noinspection PyTypeChecker
-        debug_image = cv2.drawMatchesKnn(
-            pattern,
-            keypoints_pattern,
-            self._img,
-            self._keypoints_target,
-            matches,
-            None,
-            matchColor=(0, 0xff, 0),
-            singlePointColor=(0xff, 0, 0),
-            matchesMask=matches_mask,
-            flags=cv2.DrawMatchesFlags_DEFAULT
+
+        template = get_internal_context().get_template(self._template.identifier)
+        template_fingerprint = template.get_source_fingerprint()
+
+        if template_fingerprint is None:
+            return self._compute_keypoint_features(keypoint)
+
+        # noinspection PyProtectedMember
+        cache_key = make_cache_key(
+            SiftFlannMatcher.MATCHER_ID,
+            template_fingerprint,
+            [keypoint.x, keypoint.y, keypoint.w, keypoint.h],
+            self.config._config_dict
         )
 
-        cv2.imwrite(f"test_{keypoint.identifier}.png", debug_image)
-        """
+        cache_dir = self.get_cache_dir()
+
+        cached_features = _keypoint_features_cache.get(cache_key, directory=cache_dir)
+
+        if cached_features is not None:
+            keypoints_pattern, destination_pattern = cached_features
+            return keypoints_pattern, destination_pattern
+
+        keypoints_pattern, destination_pattern = self._compute_keypoint_features(keypoint)
+
+        _keypoint_features_cache.put(cache_key, (keypoints_pattern, destination_pattern), directory=cache_dir)
+
+        return keypoints_pattern, destination_pattern
+
+    def _compute_keypoint_features(self, keypoint: IKeypoint, /) -> Tuple[np.ndarray, np.ndarray]:
+
+        _original_pattern_image = keypoint.get_image().load()
+
+        pattern = cv2.cvtColor(_original_pattern_image, cv2.COLOR_BGR2GRAY)
+
+        return self._detect_and_compute(pattern)
+
+    def get_match_arrays_for_keypoint(self, keypoint: IKeypoint, /) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
 
-        assert keypoint not in self._matches
-        self._matches[keypoint] = result
+        if len(self._pending_keypoints) > 0:
+            self._run_pending_queries()
+
+        assert keypoint in self._match_arrays
+        return self._match_arrays[keypoint]
 
     def get_matches_for_keypoint(self, keypoint: IKeypoint, /) -> Iterable[IMatch]:
-        assert keypoint in self._matches
+
+        if keypoint not in self._matches:
+            keypoint_points, target_points, scores = self.get_match_arrays_for_keypoint(keypoint)
+
+            self._matches[keypoint] = [
+                Match(
+                    self._template,
+                    keypoint,
+                    keypoint_point=keypoint_points[i],
+                    target_point=target_points[i],
+                    score=float(scores[i])
+                ) for i in range(scores.shape[0])
+            ]
+
         return self._matches[keypoint]
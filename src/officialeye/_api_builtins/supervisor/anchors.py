@@ -0,0 +1,108 @@
+"""
+Module implementing the strategies according to which supervisors choose the anchor matches.
+An anchor match fixes the offsets (delta and delta prime) around which the affine transformation is estimated.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import List
+
+import numpy as np
+
+# noinspection PyProtectedMember
+from officialeye._api.template.matching_result import IMatchingResult
+from officialeye.error.errors.supervision import ErrSupervisionInvalidEngineConfig
+
+# every match is an anchor
+ANCHOR_STRATEGY_ALL = "all"
+# a random match of every keypoint is an anchor
+ANCHOR_STRATEGY_RANDOM = "random"
+# the best scored match of every keypoint is an anchor, and the anchors are tried from the best scored one
+ANCHOR_STRATEGY_BEST_SCORE = "best_score"
+# a match of every keypoint is an anchor, the matches being chosen such that they are spread over the template as much as possible
+ANCHOR_STRATEGY_SPREAD = "spread"
+
+_ANCHOR_STRATEGIES = (ANCHOR_STRATEGY_ALL, ANCHOR_STRATEGY_RANDOM, ANCHOR_STRATEGY_BEST_SCORE, ANCHOR_STRATEGY_SPREAD)
+
+
+def preprocess_anchor_strategy(supervisor_id: str, value: str, /) -> str:
+
+    value = str(value)
+
+    if value not in _ANCHOR_STRATEGIES:
+        raise ErrSupervisionInvalidEngineConfig(
+            f"while loading the '{supervisor_id}' supervisor.",
+            f"The `anchors` value '{value}' is invalid, expected one of: {', '.join(_ANCHOR_STRATEGIES)}."
+        )
+
+    return value
+
+
+def _get_keypoint_match_indices(matching_result: IMatchingResult, /) -> List[np.ndarray]:
+    keypoint_indices = matching_result.get_keypoint_indices()
+
+    keypoint_match_indices = [
+        np.flatnonzero(keypoint_indices == keypoint_index) for keypoint_index in range(len(matching_result.get_keypoint_ids()))
+    ]
+
+    return [match_indices for match_indices in keypoint_match_indices if match_indices.shape[0] > 0]
+
+
+def _select_spread_anchors(matching_result: IMatchingResult, /) -> List[int]:
+
+    template_points = matching_result.get_template_points().astype(np.float64)
+    scores = matching_result.get_scores()
+
+    remaining_keypoints = _get_keypoint_match_indices(matching_result)
+
+    if len(remaining_keypoints) == 0:
+        return []
+
+    # start with the best scored match
+    first_keypoint = max(range(len(remaining_keypoints)), key=lambda i: np.max(scores[remaining_keypoints[i]]))
+    first_anchor = int(remaining_keypoints[first_keypoint][np.argmax(scores[remaining_keypoints[first_keypoint]])])
+
+    anchors = [first_anchor]
+    del remaining_keypoints[first_keypoint]
+
+    # squared distances from every match to the closest anchor chosen so far
+    distances = np.sum((template_points - template_points[first_anchor]) ** 2, axis=1)
+
+    while len(remaining_keypoints) > 0:
+        # among the remaining keypoints, take the match lying farthest away from the anchors
+        candidates = [match_indices[np.argmax(distances[match_indices])] for match_indices in remaining_keypoints]
+        chosen_keypoint = int(np.argmax(distances[candidates]))
+        anchor = int(candidates[chosen_keypoint])
+
+        anchors.append(anchor)
+        del remaining_keypoints[chosen_keypoint]
+
+        distances = np.minimum(distances, np.sum((template_points - template_points[anchor]) ** 2, axis=1))
+
+    return anchors
+
+
+def select_anchors(matching_result: IMatchingResult, strategy: str, /) -> List[int]:
+    """
+    Chooses anchor matches according to the given strategy.
+    Returns the indices of the anchor matches (into the arrays of the matching result), in the order in which they should be tried.
+    """
+
+    if strategy == ANCHOR_STRATEGY_ALL:
+        return list(range(matching_result.get_total_match_count()))
+
+    if strategy == ANCHOR_STRATEGY_RANDOM:
+        return [int(random.choice(match_indices)) for match_indices in _get_keypoint_match_indices(matching_result)]
+
+    if strategy == ANCHOR_STRATEGY_BEST_SCORE:
+        scores = matching_result.get_scores()
+
+        anchors = [int(match_indices[np.argmax(scores[match_indices])]) for match_indices in _get_keypoint_match_indices(matching_result)]
+        anchors.sort(key=lambda anchor: -scores[anchor])
+
+        return anchors
+
+    assert strategy == ANCHOR_STRATEGY_SPREAD
+
+    return _select_spread_anchors(matching_result)
@@ -1,14 +1,13 @@
 from __future__ import annotations
 
-import random
-from typing import TYPE_CHECKING, Dict, Iterable, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Generator, Iterable, List, Tuple
 
 import numpy as np
 import z3
 
-# noinspection PyProtectedMember
-from officialeye._api.template.match import IMatch
-
 # noinspection PyProtectedMember
 from officialeye._api.template.matching_result import IMatchingResult
 
@@ -20,9 +19,10 @@ from officialeye._api.template.supervisor import Supervisor
 
 # noinspection PyProtectedMember
 from officialeye._api.template.template_interface import ITemplate
+from officialeye._api_builtins.supervisor.anchors import ANCHOR_STRATEGY_RANDOM, preprocess_anchor_strategy, select_anchors
 
 # noinspection PyProtectedMember
-from officialeye._internal.context.singleton import get_internal_afi
+from officialeye._internal.context.singleton import get_internal_afi, get_internal_context, set_thread_internal_context
 
 # noinspection PyProtectedMember
 from officialeye._internal.feedback.verbosity import Verbosity
@@ -32,6 +32,20 @@ if TYPE_CHECKING:
     from officialeye.types import ConfigDict
 
 
+class _Encoding:
+    """
+    The part of the encoding of the supervision problem shared by all anchors, bound to a single z3 context.
+    """
+
+    def __init__(self, z3_context: z3.Context, solver: z3.Optimize, transformation_matrix: List[List[z3.ArithRef]],
+                 match_weights: List[z3.ArithRef], total_weight: z3.ArithRef, /):
+        self.z3_context = z3_context
+        self.solver = solver
+        self.transformation_matrix = transformation_matrix
+        self.match_weights = match_weights
+        self.total_weight = total_weight
+
+
 class CombinatorialSupervisor(Supervisor):
 
     SUPERVISOR_ID = "combinatorial"
@@ -94,138 +108,256 @@ class CombinatorialSupervisor(Supervisor):
 
         self._z3_timeout = self.config.get("z3_timeout", default=2500, value_preprocessor=_z3_timeout_preprocessor)
 
-        # initialize all engine-specific values
-        self._z3_context: z3.Context | None = None
+        def _workers_preprocessor(v: str) -> int:
+
+            v = int(v)
+
+            if v < 1:
+                raise ErrSupervisionInvalidEngineConfig(
+                    f"while loading the '{CombinatorialSupervisor.SUPERVISOR_ID}' supervisor.",
+                    f"The `workers` value ({v}) cannot be negative or zero."
+                )
 
-        # create variables for components of the translation matrix
-        self._transformation_matrix: np.ndarray | None = None
+            return v
 
-        # keys: matches (instances of Match)
-        # values: z3 integer variables representing the errors for each match,
-        # i.e., how consistent the match is with the affine transformation model
-        self._match_weight: Dict[IMatch, z3.ArithRef] = {}
+        # number of threads solving the problems for different anchors in parallel, each one in its own z3 context
+        self._workers = self.config.get("workers", default=1, value_preprocessor=_workers_preprocessor)
 
-        self._minimum_weight_to_enforce: float | None = None
+        def _time_budget_preprocessor(v: str) -> int:
 
-    def setup(self, template: ITemplate, matching_result: IMatchingResult, /) -> None:
+            v = int(v)
 
-        self._z3_context = z3.Context()
+            if v < 0:
+                raise ErrSupervisionInvalidEngineConfig(
+                    f"while loading the '{CombinatorialSupervisor.SUPERVISOR_ID}' supervisor.",
+                    f"The `time_budget` value ({v}) cannot be negative."
+                )
 
-        self._transformation_matrix = np.array([
-            [z3.Real("a", ctx=self._z3_context), z3.Real("b", ctx=self._z3_context)],
-            [z3.Real("c", ctx=self._z3_context), z3.Real("d", ctx=self._z3_context)]
-        ], dtype=z3.AstRef)
+            return v
+
+        # wall-clock time (in milliseconds) available for solving the problems of all anchors, zero meaning no limit
+        self._time_budget = self.config.get("time_budget", default=0, value_preprocessor=_time_budget_preprocessor)
 
-        for match in matching_result.get_all_matches():
-            self._match_weight[match] = z3.Real(
-                f"w_{match.keypoint_point[0]}_{match.keypoint_point[1]}_{match.target_point[0]}_{match.target_point[1]}",
-                ctx=self._z3_context
-            )
+        # strategy according to which the anchor matches are chosen, see the anchors module
+        self._anchors = self.config.get("anchors", default=ANCHOR_STRATEGY_RANDOM,
+                                        value_preprocessor=lambda v: preprocess_anchor_strategy(CombinatorialSupervisor.SUPERVISOR_ID, v))
+
+        self._minimum_weight_to_enforce: float | None = None
 
+    def setup(self, template: ITemplate, matching_result: IMatchingResult, /) -> None:
         # calculate the minimum weight that we need to enforce
         self._minimum_weight_to_enforce = matching_result.get_total_match_count() * self._min_match_factor
 
-    def _get_consistency_check(self, match: IMatch, delta: np.ndarray, delta_prime: np.ndarray, /) -> z3.AstRef:
+    def _encode(self, match_count: int, /) -> _Encoding:
+        """
+        Encodes the part of the problem that does not depend on the anchor in a fresh z3 context,
+        i.e., the variables, the bounds of the match weights and the optimization objective.
+        """
+
+        z3_context = z3.Context()
+
+        transformation_matrix = [
+            [z3.Real("a", ctx=z3_context), z3.Real("b", ctx=z3_context)],
+            [z3.Real("c", ctx=z3_context), z3.Real("d", ctx=z3_context)]
+        ]
+
+        # z3 real variables representing the weights of the matches, in the order in which the arrays of the matching result list them,
+        # i.e., how consistent each match is with the affine transformation model
+        match_weights = [z3.Real(f"w_{match_index}", ctx=z3_context) for match_index in range(match_count)]
+
+        total_weight = z3.Sum(*match_weights)
+
+        solver = z3.Optimize(ctx=z3_context)
+
+        solver.add(z3.And(*(match_weight >= 0 for match_weight in match_weights), z3_context))
+        solver.add(z3.And(*(match_weight <= 1 for match_weight in match_weights), z3_context))
+
+        solver.add(total_weight >= self._minimum_weight_to_enforce)
+        solver.maximize(total_weight)
+
+        return _Encoding(z3_context, solver, transformation_matrix, match_weights, total_weight)
+
+    def _add_consistency_checks(self, encoding: _Encoding, template_points: np.ndarray, target_points: np.ndarray, anchor_match_index: int,
+                                /) -> None:
         """
-        Generates a z3 formula asserting the consistency of the match with the affine linear transformation model.
+        Adds the constraints asserting the consistency of the matches with the affine transformation model of the given anchor (delta, delta').
         Consistency does not mean ideal matching of coordinates; rather, the template position with the affine
         transformation applied to it, must roughly be equal the target position for consistency to hold.
+
+        The anchor is substituted numerically, so that M (s - delta) + delta' - d is a linear term whose coefficients are all constants.
+        """
+
+        # the coordinates are converted into plain python integers, which z3 handles natively
+        relative_template_points: List[List[int]] = (template_points - template_points[anchor_match_index]).tolist()
+        delta_prime_x, delta_prime_y = target_points[anchor_match_index].tolist()
+
+        (a, b), (c, d) = encoding.transformation_matrix
+
+        for match_weight, (s_x, s_y), (target_point_x, target_point_y) in zip(encoding.match_weights, relative_template_points,
+                                                                              target_points.tolist(), strict=True):
+            translated_template_point_x = a * s_x + b * s_y + delta_prime_x
+            translated_template_point_y = c * s_x + d * s_y + delta_prime_y
+
+            encoding.solver.add(z3.Implies(
+                match_weight > 0,
+                # consistency check
+                z3.And(
+                    translated_template_point_x - target_point_x <= self._max_transformation_error,
+                    target_point_x - translated_template_point_x <= self._max_transformation_error,
+                    translated_template_point_y - target_point_y <= self._max_transformation_error,
+                    target_point_y - translated_template_point_y <= self._max_transformation_error,
+                ),
+            ))
+
+    def _solve_anchor(self, encoding: _Encoding, template_points: np.ndarray, target_points: np.ndarray, anchor_match_index: int,
+                      deadline: float | None, /) -> Tuple[int, SupervisionResult | z3.CheckSatResult | None]:
+        """
+        Solves the problem of the given anchor, returning the anchor together with the outcome, which is either a supervision result,
+        the unsuccessful result of the solver, or None if the time budget has been exhausted.
         """
 
-        assert delta.shape == (2,)
-        assert delta_prime.shape == (2,)
-        assert match.template_point.shape == (2,)
+        get_internal_context().check_cancelled()
+
+        timeout = self._z3_timeout
+
+        if deadline is not None:
+            remaining_time = int((deadline - time.monotonic()) * 1000)
+
+            if remaining_time <= 0:
+                return anchor_match_index, None
+
+            timeout = min(timeout, remaining_time)
+
+        encoding.solver.set("timeout", timeout)
+
+        encoding.solver.push()
 
-        translated_template_point = self._transformation_matrix @ (match.template_point - delta) + delta_prime
-        translated_template_point_x, translated_template_point_y = translated_template_point
+        try:
+            self._add_consistency_checks(encoding, template_points, target_points, anchor_match_index)
 
-        target_point_x, target_point_y = match.target_point
+            result = encoding.solver.check()
+            model = encoding.solver.model() if result == z3.sat else None
+        finally:
+            # the constraints of the anchor are dropped again, while the rest of the encoding is kept for the next anchor
+            encoding.solver.pop()
 
-        return z3.And(
-            translated_template_point_x - target_point_x <= self._max_transformation_error,
-            target_point_x - translated_template_point_x <= self._max_transformation_error,
-            translated_template_point_y - target_point_y <= self._max_transformation_error,
-            target_point_y - translated_template_point_y <= self._max_transformation_error,
+        if result != z3.sat:
+            return anchor_match_index, result
+
+        def _evaluate(expression: z3.ArithRef, /) -> float:
+            return float(model.eval(expression, model_completion=True).as_fraction())
+
+        # extract total weight and maximization target from the model
+        model_total_weight = _evaluate(encoding.total_weight)
+
+        # extract transformation matrix from model
+        transformation_matrix = np.array([
+            [_evaluate(entry) for entry in row] for row in encoding.transformation_matrix
+        ], dtype=np.float64)
+
+        _result = SupervisionResult(
+            delta=template_points[anchor_match_index].astype(np.int32),
+            delta_prime=target_points[anchor_match_index].astype(np.int32),
+            transformation_matrix=transformation_matrix,
+            score=model_total_weight
         )
 
+        _result.set_match_weights(np.array([_evaluate(match_weight) for match_weight in encoding.match_weights], dtype=np.float64))
+
+        return anchor_match_index, _result
+
+    def _solve(self, template_points: np.ndarray, target_points: np.ndarray, anchor_match_indices: List[int],
+               deadline: float | None, /) -> Generator[Tuple[int, SupervisionResult | z3.CheckSatResult | None], None, None]:
+        """
+        Solves the problems of the given anchors one by one, in the current thread, yielding the outcomes in the order of the anchors.
+        """
+
+        encoding = self._encode(template_points.shape[0])
+
+        for anchor_match_index in anchor_match_indices:
+            yield self._solve_anchor(encoding, template_points, target_points, anchor_match_index, deadline)
+
     def supervise(self, template: ITemplate, matching_result: IMatchingResult, /) -> Iterable[SupervisionResult]:
 
-        weights_lower_bounds = z3.And(*(self._match_weight[match] >= 0 for match in matching_result.get_all_matches()), self._z3_context)
-        weights_upper_bounds = z3.And(*(self._match_weight[match] <= 1 for match in matching_result.get_all_matches()), self._z3_context)
+        template_points = matching_result.get_template_points().astype(np.int64)
+        target_points = matching_result.get_target_points().astype(np.int64)
 
-        total_weight = z3.Sum(*(self._match_weight[match] for match in matching_result.get_all_matches()))
+        anchor_match_indices = select_anchors(matching_result, self._anchors)
 
-        solver = z3.Optimize(ctx=self._z3_context)
-        solver.set("timeout", self._z3_timeout)
+        deadline = time.monotonic() + self._time_budget / 1000 if self._time_budget > 0 else None
 
-        solver.add(weights_lower_bounds)
-        solver.add(weights_upper_bounds)
-        solver.add(total_weight >= self._minimum_weight_to_enforce)
+        if self._workers == 1 or len(anchor_match_indices) <= 1:
+            outcomes = self._solve(template_points, target_points, anchor_match_indices, deadline)
+        else:
+            outcomes = self._solve_in_parallel(template_points, target_points, anchor_match_indices, deadline)
 
-        solver.maximize(total_weight)
+        try:
+            for anchor_match_index, outcome in outcomes:
+
+                if outcome is None:
+                    get_internal_afi().warn(
+                        Verbosity.INFO_VERBOSE, f"Skipping anchor #{anchor_match_index}, because the time budget has been exhausted."
+                    )
+                    continue
 
-        for keypoint in template.keypoints:
-            keypoint_matches: List[IMatch] = list(matching_result.get_matches_for_keypoint(keypoint.identifier))
+                if outcome == z3.unsat:
+                    get_internal_afi().warn(Verbosity.INFO_VERBOSE, "Could not satisfy the imposed constraints.")
+                    continue
 
-            if len(keypoint_matches) == 0:
-                continue
+                if outcome == z3.unknown:
+                    get_internal_afi().warn(Verbosity.INFO_VERBOSE, "Could not decide the satifiability of the imposed constraints.")
+                    continue
 
-            # TODO: think whether this is a good algorithm design decision, and improve it if not
-            anchor_match: IMatch = random.choice(keypoint_matches)
+                assert isinstance(outcome, SupervisionResult)
 
-            delta = anchor_match.template_point
-            delta_prime = anchor_match.target_point
+                yield outcome
+        finally:
+            # stop solving the remaining anchors as soon as no further results are requested
+            outcomes.close()
 
-            solver.push()
+    def _solve_in_parallel(self, template_points: np.ndarray, target_points: np.ndarray, anchor_match_indices: List[int],
+                           deadline: float | None, /) -> Generator[Tuple[int, SupervisionResult | z3.CheckSatResult | None], None, None]:
+        """
+        Solves the problems of the given anchors in multiple threads, yielding the outcomes in the order in which they are obtained.
+        Once the generator is closed, e.g., because a supervision result has already been accepted, the remaining anchors are abandoned.
+        """
 
-            for match in matching_result.get_all_matches():
-                solver.add(z3.Implies(
-                    self._match_weight[match] > 0,
-                    # consistency check
-                    self._get_consistency_check(match, delta, delta_prime),
-                    ctx=self._z3_context
-                ))
+        worker_count = min(self._workers, len(anchor_match_indices))
 
-            result = solver.check()
+        # every thread encodes the problem in its own z3 context once, and reuses the encoding for all anchors it solves
+        thread_encodings = threading.local()
 
-            if result == z3.unsat:
-                get_internal_afi().warn(Verbosity.INFO_VERBOSE, "Could not satisfy the imposed constraints.")
-                solver.pop()
-                continue
+        # the encodings of all threads, so that the running solvers can be interrupted
+        encodings: List[_Encoding] = []
+        encodings_lock = threading.Lock()
 
-            if result == z3.unknown:
-                get_internal_afi().warn(Verbosity.INFO_VERBOSE, "Could not decide the satifiability of the imposed constraints.")
-                solver.pop()
-                continue
+        def _solve_anchor(anchor_match_index: int, /) -> Tuple[int, SupervisionResult | z3.CheckSatResult | None]:
 
-            assert result == z3.sat
+            encoding = getattr(thread_encodings, "encoding", None)
 
-            model = solver.model()
-            model_evaluator = np.vectorize(lambda var: model.eval(var, model_completion=True).as_fraction())  # noqa: B023
+            if encoding is None:
+                encoding = self._encode(template_points.shape[0])
+                thread_encodings.encoding = encoding
 
-            # extract total weight and maximization target from the model
-            model_total_weight = float(model_evaluator(total_weight))
+                with encodings_lock:
+                    encodings.append(encoding)
 
-            # extract transformation matrix from model
-            transformation_matrix = model_evaluator(self._transformation_matrix)
+            return self._solve_anchor(encoding, template_points, target_points, anchor_match_index, deadline)
 
-            """
-            delta = np.array([1217, 109], dtype=int)
-            delta_prime = np.array([785, 374], dtype=int)
-            transformation_matrix = np.array([[0.57689122, 0.01245905], [-0.0564908, 0.59782386]], dtype=float)
-            """
+        # the workers share the internal context of the current task, so that they notice when the task gets cancelled
+        executor = ThreadPoolExecutor(max_workers=worker_count, initializer=set_thread_internal_context, initargs=(get_internal_context(),))
 
-            _result = SupervisionResult(
-                delta=delta,
-                delta_prime=delta_prime,
-                transformation_matrix=transformation_matrix,
-                score=model_total_weight
-            )
+        try:
+            futures = [executor.submit(_solve_anchor, anchor_match_index) for anchor_match_index in anchor_match_indices]
 
-            for match in matching_result.get_all_matches():
-                match_weight = model_evaluator(self._match_weight[match])
-                _result.set_match_weight(match, match_weight)
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # drop the anchors that have not been started yet, and interrupt the ones being solved
+            executor.shutdown(wait=False, cancel_futures=True)
 
-            yield _result
+            with encodings_lock:
+                for encoding in encodings:
+                    encoding.z3_context.interrupt()
 
-            solver.pop()
+            executor.shutdown(wait=True)
@@ -15,23 +15,35 @@ from officialeye._api.template.supervisor import Supervisor
 
 # noinspection PyProtectedMember
 from officialeye._api.template.template_interface import ITemplate
+from officialeye._api_builtins.supervisor.anchors import ANCHOR_STRATEGY_ALL, preprocess_anchor_strategy, select_anchors
 
 if TYPE_CHECKING:
     from officialeye.types import ConfigDict
 
-_IND_A = 0
-_IND_B = 1
-_IND_C = 2
-_IND_D = 3
+# relative tolerance used to decide whether the normal equations of an anchor are singular
+_SINGULARITY_TOLERANCE = 1e-12
 
 
 class LeastSquaresRegressionSupervisor(Supervisor):
+    """
+    For every match chosen as the anchor, i.e., for every choice of delta and delta prime, finds the transformation matrix M minimizing
+    the sum of squared errors |M (s - delta) - (d - delta')|^2 over all matches (s, d).
+
+    Writing u = s - delta and v = d - delta', the optimal matrix is M = (sum of v u^T) (sum of u u^T)^(-1).
+    Both sums are obtained from the centered second moments of the matches, which are shared by all anchors,
+    so that the transformation matrices of all anchors are computed at once.
+    By default, every match is used as an anchor, which can be restricted using the `anchors` strategy.
+    """
 
     SUPERVISOR_ID = "least_squares_regression"
 
     def __init__(self, config_dict: ConfigDict, /):
         super().__init__(LeastSquaresRegressionSupervisor.SUPERVISOR_ID, config_dict)
 
+        # strategy according to which the anchor matches are chosen, see the anchors module
+        self._anchors = self.config.get("anchors", default=ANCHOR_STRATEGY_ALL,
+                                        value_preprocessor=lambda v: preprocess_anchor_strategy(LeastSquaresRegressionSupervisor.SUPERVISOR_ID, v))
+
     def setup(self, template: ITemplate, matching_result: IMatchingResult, /) -> None:
         pass
 
@@ -39,43 +51,48 @@ class LeastSquaresRegressionSupervisor(Supervisor):
 
         match_count = matching_result.get_total_match_count()
 
-        for anchor_match in matching_result.get_all_matches():
+        template_points = matching_result.get_template_points()
+        target_points = matching_result.get_target_points()
+
+        s = template_points.astype(np.float64)
+        d = target_points.astype(np.float64)
+
+        s_mean = s.mean(axis=0)
+        d_mean = d.mean(axis=0)
 
-            delta = anchor_match.template_point
-            delta_prime = anchor_match.target_point
+        s_centered = s - s_mean
+        d_centered = d - d_mean
 
-            matrix = np.zeros((match_count << 1, 4), dtype=np.float64)
-            rhs = np.zeros(match_count << 1, dtype=np.float64)
+        # second moments of the matches around their means
+        ss_moment = s_centered.T @ s_centered
+        ds_moment = d_centered.T @ s_centered
 
-            for i, match in enumerate(matching_result.get_all_matches()):
-                first_constraint_id = i << 1
-                second_constraint_id = first_constraint_id + 1
+        # offsets of the means from each of the anchors
+        s_offsets = s_mean - s
+        d_offsets = d_mean - d
 
-                s = match.template_point
-                d = match.target_point
+        # sums of u u^T and v u^T for every anchor, of shape (match_count, 2, 2)
+        uu_sums = ss_moment + match_count * s_offsets[:, :, np.newaxis] * s_offsets[:, np.newaxis, :]
+        vu_sums = ds_moment + match_count * d_offsets[:, :, np.newaxis] * s_offsets[:, np.newaxis, :]
 
-                matrix[first_constraint_id][_IND_A] = s[0] - delta[0]
-                matrix[first_constraint_id][_IND_B] = s[1] - delta[1]
-                rhs[first_constraint_id] = d[0] - delta_prime[0]
+        # the system is singular if all template points lie on a line, in which case the anchor cannot produce a result
+        determinants = np.linalg.det(uu_sums)
+        scales = np.trace(uu_sums, axis1=1, axis2=2) ** 2
+        solvable = np.abs(determinants) > _SINGULARITY_TOLERANCE * scales
 
-                matrix[second_constraint_id][_IND_C] = s[0] - delta[0]
-                matrix[second_constraint_id][_IND_D] = s[1] - delta[1]
-                rhs[second_constraint_id] = d[1] - delta_prime[1]
+        # uu_sums are symmetric, hence M^T = (sum of u u^T)^(-1) (sum of v u^T)^T
+        transformation_matrices = np.zeros((match_count, 2, 2), dtype=np.float64)
+        transformation_matrices[solvable] = np.linalg.solve(uu_sums[solvable], vu_sums[solvable].transpose(0, 2, 1)).transpose(0, 2, 1)
 
-            regression_matrix = matrix.T @ matrix
-            regression_matrix = np.linalg.inv(regression_matrix)
-            rhs_applied = matrix.T @ rhs
-            x = regression_matrix @ rhs_applied
+        for anchor_match_index in select_anchors(matching_result, self._anchors):
 
-            transformation_matrix = np.array([
-                [x[_IND_A], x[_IND_B]],
-                [x[_IND_C], x[_IND_D]]
-            ])
+            if not solvable[anchor_match_index]:
+                continue
 
             _result = SupervisionResult(
-                delta=delta,
-                delta_prime=delta_prime,
-                transformation_matrix=transformation_matrix
+                delta=template_points[anchor_match_index],
+                delta_prime=target_points[anchor_match_index],
+                transformation_matrix=transformation_matrices[anchor_match_index]
             )
 
             yield _result
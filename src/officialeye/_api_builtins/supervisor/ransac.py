@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Iterable, Tuple
+
+import numpy as np
+
+# noinspection PyProtectedMember
+from officialeye._api.template.matching_result import IMatchingResult
+
+# noinspection PyProtectedMember
+from officialeye._api.template.supervision_result import SupervisionResult
+
+# noinspection PyProtectedMember
+from officialeye._api.template.supervisor import Supervisor
+
+# noinspection PyProtectedMember
+from officialeye._api.template.template_interface import ITemplate
+
+# noinspection PyProtectedMember
+from officialeye._internal.context.singleton import get_internal_afi
+
+# noinspection PyProtectedMember
+from officialeye._internal.feedback.verbosity import Verbosity
+from officialeye.error.errors.supervision import ErrSupervisionInvalidEngineConfig
+
+if TYPE_CHECKING:
+    from officialeye.types import ConfigDict
+
+_SAMPLING_UNIFORM = "uniform"
+_SAMPLING_PROSAC = "prosac"
+
+# number of hypotheses evaluated at once
+_HYPOTHESES_BATCH_SIZE = 64
+
+# number of times the best hypothesis is re-estimated from its inliers
+_REFINEMENT_ROUNDS = 3
+
+# relative tolerance used to decide whether three template points are collinear
+_SINGULARITY_TOLERANCE = 1e-9
+
+
+def _preprocess_iterations(value: str, /) -> int:
+
+    value = int(value)
+
+    if value < 1:
+        raise ErrSupervisionInvalidEngineConfig(
+            f"while loading the '{RansacSupervisor.SUPERVISOR_ID}' supervisor.",
+            f"The `iterations` value ({value}) cannot be negative or zero."
+        )
+
+    return value
+
+
+def _preprocess_max_transformation_error(value: str, /) -> float:
+
+    value = float(value)
+
+    if value <= 0.0:
+        raise ErrSupervisionInvalidEngineConfig(
+            f"while loading the '{RansacSupervisor.SUPERVISOR_ID}' supervisor.",
+            f"The `max_transformation_error` value ({value}) must be positive."
+        )
+
+    return value
+
+
+def _preprocess_confidence(value: str, /) -> float:
+
+    value = float(value)
+
+    if value <= 0.0 or value > 1.0:
+        raise ErrSupervisionInvalidEngineConfig(
+            f"while loading the '{RansacSupervisor.SUPERVISOR_ID}' supervisor.",
+            f"The `confidence` value ({value}) must lie in the interval (0, 1]."
+        )
+
+    return value
+
+
+def _preprocess_sampling(value: str, /) -> str:
+
+    value = str(value)
+
+    if value not in (_SAMPLING_UNIFORM, _SAMPLING_PROSAC):
+        raise ErrSupervisionInvalidEngineConfig(
+            f"while loading the '{RansacSupervisor.SUPERVISOR_ID}' supervisor.",
+            f"The `sampling` value '{value}' is invalid, expected '{_SAMPLING_UNIFORM}' or '{_SAMPLING_PROSAC}'."
+        )
+
+    return value
+
+
+def _fit_affine(template_points: np.ndarray, target_points: np.ndarray, /) -> np.ndarray:
+    """
+    Finds the (3, 2) matrix P of the affine transformation minimizing the squared errors |[s, 1] P - d|^2 over the given pairs (s, d).
+    """
+    design_matrix = np.hstack((template_points, np.ones((template_points.shape[0], 1))))
+    parameters, _, _, _ = np.linalg.lstsq(design_matrix, target_points, rcond=None)
+    return parameters
+
+
+class RansacSupervisor(Supervisor):
+    """
+    Estimates the affine transformation using random sample consensus.
+    Every hypothesis is an affine transformation determined exactly by three randomly chosen matches.
+    The hypothesis that is consistent with the largest number of matches (inliers) is then refined using least squares over its inliers.
+
+    The number of evaluated hypotheses is bounded by the `iterations` value, and it is reduced further
+    as soon as the desired `confidence` of having drawn an outlier-free sample is reached.
+    The `prosac` sampling strategy draws the samples from progressively larger sets of the best-scored matches,
+    which usually finds a good hypothesis much sooner than the `uniform` strategy.
+    """
+
+    SUPERVISOR_ID = "ransac"
+
+    def __init__(self, config_dict: ConfigDict, /):
+        super().__init__(RansacSupervisor.SUPERVISOR_ID, config_dict)
+
+        self._iterations = self.config.get("iterations", default=500, value_preprocessor=_preprocess_iterations)
+        self._max_transformation_error = self.config.get("max_transformation_error", default=5.0,
+                                                         value_preprocessor=_preprocess_max_transformation_error)
+        self._confidence = self.config.get("confidence", default=0.999, value_preprocessor=_preprocess_confidence)
+        self._sampling = self.config.get("sampling", default=_SAMPLING_PROSAC, value_preprocessor=_preprocess_sampling)
+        self._seed = self.config.get("seed", default=0, value_preprocessor=int)
+
+    def setup(self, template: ITemplate, matching_result: IMatchingResult, /) -> None:
+        pass
+
+    def _sample(self, rng: np.random.Generator, order: np.ndarray, first_iteration: int, hypothesis_count: int, /) -> np.ndarray:
+        """
+        Draws the indices of matches determining the given number of hypotheses, returning an array of shape (hypothesis_count, 3).
+        """
+
+        match_count = order.shape[0]
+
+        if self._sampling == _SAMPLING_UNIFORM:
+            return rng.integers(0, match_count, size=(hypothesis_count, 3))
+
+        assert self._sampling == _SAMPLING_PROSAC
+
+        # the i-th hypothesis is sampled from the best pool_sizes[i] matches, the pool growing linearly until it contains all matches
+        iterations = np.arange(first_iteration, first_iteration + hypothesis_count)
+        growth = iterations / max(self._iterations - 1, 1)
+        pool_sizes = np.minimum(3 + np.floor((match_count - 3) * growth).astype(np.int64), match_count)
+
+        ranks = np.floor(rng.random((hypothesis_count, 3)) * pool_sizes[:, np.newaxis]).astype(np.int64)
+
+        return order[ranks]
+
+    def _evaluate(self, s: np.ndarray, d: np.ndarray, parameters: np.ndarray, /) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluates the hypotheses given by the (H, 3, 2) array of affine parameters against all matches.
+        Returns the (H, N) mask of inliers, and the (H,) array of truncated squared errors, which serve to break ties.
+        """
+
+        design_matrix = np.hstack((s, np.ones((s.shape[0], 1))))
+
+        predictions = design_matrix[np.newaxis, :, :] @ parameters
+        errors = np.sum((predictions - d[np.newaxis, :, :]) ** 2, axis=2)
+
+        threshold = self._max_transformation_error ** 2
+
+        return errors <= threshold, np.sum(np.minimum(errors, threshold), axis=1)
+
+    def supervise(self, template: ITemplate, matching_result: IMatchingResult, /) -> Iterable[SupervisionResult]:
+
+        match_count = matching_result.get_total_match_count()
+
+        if match_count < 3:
+            return
+
+        template_points = matching_result.get_template_points().astype(np.float64)
+        target_points = matching_result.get_target_points().astype(np.float64)
+
+        rng = np.random.default_rng(self._seed)
+
+        # matches ordered from the best scored to the worst scored one
+        order = np.argsort(-matching_result.get_scores(), kind="stable")
+
+        best_inliers: np.ndarray | None = None
+        best_inlier_count = 0
+        best_cost = math.inf
+
+        required_iterations = self._iterations
+        iteration = 0
+
+        while iteration < required_iterations:
+
+            hypothesis_count = min(_HYPOTHESES_BATCH_SIZE, required_iterations - iteration)
+            samples = self._sample(rng, order, iteration, hypothesis_count)
+            iteration += hypothesis_count
+
+            # solve [s, 1] P = d exactly for each sample
+            sample_design = np.concatenate((template_points[samples], np.ones((hypothesis_count, 3, 1))), axis=2)
+            sample_targets = target_points[samples]
+
+            # discard samples whose template points are (almost) collinear
+            determinants = np.linalg.det(sample_design)
+            scales = np.max(np.abs(sample_design), axis=(1, 2)) ** 2
+            solvable = np.abs(determinants) > _SINGULARITY_TOLERANCE * np.maximum(scales, 1.0)
+
+            if not np.any(solvable):
+                continue
+
+            parameters = np.linalg.solve(sample_design[solvable], sample_targets[solvable])
+
+            inliers, costs = self._evaluate(template_points, target_points, parameters)
+            inlier_counts = np.count_nonzero(inliers, axis=1)
+
+            # prefer more inliers, and smaller errors among hypotheses with the same number of inliers
+            candidate = int(np.lexsort((costs, -inlier_counts))[0])
+
+            if inlier_counts[candidate] > best_inlier_count or inlier_counts[candidate] == best_inlier_count and costs[candidate] < best_cost:
+                best_inliers = inliers[candidate]
+                best_inlier_count = int(inlier_counts[candidate])
+                best_cost = float(costs[candidate])
+
+                # adapt the number of iterations to the observed inlier ratio
+                inlier_ratio = best_inlier_count / match_count
+
+                if inlier_ratio >= 1.0:
+                    required_iterations = iteration
+                elif self._confidence < 1.0:
+                    outlier_sample_probability = 1.0 - inlier_ratio ** 3
+                    required_iterations = min(
+                        required_iterations,
+                        math.ceil(math.log(1.0 - self._confidence) / math.log(outlier_sample_probability))
+                    )
+
+        get_internal_afi().info(Verbosity.DEBUG, f"Evaluated {iteration} hypotheses, the best one has {best_inlier_count} inliers.")
+
+        if best_inliers is None or best_inlier_count < 3:
+            get_internal_afi().warn(Verbosity.INFO_VERBOSE, "Could not find a hypothesis consistent with at least three matches.")
+            return
+
+        # refine the best hypothesis using all its inliers
+        parameters = _fit_affine(template_points[best_inliers], target_points[best_inliers])
+
+        for _ in range(_REFINEMENT_ROUNDS):
+            refined_inliers, _ = self._evaluate(template_points, target_points, parameters[np.newaxis, :, :])
+            refined_inliers = refined_inliers[0]
+
+            if np.count_nonzero(refined_inliers) < 3 or np.array_equal(refined_inliers, best_inliers):
+                break
+
+            best_inliers = refined_inliers
+            parameters = _fit_affine(template_points[best_inliers], target_points[best_inliers])
+
+        transformation_matrix = parameters[:2, :].T
+        translation = parameters[2, :]
+
+        # the model is anchored at the centroid of the inliers
+        delta = template_points[best_inliers].mean(axis=0)
+        delta_prime = transformation_matrix @ delta + translation
+
+        _result = SupervisionResult(
+            delta=delta,
+            delta_prime=delta_prime,
+            transformation_matrix=transformation_matrix,
+            score=float(np.count_nonzero(best_inliers))
+        )
+
+        _result.set_match_weights(best_inliers.astype(np.float64))
+
+        yield _result
@@ -77,6 +77,15 @@ keypoints:
       min: 0
       # Maximum amount of matches that should be identified within this keypoint's region when analyzing an image.
       max: 40
+    # Optionally, the region of the analyzed image in which the keypoint should be searched for can be restricted,
+    # which both speeds up the matching and prevents matches in places where the keypoint can never appear.
+    # The coordinates are relative to the size of the analyzed image, i.e., between 0 and 1. For example,
+    # the following region covers the top half of the image.
+    # search:
+    #   x: 0.0
+    #   y: 0.0
+    #   w: 1.0
+    #   h: 0.5
 
 # Matching configuration
 # Matching is the process of finding equal patterns in the given image and the template source image,
@@ -93,6 +102,12 @@ matching:
     # Configuration specific to the `sift_flann` matching engine.
     sift_flann:
       sensitivity: 0.7
+      # For high-resolution images, the matching can first be run on a copy of the image downscaled by the specified factor.
+      # The coarse matches are then used to predict where the keypoints are located in the image, and only these neighbourhoods,
+      # enlarged by the specified `refinement_margin` relative to their size, are matched once again at full resolution.
+      # The default factor of 1.0 matches the full resolution image right away.
+      # coarse_scale: 0.25
+      # refinement_margin: 0.5
 
 # Supervision configuration
 # Supervision is the process of unifying the given document image with the template source,
@@ -118,6 +133,11 @@ supervision:
       # the risk of wrongfully not detecting a document at all.
       # Recommended value: between 2 and 10 pixels
       max_transformation_error: 5
+      # The strategy according to which the matches serving as anchors of the affine transformation model are chosen.
+      # Available strategies: all, random, best_score, spread
+      # The `random` strategy chooses a random match of every keypoint, the `best_score` strategy chooses the best scored match of every keypoint,
+      # and the `spread` strategy chooses a match of every keypoint such that the anchors are spread over the template as much as possible.
+      anchors: random
 
   # Since the supervision engine may produce multiple results.
   # This option allows you to specify the strategy that should be used to choose a final result.
@@ -128,6 +148,12 @@ supervision:
   # The `best_score` strategy returns the result with the highest score (what `score` represents depends on the supervision engine)
   result: best_score
 
+  # Optionally, a result can be accepted as soon as it is produced, provided that its score is at least the specified `score`
+  # and its mean squared error is at most the specified `mse`. This allows skipping the remaining results altogether.
+  # accept:
+  #   score: 100
+  #   mse: 25
+
 # A list of features located in the template source image specified above.
 # A feature is a rectangular region containing any information of interest, such as text.
 # In other words, the corresponding regions in the target image will be found during document analysis.
@@ -170,6 +196,9 @@ feature_classes:
       config:
         config: --dpi 10000 --oem 3 --psm 6
         lang: eng
+        # Optional. Recognize all features of this class sharing the language and configuration in a single OCR pass.
+        # In this case, the page segmentation mode (--psm) specified above is replaced by one suitable for multiple lines of text.
+        batch: no
     '''
 
     with open(template_path, "w") as fh:
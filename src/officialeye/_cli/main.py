@@ -112,7 +112,14 @@ def test(target_path: str, template_paths: List[str], show_features: bool):
 @click.option("--interpret", type=click.Path(exists=True, file_okay=True, readable=True),
               default=None, help="Use the image at the specified path to run the interpretation phase.")
 @click.option("--visualize", is_flag=True, show_default=False, default=False, help="Generate visualizations of intermediate steps.")
-def run(target_path: str, template_paths: List[str], interpret: str | None, visualize: bool):
+@click.option("--top-k", type=click.IntRange(min=1), default=None, help="Analyze only the specified number of the most similar templates.")
+@click.option("--min-similarity", type=click.FloatRange(min=0.0, max=1.0), default=None,
+              help="Analyze only the templates whose coarse similarity to the image reaches the specified cut-off.")
+@click.option("--accept-score", type=float, default=None, help="Accept the first result whose score reaches the specified value.")
+@click.option("--accept-confidence", type=click.FloatRange(min=0.0, max=1.0), default=None,
+              help="Accept the first result supported by at least the specified portion of the matches of its template.")
+def run(target_path: str, template_paths: List[str], interpret: str | None, visualize: bool, top_k: int | None, min_similarity: float | None,
+        accept_score: float | None, accept_confidence: float | None):
     """Applies one or more templates to an image."""
 
     global _context
@@ -126,7 +133,11 @@ def run(target_path: str, template_paths: List[str], interpret: str | None, visu
             target_path=target_path,
             template_paths=template_paths,
             interpret_path=interpret,
-            visualize=visualize
+            visualize=visualize,
+            top_k=top_k,
+            min_similarity=min_similarity,
+            accept_score=accept_score,
+            accept_confidence=accept_confidence
         )
 
 
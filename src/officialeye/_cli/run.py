@@ -8,7 +8,7 @@ from rich.panel import Panel
 from rich.table import Table
 
 # noinspection PyProtectedMember
-from officialeye._api.detection import detect
+from officialeye._api.detection import detect_and_interpret
 
 # noinspection PyProtectedMember
 from officialeye._api.image import Image
@@ -24,7 +24,9 @@ if TYPE_CHECKING:
     from officialeye.types import FeatureInterpretation
 
 
-def do_run(context: CLIContext, /, *, target_path: str, template_paths: List[str], interpret_path: str | None, visualize: bool):
+def do_run(context: CLIContext, /, *, target_path: str, template_paths: List[str], interpret_path: str | None, visualize: bool,
+           top_k: int | None = None, min_similarity: float | None = None, accept_score: float | None = None,
+           accept_confidence: float | None = None):
     # print OfficialEye logo and other introductory information (if necessary)
     context.print_intro()
 
@@ -39,9 +41,9 @@ def do_run(context: CLIContext, /, *, target_path: str, template_paths: List[str
 
     templates = [Template(api_context, path=template_path) for template_path in template_paths]
 
-    result = detect(api_context, *templates, target=target_image)
-
-    interpretation_result = result.interpret(target=interpretation_target_image)
+    interpretation_result = detect_and_interpret(api_context, *templates, target=target_image, interpretation_target=interpretation_target_image,
+                                                 top_k=top_k, min_similarity=min_similarity, accept_score=accept_score,
+                                                 accept_confidence=accept_confidence)
 
     table = Table(title="Feature interpretations")
 
@@ -59,7 +61,7 @@ def do_run(context: CLIContext, /, *, target_path: str, template_paths: List[str
         Verbosity.INFO,
         Panel(
             Group(
-                f"Detected template '{result.template.identifier}' ({result.template.name}).",
+                f"Detected template '{interpretation_result.template.identifier}' ({interpretation_result.template.name}).",
                 table
             ),
             expand=False,
@@ -2,26 +2,68 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import cv2
-import numpy as np
-
 from officialeye._internal.context.singleton import get_internal_context
 from officialeye._internal.template.schema.loader import load_template
 
 if TYPE_CHECKING:
+    # noinspection PyProtectedMember
+    from officialeye._internal.shared_image import SharedImage
+    from officialeye._internal.template.external_interpretation_result import ExternalInterpretationResult
     from officialeye._internal.template.external_supervision_result import ExternalSupervisionResult
     from officialeye._internal.template.internal_supervision_result import InternalSupervisionResult
+    from officialeye._internal.template.target_features import TargetFeatures
+
+
+def template_extract_target_features(template_path: str, /, *, target: SharedImage, **kwargs) -> TargetFeatures:
+
+    with get_internal_context().setup(**kwargs), target.attach() as target_img:
+        template = load_template(template_path)
+        return template.extract_target_features(target_img)
 
 
-def template_detect(template_path: str, /, *, target_path: str, **kwargs) -> ExternalSupervisionResult:
+def template_detect(template_path: str, /, *, target: SharedImage, target_features: TargetFeatures | None = None,
+                    **kwargs) -> ExternalSupervisionResult:
 
     from officialeye._internal.template.external_supervision_result import ExternalSupervisionResult
 
     with get_internal_context().setup(**kwargs):
         template = load_template(template_path)
 
-        target: np.ndarray = cv2.imread(target_path, cv2.IMREAD_COLOR)
-
-        internal_supervision_result: InternalSupervisionResult = template.do_detect(target)
+        if target_features is not None and target_features.key == template.get_target_features_key():
+            # the features of the target image have already been extracted by another worker
+            internal_supervision_result: InternalSupervisionResult = template.do_detect_with_target_features(target_features)
+        else:
+            with target.attach() as target_img:
+                internal_supervision_result: InternalSupervisionResult = template.do_detect(target_img)
 
         return ExternalSupervisionResult(internal_supervision_result)
+
+
+def template_detect_and_interpret(template_path: str, /, *, target: SharedImage, interpretation_target: SharedImage | None = None,
+                                  interpretation_threads: int = 1, **kwargs) -> ExternalInterpretationResult:
+    """
+    Detects the template in the target image and interprets its features right away, within the same task.
+    The supervision result is used without leaving the worker, and the target image is attached only once
+    if it also serves as the interpretation target.
+    """
+
+    from officialeye._internal.api.interpret import interpret_features
+    from officialeye._internal.template.external_interpretation_result import ExternalInterpretationResult
+    from officialeye._internal.template.external_supervision_result import ExternalSupervisionResult
+
+    with get_internal_context().setup(**kwargs), target.attach() as target_img:
+
+        template = load_template(template_path)
+
+        internal_supervision_result: InternalSupervisionResult = template.do_detect(target_img)
+
+        if interpretation_target is None:
+            feature_interpretation_dict = interpret_features(template, internal_supervision_result, target_img,
+                                                             interpretation_threads=interpretation_threads)
+        else:
+            with interpretation_target.attach() as interpretation_target_img:
+                feature_interpretation_dict = interpret_features(template, internal_supervision_result, interpretation_target_img,
+                                                                 interpretation_threads=interpretation_threads)
+
+        return ExternalInterpretationResult(template, feature_interpretation_dict,
+                                            supervision_result=ExternalSupervisionResult(internal_supervision_result))
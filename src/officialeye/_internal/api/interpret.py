@@ -1,29 +1,139 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Hashable, List, Tuple
 
-import cv2
+import numpy as np
 
-from officialeye._internal.context.singleton import get_internal_context
+from officialeye._internal.context.singleton import get_internal_context, set_thread_internal_context
 
 # noinspection PyProtectedMember
 from officialeye._internal.template.external_interpretation_result import ExternalInterpretationResult
 from officialeye._internal.template.schema.loader import load_template
 
 if TYPE_CHECKING:
+    # noinspection PyProtectedMember
+    from officialeye._api.template.interpretation import IInterpretation
+
     # noinspection PyProtectedMember
     from officialeye._api.template.supervision_result import ISupervisionResult
+    from officialeye._internal.shared_image import SharedImage
+    from officialeye._internal.template.internal_feature import InternalFeature
+    from officialeye._internal.template.internal_template import InternalTemplate
+    from officialeye.types import FeatureInterpretation
+
+
+def _interpret_batch(interpretation: IInterpretation, features: List[InternalFeature], feature_imgs: List[np.ndarray],
+                     /) -> List[FeatureInterpretation]:
+
+    if len(features) == 1:
+        return [interpretation.interpret(feature_imgs[0], features[0])]
+
+    interpretations = interpretation.interpret_batch(feature_imgs, features)
+
+    assert len(interpretations) == len(features), "The interpretation method should interpret every feature of the batch"
+
+    return interpretations
+
+
+def interpret_features(template: InternalTemplate, supervision_result: ISupervisionResult, interpretation_target_img: np.ndarray,
+                       /, *, interpretation_threads: int = 1) -> Dict[str, FeatureInterpretation]:
+    """
+    Interprets all features of the template having a class, in the given interpretation target image.
+    The features whose interpretations share a batch key are interpreted together.
+    The features whose interpretations are concurrent are interpreted in parallel, using up to the given number of threads,
+    while the remaining features are interpreted one by one in the current thread.
+    """
+
+    assert interpretation_threads >= 1
+
+    # every batch consists of the interpretation method, the features, and their images
+    batches: List[Tuple[IInterpretation, List[InternalFeature], List[np.ndarray]]] = []
+
+    # keys: batch keys
+    # values: indices of the corresponding batches
+    batch_indices: Dict[Hashable, int] = {}
+
+    for feature in template.features:
+
+        feature_class = feature.get_feature_class()
+
+        if feature_class is None:
+            continue
+
+        interpretation = feature.get_interpretation()
+
+        feature_img = supervision_result.warp_feature(feature, interpretation_target_img)
+        feature_img_mutated = feature.apply_mutators_to_image(feature_img)
+
+        batch_key = interpretation.get_batch_key()
+
+        if batch_key is None:
+            batches.append((interpretation, [feature], [feature_img_mutated]))
+            continue
+
+        if batch_key not in batch_indices:
+            batch_indices[batch_key] = len(batches)
+            batches.append((interpretation, [], []))
+
+        _, batch_features, batch_feature_imgs = batches[batch_indices[batch_key]]
+        batch_features.append(feature)
+        batch_feature_imgs.append(feature_img_mutated)
+
+    # keys: feature identifiers
+    # values: interpretations of the features
+    feature_interpretations: Dict[str, FeatureInterpretation] = {}
+
+    executor: ThreadPoolExecutor | None = None
+
+    try:
+        futures: List[Tuple[List[InternalFeature], Future]] = []
+
+        # start the concurrent interpretations first, so that they run while the other ones are being processed in the current thread
+        if interpretation_threads > 1:
+            for interpretation, batch_features, batch_feature_imgs in batches:
+
+                if not interpretation.is_concurrent():
+                    continue
+
+                if executor is None:
+                    # the threads should see the same internal context as the current thread
+                    executor = ThreadPoolExecutor(max_workers=interpretation_threads, initializer=set_thread_internal_context,
+                                                  initargs=(get_internal_context(),))
+
+                futures.append((batch_features, executor.submit(_interpret_batch, interpretation, batch_features, batch_feature_imgs)))
+
+        for interpretation, batch_features, batch_feature_imgs in batches:
+
+            if executor is not None and interpretation.is_concurrent():
+                continue
+
+            batch_interpretations = _interpret_batch(interpretation, batch_features, batch_feature_imgs)
+
+            for feature, feature_interpretation in zip(batch_features, batch_interpretations, strict=True):
+                feature_interpretations[feature.identifier] = feature_interpretation
+
+        for batch_features, future in futures:
+            for feature, feature_interpretation in zip(batch_features, future.result(), strict=True):
+                feature_interpretations[feature.identifier] = feature_interpretation
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    # merge the results in the order of the features, irrespective of the order in which the interpretations have finished
+    return {
+        feature.identifier: feature_interpretations[feature.identifier]
+        for feature in template.features if feature.identifier in feature_interpretations
+    }
 
 
 def template_interpret(template_path: str, supervision_result: ISupervisionResult, /, *,
-                       interpretation_target_path: str, **kwargs) -> ExternalInterpretationResult:
+                       interpretation_target: SharedImage, interpretation_threads: int = 1, **kwargs) -> ExternalInterpretationResult:
 
-    with get_internal_context().setup(**kwargs):
+    with get_internal_context().setup(**kwargs), interpretation_target.attach() as interpretation_target_img:
 
         template = load_template(template_path)
 
-        interpretation_target = cv2.imread(interpretation_target_path, cv2.IMREAD_COLOR)
-
         # TODO: make sure that the target image and the interpretation target images have the same shape, similar to the following snippet
         """
             if target.shape != interpretation_target.shape:
@@ -34,19 +144,9 @@ def template_interpret(template_path: str, supervision_result: ISupervisionResul
                 )
         """
 
-        feature_interpretation_dict = {}
-
-        for feature in template.features:
-
-            feature_class = feature.get_feature_class()
-
-            if feature_class is None:
-                continue
-
-            feature_img = supervision_result.warp_feature(feature, interpretation_target)
-            feature_img_mutated = feature.apply_mutators_to_image(feature_img)
-            interpretation = feature.interpret_image(feature_img_mutated)
-
-            feature_interpretation_dict[feature.identifier] = interpretation
+        feature_interpretation_dict = interpret_features(template, supervision_result, interpretation_target_img,
+                                                         interpretation_threads=interpretation_threads)
 
+        # the supervision result is not sent back, since the parent process holds it already and attaches it on its own
         return ExternalInterpretationResult(template, feature_interpretation_dict)
+
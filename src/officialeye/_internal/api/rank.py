@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List
+
+from officialeye._internal.context.singleton import get_internal_afi, get_internal_context
+from officialeye._internal.feedback.verbosity import Verbosity
+from officialeye._internal.template.schema.loader import load_template
+from officialeye._internal.template.signature import get_signature_similarity, get_target_signature, get_template_signature
+from officialeye._internal.template.template_ranking import TemplateRanking
+from officialeye.error.error import OEError
+
+if TYPE_CHECKING:
+    # noinspection PyProtectedMember
+    from officialeye._internal.shared_image import SharedImage
+
+
+def templates_rank(template_paths: List[str], /, *, target: SharedImage, **kwargs) -> TemplateRanking:
+    """
+    Computes the similarities of the templates located at the given paths to the target image, using their coarse signatures.
+    The signature of the target image is computed only once for all templates.
+    """
+
+    with get_internal_context().setup(**kwargs), target.attach() as target_img:
+
+        target_signature = get_target_signature(target_img)
+
+        similarities: Dict[str, float | None] = {}
+
+        for template_path in template_paths:
+
+            get_internal_context().check_cancelled()
+
+            try:
+                template = load_template(template_path)
+            except OEError as err:
+                # the template is not pruned, so that the error gets reported by its detection task
+                get_internal_afi().warn(Verbosity.DEBUG, f"Could not rank template at path '{template_path}' ({err.code_text}).")
+                similarities[template_path] = None
+                continue
+
+            similarities[template_path] = get_signature_similarity(get_template_signature(template), target_signature)
+
+        return TemplateRanking(similarities)
@@ -0,0 +1,24 @@
+from typing import List
+
+from officialeye._internal.context.singleton import get_internal_afi, get_internal_context
+from officialeye._internal.feedback.verbosity import Verbosity
+
+
+def worker_warm_up(template_paths: List[str], /, **kwargs) -> None:
+    """
+    Initializes a worker process by loading the templates located at the given paths, so that they are resident
+    in the worker before the first task needing them arrives. The signatures of the templates, used to rank them, are computed as well.
+    """
+
+    # imported here, because the context module depends on this module, and the template loader transitively depends on the context module
+    from officialeye._internal.template.schema.loader import load_template
+    from officialeye._internal.template.signature import get_template_signature
+
+    with get_internal_context().setup(**kwargs):
+        for template_path in template_paths:
+            try:
+                get_template_signature(load_template(template_path))
+            except Exception as err:
+                # an exception escaping the initializer would break the whole pool of workers,
+                # whereas the error will be reported properly once a task actually needs the template
+                get_internal_afi().warn(Verbosity.DEBUG, f"Could not preload template at path '{template_path}' ({err}).")
@@ -0,0 +1,82 @@
+"""
+Module implementing the cooperative cancellation of tasks that are already running in the worker processes.
+The API process owns a flag stored in a tiny shared memory segment, whereas the task polls the flag at convenient points
+and stops as soon as it is set.
+"""
+
+from __future__ import annotations
+
+from contextlib import suppress
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock
+
+
+class CancellationToken:
+    """
+    A picklable handle to a cancellation flag, used by the task to find out whether it should stop.
+    """
+
+    def __init__(self, name: str, /):
+        self._name = name
+
+        # None indicates that the task has not yet attached to the shared memory segment
+        self._shared_memory: SharedMemory | None = None
+
+    def __reduce__(self):
+        return self.__class__, (self._name,)
+
+    def is_cancelled(self) -> bool:
+
+        if self._shared_memory is None:
+            try:
+                self._shared_memory = SharedMemory(name=self._name)
+            except FileNotFoundError:
+                # the flag is destroyed only once nobody is waiting for the task anymore
+                return True
+
+        return self._shared_memory.buf[0] != 0
+
+    def close(self) -> None:
+
+        if self._shared_memory is None:
+            return
+
+        self._shared_memory.close()
+        self._shared_memory = None
+
+
+class CancellationFlag:
+    """
+    The cancellation flag of a single task, owned by the API process.
+    """
+
+    def __init__(self):
+        self._shared_memory = SharedMemory(create=True, size=1)
+        self._shared_memory.buf[0] = 0
+
+        self._token = CancellationToken(self._shared_memory.name)
+
+        self._released = False
+        self._lock = Lock()
+
+    @property
+    def token(self) -> CancellationToken:
+        return self._token
+
+    def set(self) -> None:
+        with self._lock:
+            if not self._released:
+                self._shared_memory.buf[0] = 1
+
+    def release(self) -> None:
+
+        with self._lock:
+            if self._released:
+                return
+
+            self._released = True
+
+        self._shared_memory.close()
+
+        with suppress(FileNotFoundError):
+            self._shared_memory.unlink()
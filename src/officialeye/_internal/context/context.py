@@ -8,7 +8,7 @@ from officialeye._internal.feedback.abstract import AbstractFeedbackInterface
 from officialeye._internal.feedback.dummy import DummyFeedbackInterface
 from officialeye._internal.feedback.verbosity import Verbosity
 from officialeye.error.error import OEError
-from officialeye.error.errors.general import ErrInvalidKey
+from officialeye.error.errors.general import ErrInvalidKey, ErrOperationCancelled
 from officialeye.error.errors.template import ErrTemplateIdNotUnique
 
 if TYPE_CHECKING:
@@ -22,6 +22,7 @@ if TYPE_CHECKING:
 
     # noinspection PyProtectedMember
     from officialeye._api.template.supervisor import ISupervisor
+    from officialeye._internal.cancellation import CancellationToken
     from officialeye._internal.template.internal_template import InternalTemplate
     from officialeye.types import ConfigDict, InterpretationFactory, MatcherFactory, MutatorFactory, SupervisorFactory
 
@@ -36,6 +37,9 @@ class InternalContext:
         self._supervisor_factories: Dict[str, SupervisorFactory] = {}
         self._interpretation_factories: Dict[str, InterpretationFactory] = {}
 
+        # the token telling whether the current task should stop, None if the task cannot be cancelled while running
+        self._cancellation_token: CancellationToken | None = None
+
         # keys: template ids
         # values: template
         self._loaded_templates: Dict[str, InternalTemplate] = {}
@@ -46,7 +50,8 @@ class InternalContext:
 
     def setup(self, /, *, afi: AbstractFeedbackInterface, mutator_factories: Dict[str, MutatorFactory],
               matcher_factories: Dict[str, MatcherFactory], supervisor_factories: Dict[str, SupervisorFactory],
-              interpretation_factories: Dict[str, InterpretationFactory]) -> InternalContext:
+              interpretation_factories: Dict[str, InterpretationFactory],
+              cancellation_token: CancellationToken | None = None) -> InternalContext:
         assert afi is not None
 
         assert mutator_factories is not None
@@ -58,6 +63,7 @@ class InternalContext:
         self._matcher_factories = matcher_factories
         self._supervisor_factories = supervisor_factories
         self._interpretation_factories = interpretation_factories
+        self._cancellation_token = cancellation_token
 
         return self
 
@@ -69,9 +75,25 @@ class InternalContext:
         self._afi.dispose(exception_type, exception_value, traceback)
         self._afi = DummyFeedbackInterface()
 
+        if self._cancellation_token is not None:
+            self._cancellation_token.close()
+            self._cancellation_token = None
+
     def get_afi(self) -> AbstractFeedbackInterface:
         return self._afi
 
+    def check_cancelled(self) -> None:
+        """
+        Stops the current task by raising an error if it has been cancelled in the meantime.
+        Long-running operations should call this method regularly.
+        """
+
+        if self._cancellation_token is not None and self._cancellation_token.is_cancelled():
+            raise ErrOperationCancelled(
+                "while running a task.",
+                "The task has been cancelled."
+            )
+
     def get_mutator(self, mutator_id: str, mutator_config: ConfigDict, /) -> IMutator:
 
         # TODO: (low priority) consider caching mutators that have the same id and configuration
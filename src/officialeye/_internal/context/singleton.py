@@ -1,12 +1,34 @@
+import threading
+
 from officialeye._internal.context.context import InternalContext
 from officialeye._internal.feedback.abstract import AbstractFeedbackInterface
 
+# the internal context of the process, used by the worker processes
 _internal_context: InternalContext = InternalContext()
 
+# worker threads and inline executors use internal contexts of their own, overriding the one of the process
+_thread_local = threading.local()
+
 
 def get_internal_context() -> InternalContext:
-    global _internal_context
-    return _internal_context
+    return getattr(_thread_local, "internal_context", _internal_context)
+
+
+def set_thread_internal_context(internal_context: InternalContext | None, /) -> InternalContext | None:
+    """
+    Sets the internal context used by the current thread, None meaning the internal context of the process.
+    Returns the internal context previously set for the current thread.
+    """
+
+    previous_internal_context = getattr(_thread_local, "internal_context", None)
+
+    if internal_context is None:
+        if hasattr(_thread_local, "internal_context"):
+            del _thread_local.internal_context
+    else:
+        _thread_local.internal_context = internal_context
+
+    return previous_internal_context
 
 
 def get_internal_afi() -> AbstractFeedbackInterface:
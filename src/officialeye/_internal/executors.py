@@ -0,0 +1,70 @@
+"""
+Module implementing the executors running the tasks of the API context in the current process,
+as opposed to the pool of worker processes.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from concurrent.futures import Future as PythonFuture
+from threading import Lock
+from typing import Callable
+
+from officialeye._internal.context.context import InternalContext
+from officialeye._internal.context.singleton import set_thread_internal_context
+
+
+def initialize_worker_thread(initializer: Callable[[], None] | None, /) -> None:
+    """
+    Initializes a worker thread of a thread pool, giving it an internal context of its own,
+    so that the threads, just like worker processes, do not interfere with each other.
+    """
+
+    set_thread_internal_context(InternalContext())
+
+    if initializer is not None:
+        initializer()
+
+
+class InlineExecutor(Executor):
+    """
+    An executor running the submitted calls synchronously, in the thread submitting them, within an internal context of its own.
+    """
+
+    def __init__(self, /, *, initializer: Callable[[], None] | None = None):
+        self._internal_context = InternalContext()
+        self._initializer = initializer
+        self._shutdown = False
+
+        # the calls share the internal context, so they must not run concurrently
+        self._lock = Lock()
+
+    def submit(self, fn, /, *args, **kwargs) -> PythonFuture:
+
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+
+        python_future = PythonFuture()
+        python_future.set_running_or_notify_cancel()
+
+        with self._lock:
+            previous_internal_context = set_thread_internal_context(self._internal_context)
+
+            try:
+                if self._initializer is not None:
+                    initializer = self._initializer
+                    self._initializer = None
+                    initializer()
+
+                result = fn(*args, **kwargs)
+            except Exception as err:
+                python_future.set_exception(err)
+            else:
+                python_future.set_result(result)
+            finally:
+                set_thread_internal_context(previous_internal_context)
+
+        return python_future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._shutdown = True
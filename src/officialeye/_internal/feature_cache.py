@@ -0,0 +1,141 @@
+"""
+Module implementing a process-local cache for arrays derived from template images, such as keypoint descriptors.
+Since templates rarely change, such arrays can safely be reused between tasks handled by the same worker process.
+Optionally, the cache can be persisted on disk, so that the arrays survive restarts of the worker processes.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from officialeye._internal.context.singleton import get_internal_afi
+from officialeye._internal.feedback.verbosity import Verbosity
+
+# keys: (path, modification time in nanoseconds, file size)
+# values: hex digest of the file contents
+_file_digests: Dict[Tuple[str, int, int], str] = {}
+_file_digests_lock = Lock()
+
+
+def get_file_digest(path: str, /) -> str:
+    """
+    Computes a digest of the contents of the file located at the specified path.
+    The digest is cached as long as the modification time and the size of the file remain the same.
+    """
+
+    stat = os.stat(path)
+    digest_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    with _file_digests_lock:
+        if digest_key in _file_digests:
+            return _file_digests[digest_key]
+
+    digest = hashlib.sha1()
+
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+
+    with _file_digests_lock:
+        _file_digests[digest_key] = digest.hexdigest()
+
+    return digest.hexdigest()
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Builds a cache key out of the given parts. All parts should be JSON-serializable.
+    """
+    serialized_parts = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(serialized_parts.encode("utf-8")).hexdigest()
+
+
+class FeatureCache:
+    """
+    A least-recently-used cache mapping keys to tuples of arrays.
+    The cache lives in the memory of the current process and can optionally be backed by a directory on disk.
+    """
+
+    def __init__(self, /, *, capacity: int):
+        assert capacity > 0
+
+        self._capacity = capacity
+        self._entries: OrderedDict[str, Tuple[np.ndarray, ...]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: str, /, *, directory: str | None = None) -> Tuple[np.ndarray, ...] | None:
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        if directory is None:
+            return None
+
+        entry_path = os.path.join(directory, f"{key}.npz")
+
+        if not os.path.isfile(entry_path):
+            return None
+
+        try:
+            with np.load(entry_path, allow_pickle=False) as entry_file:
+                entry = tuple(entry_file[f"arr_{i}"] for i in range(len(entry_file.files)))
+        except (OSError, ValueError) as err:
+            get_internal_afi().warn(Verbosity.DEBUG, f"Could not read the cache entry '{entry_path}' ({err}), ignoring it.")
+            return None
+
+        self._put_in_memory(key, entry)
+
+        return entry
+
+    def put(self, key: str, entry: Tuple[np.ndarray, ...], /, *, directory: str | None = None) -> None:
+
+        self._put_in_memory(key, entry)
+
+        if directory is None:
+            return
+
+        # the path of the temporary file, as long as it has not been moved into place yet
+        temporary_path: str | None = None
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+
+            # write into a temporary file first and then atomically move it into place,
+            # so that concurrent workers never observe partially written entries
+            with tempfile.NamedTemporaryFile(dir=directory, prefix=f"{key}_", suffix=".npz", delete=False) as fp:
+                temporary_path = fp.name
+                np.savez(fp, *entry)
+
+            os.replace(temporary_path, os.path.join(directory, f"{key}.npz"))
+            temporary_path = None
+        except OSError as err:
+            get_internal_afi().warn(Verbosity.DEBUG, f"Could not persist the cache entry '{key}' in '{directory}' ({err}).")
+        finally:
+            if temporary_path is not None:
+                # do not leave partially written entries behind
+                with contextlib.suppress(OSError):
+                    os.unlink(temporary_path)
+
+    def _put_in_memory(self, key: str, entry: Tuple[np.ndarray, ...], /) -> None:
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
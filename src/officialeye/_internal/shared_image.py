@@ -0,0 +1,117 @@
+"""
+Module implementing the transport of images from the API process to the worker processes via shared memory.
+The API process decodes every image once and copies its pixels into a shared memory segment,
+whereas the worker processes access the pixels through read-only views of the segment, without copying them.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager, suppress
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock
+from typing import Iterator, Tuple
+
+import numpy as np
+
+
+class SharedImage:
+    """
+    A picklable handle to an image stored in a shared memory segment.
+    """
+
+    def __init__(self, name: str, shape: Tuple[int, ...], dtype: str, /):
+        self._name = name
+        self._shape = shape
+        self._dtype = dtype
+
+    @contextmanager
+    def attach(self) -> Iterator[np.ndarray]:
+        """
+        Attaches to the shared memory segment, providing a read-only view of the image while the context is active.
+        The view must not be used after the context has been left.
+        """
+
+        shared_memory = SharedMemory(name=self._name)
+
+        try:
+            img = np.ndarray(self._shape, dtype=np.dtype(self._dtype), buffer=shared_memory.buf)
+            img.flags.writeable = False
+
+            yield img
+
+            del img
+        finally:
+            # if a view of the segment is still referenced somewhere, the segment gets closed once the view is garbage collected
+            with suppress(BufferError):
+                shared_memory.close()
+
+
+class SharedImageSegment:
+    """
+    The shared memory segment holding an image, owned by the API process.
+    The segment is reference-counted and destroyed as soon as no task needs it anymore.
+    """
+
+    def __init__(self, img: np.ndarray, /):
+
+        self._shared_memory = SharedMemory(create=True, size=max(img.nbytes, 1))
+
+        shared_img = np.ndarray(img.shape, dtype=img.dtype, buffer=self._shared_memory.buf)
+        shared_img[...] = img
+        del shared_img
+
+        self._handle = SharedImage(self._shared_memory.name, img.shape, img.dtype.str)
+
+        self._references = 0
+        self._released = False
+        self._lock = Lock()
+
+    @property
+    def handle(self) -> SharedImage:
+        return self._handle
+
+    @property
+    def released(self) -> bool:
+        return self._released
+
+    def acquire(self) -> bool:
+        """
+        Adds a reference to the segment. Returns False if the segment has already been released and cannot be used anymore.
+        """
+
+        with self._lock:
+            if self._released:
+                return False
+
+            self._references += 1
+            return True
+
+    def release_reference(self) -> None:
+
+        with self._lock:
+            assert self._references > 0
+            self._references -= 1
+
+            if self._references > 0 or self._released:
+                return
+
+            self._released = True
+
+        self._destroy()
+
+    def release(self) -> None:
+        """
+        Destroys the segment, irrespective of the number of references.
+        """
+
+        with self._lock:
+            if self._released:
+                return
+
+            self._released = True
+
+        self._destroy()
+
+    def _destroy(self) -> None:
+        self._shared_memory.close()
+        self._shared_memory.unlink()
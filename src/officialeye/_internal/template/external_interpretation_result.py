@@ -16,20 +16,35 @@ from officialeye._internal.api_implementation import IApiInterfaceImplementation
 from officialeye._internal.template.external_template import ExternalTemplate
 
 if TYPE_CHECKING:
+    # noinspection PyProtectedMember
+    from officialeye._api.template.supervision_result import ISupervisionResult
     from officialeye._internal.template.internal_template import InternalTemplate
     from officialeye.types import FeatureInterpretation
 
 
 class ExternalInterpretationResult(IInterpretationResult, IApiInterfaceImplementation):
 
-    def __init__(self, template: InternalTemplate, feature_interpretations: Dict[str, FeatureInterpretation], /):
+    def __init__(self, template: InternalTemplate, feature_interpretations: Dict[str, FeatureInterpretation], /, *,
+                 supervision_result: ISupervisionResult | None = None):
         self._template = ExternalTemplate(template)
         self._feature_interpretation = feature_interpretations
 
+        # if not specified, the supervision result is attached later, in the parent process
+        self._supervision_result = supervision_result
+
     @property
     def template(self) -> ITemplate:
         return self._template
 
+    @property
+    def supervision_result(self) -> ISupervisionResult:
+        assert self._supervision_result is not None, "The supervision result should have been attached in the parent process"
+        return self._supervision_result
+
+    def attach_supervision_result(self, supervision_result: ISupervisionResult, /) -> ExternalInterpretationResult:
+        self._supervision_result = supervision_result
+        return self
+
     def get_feature_interpretation(self, feature: IFeature, /) -> FeatureInterpretation:
 
         if feature.identifier in self._feature_interpretation:
@@ -40,5 +55,11 @@ class ExternalInterpretationResult(IInterpretationResult, IApiInterfaceImplement
     def set_api_context(self, context: Context, /) -> None:
         self._template.set_api_context(context)
 
+        if isinstance(self._supervision_result, IApiInterfaceImplementation):
+            self._supervision_result.set_api_context(context)
+
     def clear_api_context(self) -> None:
         self._template.clear_api_context()
+
+        if isinstance(self._supervision_result, IApiInterfaceImplementation):
+            self._supervision_result.clear_api_context()
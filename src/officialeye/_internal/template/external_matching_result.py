@@ -23,6 +23,8 @@ class ExternalMatchingResult(SharedMatchingResult, IApiInterfaceImplementation):
 
         self._template = external_template
 
+        self._copy_matches_from(internal_matching_result)
+
     @property
     def template(self) -> ExternalTemplate:
         return self._template
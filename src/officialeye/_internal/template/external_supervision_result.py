@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING
 
 import numpy as np
 
@@ -10,9 +10,6 @@ from officialeye._api.context import Context
 # noinspection PyProtectedMember
 from officialeye._api.future import Future
 
-# noinspection PyProtectedMember
-from officialeye._api.image import Image
-
 # noinspection PyProtectedMember
 from officialeye._api.template.match import IMatch
 
@@ -49,8 +46,11 @@ class ExternalSupervisionResult(ISupervisionResult, IApiInterfaceImplementation)
         self._delta_prime = internal_supervision_result.delta_prime
         self._transformation_matrix = internal_supervision_result.transformation_matrix
 
+        self._match_weights: np.ndarray = internal_supervision_result.get_match_weights()
+
+        # the error has usually been computed already while choosing the supervision result
         # noinspection PyProtectedMember
-        self._match_weights: Dict[IMatch, float] = internal_supervision_result.get_match_weights()
+        self._weighted_mse = getattr(internal_supervision_result, "_weighted_mse", None)
 
     def set_api_context(self, context: Context, /) -> None:
         self._context = context
@@ -91,33 +91,45 @@ class ExternalSupervisionResult(ISupervisionResult, IApiInterfaceImplementation)
 
     def interpret_async(self, /, *, target: IImage) -> Future:
 
-        # TODO: this is hacky, maybe use a more clean approach here?
-        assert isinstance(target, Image)
-
         assert self._context is not None, \
             ("The external superivision result has no context information, probably because it has been given to the API user "
              "before the context has been initialized in this object via the 'set_api_context' method, which is incorrect behavior.")
 
         _api_context = self._context
 
+        # noinspection PyProtectedMember
+        target_segment = _api_context._share_image(target)
+
         self.clear_api_context()
 
-        # noinspection PyProtectedMember
-        return _api_context._submit_task(
-            template_interpret,
-            f"Interpreting [b]{self.template.name}[/]...",
-            self._template_path,
-            self,
-            interpretation_target_path=target._path
-        )
+        try:
+            # noinspection PyProtectedMember
+            return _api_context._submit_task(
+                template_interpret,
+                f"Interpreting [b]{self.template.name}[/]...",
+                self._template_path,
+                self,
+                interpretation_target=target_segment.handle,
+                interpretation_threads=_api_context._interpretation_threads,
+                shared_image_segments=[target_segment],
+                # instead of receiving a copy of this supervision result back from the worker, the interpretation result refers to this one
+                result_preprocessor=lambda interpretation_result: interpretation_result.attach_supervision_result(self)
+            )
+        finally:
+            target_segment.release_reference()
 
     def interpret(self, /, **kwargs) -> ExternalInterpretationResult:
         future = self.interpret_async(**kwargs)
         return future.result()
 
+    def get_match_weights(self) -> np.ndarray:
+        return self._match_weights
+
     def get_match_weight(self, match: IMatch, /) -> float:
 
-        if match in self._match_weights:
-            return self._match_weights[match]
+        match_index = self._matching_result.get_match_index(match)
+
+        if match_index is None:
+            return 1.0
 
-        return 1.0
+        return float(self._match_weights[match_index])
@@ -13,7 +13,7 @@ from officialeye._api.mutator import IMutator
 
 # noinspection PyProtectedMember
 from officialeye._api.template.template_interface import ITemplate
-from officialeye._internal.api.detect import template_detect
+from officialeye._internal.api.detect import template_detect, template_detect_and_interpret, template_extract_target_features
 from officialeye._internal.api_implementation import IApiInterfaceImplementation
 
 # noinspection PyProtectedMember
@@ -25,9 +25,13 @@ if TYPE_CHECKING:
     # noinspection PyProtectedMember
     from officialeye._api.context import Context
 
+    # noinspection PyProtectedMember
+    from officialeye._api.template.interpretation_result import IInterpretationResult
+
     # noinspection PyProtectedMember
     from officialeye._api.template.supervision_result import ISupervisionResult
     from officialeye._internal.template.internal_template import InternalTemplate
+    from officialeye._internal.template.target_features import TargetFeatures
 
 
 class ExternalTemplate(ITemplate, IApiInterfaceImplementation):
@@ -46,6 +50,8 @@ class ExternalTemplate(ITemplate, IApiInterfaceImplementation):
         self._path: str = template.get_path()
         self._source_image_path: str = template.get_source_image_path()
 
+        self._target_features_key: str | None = template.get_target_features_key()
+
         self._width = template.width
         self._height = template.height
 
@@ -90,23 +96,89 @@ class ExternalTemplate(ITemplate, IApiInterfaceImplementation):
             "The way in which it was accessed is not supported."
         )
 
-    def detect_async(self, /, *, target: IImage) -> Future:
+    def get_path(self) -> str:
+        return self._path
 
-        # TODO: this is hacky, maybe use a more clean approach here?
-        assert isinstance(target, Image)
+    def get_target_features_key(self) -> str | None:
+        return self._target_features_key
+
+    def extract_target_features_async(self, /, *, target: IImage) -> Future:
+
+        assert self._target_features_key is not None
 
         # noinspection PyProtectedMember
-        return self._context._submit_task(
-            template_detect,
-            f"Detecting [b]{self._name}[/]...",
-            self._path,
-            target_path=target._path,
-        )
+        target_segment = self._context._share_image(target)
+
+        try:
+            # noinspection PyProtectedMember
+            return self._context._submit_task(
+                template_extract_target_features,
+                "Extracting target features...",
+                self._path,
+                target=target_segment.handle,
+                shared_image_segments=[target_segment],
+                cancellable=True
+            )
+        finally:
+            target_segment.release_reference()
+
+    def detect_async(self, /, *, target: IImage, target_features: TargetFeatures | None = None) -> Future:
+
+        # noinspection PyProtectedMember
+        target_segment = self._context._share_image(target)
+
+        try:
+            # noinspection PyProtectedMember
+            return self._context._submit_task(
+                template_detect,
+                f"Detecting [b]{self._name}[/]...",
+                self._path,
+                target=target_segment.handle,
+                target_features=target_features,
+                shared_image_segments=[target_segment],
+                cancellable=True
+            )
+        finally:
+            target_segment.release_reference()
 
     def detect(self, /, **kwargs) -> ISupervisionResult:
         future = self.detect_async(**kwargs)
         return future.result()
 
+    def detect_and_interpret_async(self, /, *, target: IImage, interpretation_target: IImage | None = None) -> Future:
+
+        # noinspection PyProtectedMember
+        target_segment = self._context._share_image(target)
+        shared_image_segments = [target_segment]
+
+        try:
+            interpretation_target_handle = None
+
+            if interpretation_target is not None and interpretation_target is not target:
+                # noinspection PyProtectedMember
+                interpretation_target_segment = self._context._share_image(interpretation_target)
+                shared_image_segments.append(interpretation_target_segment)
+                interpretation_target_handle = interpretation_target_segment.handle
+
+            # noinspection PyProtectedMember
+            return self._context._submit_task(
+                template_detect_and_interpret,
+                f"Detecting and interpreting [b]{self._name}[/]...",
+                self._path,
+                target=target_segment.handle,
+                interpretation_target=interpretation_target_handle,
+                interpretation_threads=self._context._interpretation_threads,
+                shared_image_segments=shared_image_segments,
+                cancellable=True
+            )
+        finally:
+            for segment in shared_image_segments:
+                segment.release_reference()
+
+    def detect_and_interpret(self, /, **kwargs) -> IInterpretationResult:
+        future = self.detect_and_interpret_async(**kwargs)
+        return future.result()
+
     def get_image(self) -> IImage:
         return Image(self._context, path=self._source_image_path)
 
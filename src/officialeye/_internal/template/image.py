@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Callable, List
 
 import cv2
 import numpy as np
@@ -46,3 +46,29 @@ class InternalImage(IImage):
 
     def apply_mutators(self, *mutators: IMutator):
         self._mutators += mutators
+
+
+class InternalMutatedSourceImage(IImage):
+    """
+    The mutated source image of a template. The pixels are obtained from the given loader, which is expected to return
+    the same read-only raster every time, so that the images of the regions of the template are mere views of that raster.
+    """
+
+    def __init__(self, loader: Callable[[], np.ndarray], /):
+        super().__init__()
+
+        self._mutators: List[IMutator] = []
+        self._loader = loader
+
+    def load(self) -> np.ndarray:
+
+        img = self._loader()
+
+        for mutator in self._mutators:
+            get_internal_afi().info(Verbosity.DEBUG, f"InternalMutatedSourceImage::load() applies mutator '{mutator}'")
+            img = mutator.mutate(img)
+
+        return img
+
+    def apply_mutators(self, *mutators: IMutator):
+        self._mutators += mutators
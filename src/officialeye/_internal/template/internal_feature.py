@@ -15,6 +15,8 @@ from officialeye._internal.template.utils import load_mutator_from_dict
 from officialeye.error.errors.template import ErrTemplateInvalidFeature
 
 if TYPE_CHECKING:
+    # noinspection PyProtectedMember
+    from officialeye._api.template.interpretation import IInterpretation
     from officialeye._internal.template.feature_class.manager import FeatureClassManager
     from officialeye.types import FeatureInterpretation
 
@@ -82,16 +84,10 @@ class InternalFeature(InternalRegion, IFeature):
             load_mutator_from_dict(mutator_dict) for mutator_dict in mutators
         ]
 
-    def interpret_image(self, img: np.ndarray, /) -> FeatureInterpretation:
+    def get_interpretation(self) -> IInterpretation:
         """
-        Takes an image and runs the interpretation method defined in the corresponding feature class.
+        Loads the interpretation method defined in the corresponding feature class.
         Assumes that the feature class is present.
-
-        Arguments:
-            img: The image which should be passed to the intepretation method.
-
-        Returns:
-            The result of running the interpretation method on the image.
         """
 
         feature_class = self.get_feature_class()
@@ -104,6 +100,20 @@ class InternalFeature(InternalRegion, IFeature):
         assert isinstance(interpretation_method_id, str)
         assert isinstance(interpretation_method_config, dict)
 
-        interpretation_method = get_internal_context().get_interpretation(interpretation_method_id, interpretation_method_config)
+        return get_internal_context().get_interpretation(interpretation_method_id, interpretation_method_config)
+
+    def interpret_image(self, img: np.ndarray, /) -> FeatureInterpretation:
+        """
+        Takes an image and runs the interpretation method defined in the corresponding feature class.
+        Assumes that the feature class is present.
+
+        Arguments:
+            img: The image which should be passed to the intepretation method.
+
+        Returns:
+            The result of running the interpretation method on the image.
+        """
+
+        interpretation_method = self.get_interpretation()
 
         return interpretation_method.interpret(img, self)
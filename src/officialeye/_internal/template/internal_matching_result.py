@@ -1,9 +1,7 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict, List
+from typing import TYPE_CHECKING
 
-# noinspection PyProtectedMember
-from officialeye._api.template.match import IMatch
 from officialeye._internal.context.singleton import get_internal_context
 from officialeye._internal.template.shared_matching_result import SharedMatchingResult
 
@@ -21,13 +19,6 @@ class InternalMatchingResult(SharedMatchingResult):
 
         self._template_id = template.identifier
 
-        # keys: keypoint ids
-        # values: matches with this keypoint
-        self._matches_dict: Dict[str, List[IMatch]] = {}
-
-        for keypoint in self.template.keypoints:
-            self._matches_dict[keypoint.identifier] = []
-
     @property
     def template(self) -> InternalTemplate:
         return get_internal_context().get_template(self._template_id)
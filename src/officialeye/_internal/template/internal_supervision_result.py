@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING
 
 import numpy as np
 
@@ -31,6 +31,8 @@ class InternalSupervisionResult(ISupervisionResult):
 
     def __init__(self, supervision_result: SupervisionResult, internal_template: InternalTemplate,
                  internal_matching_result: InternalMatchingResult, /):
+        super().__init__()
+
         self._supervision_result = supervision_result
         self._internal_template = internal_template
         self._internal_matching_result = internal_matching_result
@@ -71,15 +73,14 @@ class InternalSupervisionResult(ISupervisionResult):
             "The way in which it was accessed is not supported."
         )
 
-    def get_match_weights(self) -> Dict[IMatch, float]:
-        # noinspection PyProtectedMember
-        return self._supervision_result._match_weights
+    def get_match_weights(self) -> np.ndarray:
+        return self._supervision_result.get_match_weights(self._internal_matching_result)
 
     def get_match_weight(self, match: IMatch, /) -> float:
 
-        match_weights = self.get_match_weights()
+        match_index = self._internal_matching_result.get_match_index(match)
 
-        if match in match_weights:
-            return match_weights[match]
+        if match_index is None:
+            return 1.0
 
-        return 1.0
+        return float(self.get_match_weights()[match_index])
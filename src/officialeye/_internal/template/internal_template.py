@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import os
 import random
-from typing import TYPE_CHECKING, Dict, Iterable, List
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List
 
 import numpy as np
 
@@ -12,26 +12,25 @@ from officialeye._api.future import Future
 # noinspection PyProtectedMember
 from officialeye._api.image import IImage
 
-# noinspection PyProtectedMember
-from officialeye._api.template.match import IMatch
-
 # noinspection PyProtectedMember
 from officialeye._api.template.supervisor import ISupervisor
 
 # noinspection PyProtectedMember
 from officialeye._api.template.template import ITemplate
 from officialeye._internal.context.singleton import get_internal_afi, get_internal_context
+from officialeye._internal.feature_cache import FeatureCache, get_file_digest, make_cache_key
 
 # noinspection PyProtectedMember
 from officialeye._internal.feedback.verbosity import Verbosity
 from officialeye._internal.template.feature_class.loader import load_template_feature_classes
 from officialeye._internal.template.feature_class.manager import FeatureClassManager
-from officialeye._internal.template.image import InternalImage
+from officialeye._internal.template.image import InternalImage, InternalMutatedSourceImage
 from officialeye._internal.template.internal_feature import InternalFeature
 from officialeye._internal.template.internal_matching_result import InternalMatchingResult
 from officialeye._internal.template.internal_supervision_result import InternalSupervisionResult
 from officialeye._internal.template.keypoint import InternalKeypoint
-from officialeye._internal.template.utils import load_mutator_from_dict
+from officialeye._internal.template.target_features import TargetFeatures
+from officialeye._internal.template.utils import get_mutators_description, load_mutator_from_dict
 from officialeye._internal.timer import Timer
 from officialeye.error.errors.general import ErrInvalidIdentifier, ErrOperationNotSupported
 from officialeye.error.errors.supervision import ErrSupervisionCorrespondenceNotFound
@@ -41,6 +40,9 @@ if TYPE_CHECKING:
     # noinspection PyProtectedMember
     from officialeye._api.mutator import IMutator
 
+    # noinspection PyProtectedMember
+    from officialeye._api.template.interpretation_result import IInterpretationResult
+
     # noinspection PyProtectedMember
     from officialeye._api.template.matcher import IMatcher
 
@@ -54,6 +56,13 @@ _SUPERVISION_RESULT_FIRST = "first"
 _SUPERVISION_RESULT_RANDOM = "random"
 _SUPERVISION_RESULT_BEST_MSE = "best_mse"
 _SUPERVISION_RESULT_BEST_SCORE = "best_score"
+_SUPERVISION_RESULT_ENGINES = (
+    _SUPERVISION_RESULT_FIRST, _SUPERVISION_RESULT_RANDOM, _SUPERVISION_RESULT_BEST_MSE, _SUPERVISION_RESULT_BEST_SCORE
+)
+
+
+# the mutated source images of the most recently used templates
+_mutated_source_images = FeatureCache(capacity=16)
 
 
 class InternalTemplate(ITemplate):
@@ -77,6 +86,9 @@ class InternalTemplate(ITemplate):
             load_mutator_from_dict(mutator_dict) for mutator_dict in yaml_dict["mutators"]["target"]
         ]
 
+        # the source image with the source mutators applied, kept here only if it cannot be shared with other templates
+        self._mutated_source_image: np.ndarray | None = None
+
         self._keypoints: Dict[str, InternalKeypoint] = {}
         self._features: Dict[str, InternalFeature] = {}
 
@@ -151,6 +163,18 @@ class InternalTemplate(ITemplate):
             "The way in which it was accessed is not supported."
         )
 
+    def detect_and_interpret_async(self, /, *, target: IImage, interpretation_target: IImage | None = None) -> Future:
+        raise ErrOperationNotSupported(
+            "while accessing an internal template instance.",
+            "The way in which it was accessed is not supported."
+        )
+
+    def detect_and_interpret(self, /, **kwargs) -> IInterpretationResult:
+        raise ErrOperationNotSupported(
+            "while accessing an internal template instance.",
+            "The way in which it was accessed is not supported."
+        )
+
     def get_source_image_path(self) -> str:
         if os.path.isabs(self._source):
             return self._source
@@ -158,12 +182,62 @@ class InternalTemplate(ITemplate):
         path = os.path.join(path_to_template_dir, self._source)
         return os.path.normpath(path)
 
+    def get_source_fingerprint(self) -> str | None:
+        """
+        Computes a string identifying the mutated source image of this template, i.e., a string that changes
+        whenever the contents of the source image file or the chain of source mutators change.
+        Returns None if such a string cannot be computed, in which case data derived from the source image must not be cached.
+        """
+
+        mutators_description = get_mutators_description(self._source_mutators)
+
+        if mutators_description is None:
+            return None
+
+        source_digest = get_file_digest(self.get_source_image_path())
+
+        return make_cache_key(self._path_to_template, source_digest, mutators_description)
+
     def get_image(self) -> IImage:
         return InternalImage(path=self.get_source_image_path())
 
     def get_mutated_image(self) -> IImage:
-        img = self.get_image()
-        img.apply_mutators(*self._source_mutators)
+        return InternalMutatedSourceImage(self.load_mutated_source_image)
+
+    def load_mutated_source_image(self) -> np.ndarray:
+        """
+        Returns the source image with the source mutators applied. The raster is computed only once per process,
+        and is shared by all regions of the template, which is why it must not be modified.
+        """
+
+        source_fingerprint = self.get_source_fingerprint()
+
+        if source_fingerprint is None:
+            # the raster cannot be shared with other templates, but it can still be reused by this one
+            if self._mutated_source_image is None:
+                self._mutated_source_image = self._compute_mutated_source_image()
+            return self._mutated_source_image
+
+        cached_images = _mutated_source_images.get(source_fingerprint)
+
+        if cached_images is not None:
+            return cached_images[0]
+
+        img = self._compute_mutated_source_image()
+
+        _mutated_source_images.put(source_fingerprint, (img,))
+
+        return img
+
+    def _compute_mutated_source_image(self) -> np.ndarray:
+
+        img = self.get_image().load()
+
+        for mutator in self._source_mutators:
+            img = mutator.mutate(img)
+
+        img.flags.writeable = False
+
         return img
 
     @property
@@ -204,6 +278,24 @@ class InternalTemplate(ITemplate):
 
         return get_internal_context().get_matcher(matcher_id, matcher_config)
 
+    def get_target_features_key(self, /) -> str | None:
+        """
+        Computes a string such that all templates with the same string extract identical features from the same target image.
+        Returns None if the target features extracted by this template cannot be shared with other templates.
+        """
+
+        matcher_key = self.get_matcher().get_target_features_key()
+
+        if matcher_key is None:
+            return None
+
+        mutators_description = get_mutators_description(self._target_mutators)
+
+        if mutators_description is None:
+            return None
+
+        return make_cache_key(matcher_key, mutators_description)
+
     def get_supervisor(self, /) -> ISupervisor:
         supervisor_id = self._supervision["engine"]
         supervisor_config_generic = self._supervision["config"]
@@ -239,85 +331,115 @@ class InternalTemplate(ITemplate):
     def get_path(self) -> str:
         return self._path_to_template
 
+    def _get_supervision_acceptance_thresholds(self) -> Dict[str, float]:
+        if "accept" not in self._supervision:
+            return {}
+        return self._supervision["accept"]
+
     def _run_supervisor(self, keypoint_matching_result: InternalMatchingResult, /) -> InternalSupervisionResult | None:
 
+        supervision_result_choice_engine = self._supervision["result"]
+
+        if supervision_result_choice_engine not in _SUPERVISION_RESULT_ENGINES:
+            raise ErrInvalidIdentifier(
+                "while running supervisor.",
+                f"Invalid supervision result choice engine '{supervision_result_choice_engine}'."
+            )
+
+        # a result satisfying all the specified thresholds is accepted immediately, without waiting for further results
+        acceptance_thresholds = self._get_supervision_acceptance_thresholds()
+        accept_score = acceptance_thresholds.get("score", None)
+        accept_mse = acceptance_thresholds.get("mse", None)
+
         supervisor = self.get_supervisor()
         supervisor.setup(self, keypoint_matching_result)
 
-        supervision_result_choice_engine = self._supervision["result"]
-        results: List[InternalSupervisionResult] = [
-            InternalSupervisionResult(supervision_result, self, keypoint_matching_result)
-            for supervision_result in supervisor.supervise(self, keypoint_matching_result)
-        ]
+        best_result: InternalSupervisionResult | None = None
+        best_result_mse = 0.0
+        best_result_score = 0.0
 
-        if len(results) == 0:
-            return None
+        # the results are consumed as the supervisor produces them, so that the supervisor can be stopped as early as possible
+        for result_id, supervision_result in enumerate(supervisor.supervise(self, keypoint_matching_result)):
+
+            get_internal_context().check_cancelled()
+
+            result = InternalSupervisionResult(supervision_result, self, keypoint_matching_result)
+
+            result_score = result.score
+            result_mse = result.get_weighted_mse()
 
-        for result in results:
             get_internal_afi().info(
                 Verbosity.INFO_VERBOSE,
-                f"Got result with score {result.score} and error {result.get_weighted_mse()} from supervisor '{supervisor}'."
+                f"Got result #{result_id + 1} with score {result_score} and error {result_mse} from supervisor '{supervisor}'."
             )
 
-        if supervision_result_choice_engine == _SUPERVISION_RESULT_FIRST:
-            return results[0]
-
-        if supervision_result_choice_engine == _SUPERVISION_RESULT_RANDOM:
-            return random.choice(results)
+            if (accept_score is not None or accept_mse is not None) \
+                    and (accept_score is None or result_score >= accept_score) \
+                    and (accept_mse is None or result_mse <= accept_mse):
+                get_internal_afi().info(Verbosity.INFO_VERBOSE, f"Result #{result_id + 1} meets the acceptance thresholds, accepting it.")
+                return result
 
-        if supervision_result_choice_engine == _SUPERVISION_RESULT_BEST_MSE:
+            if supervision_result_choice_engine == _SUPERVISION_RESULT_FIRST:
+                return result
 
-            best_result = results[0]
-            best_result_mse = best_result.get_weighted_mse()
+            if best_result is None:
+                is_better = True
+            elif supervision_result_choice_engine == _SUPERVISION_RESULT_RANDOM:
+                # reservoir sampling, so that every result is chosen with the same probability
+                is_better = random.randrange(result_id + 1) == 0
+            elif supervision_result_choice_engine == _SUPERVISION_RESULT_BEST_MSE:
+                is_better = result_mse < best_result_mse
+            else:
+                assert supervision_result_choice_engine == _SUPERVISION_RESULT_BEST_SCORE
+                is_better = result_score > best_result_score or result_score == best_result_score and result_mse < best_result_mse
 
-            for result_id, result in enumerate(results):
-                result_mse = result.get_weighted_mse()
+            if is_better:
+                best_result = result
+                best_result_mse = result_mse
+                best_result_score = result_score
 
-                get_internal_afi().info(Verbosity.INFO_VERBOSE, f"Result #{result_id + 1} has MSE {result_mse}.")
+        if best_result is not None:
+            get_internal_afi().info(Verbosity.INFO_VERBOSE, f"Chosen result has score {best_result_score} and MSE {best_result_mse}.")
 
-                if result_mse < best_result_mse:
-                    best_result_mse = result_mse
-                    best_result = result
+        return best_result
 
-            get_internal_afi().info(Verbosity.INFO_VERBOSE, f"Best result has MSE {best_result_mse}.")
+    def _prepare_target(self, target: np.ndarray, /) -> np.ndarray:
 
-            return best_result
+        # prepare target image
+        get_internal_afi().update_status("Preparing target image...")
 
-        if supervision_result_choice_engine == _SUPERVISION_RESULT_BEST_SCORE:
+        if len(self._target_mutators) > 0 and not target.flags.writeable:
+            # the target image may be a read-only view of shared memory, whereas mutators are allowed to modify images in place
+            target = target.copy()
 
-            best_result = results[0]
-            best_result_mse = best_result.get_weighted_mse()
-            best_result_score = best_result.score
+        # apply mutators to the target image
+        for mutator in self._target_mutators:
+            target = mutator.mutate(target)
 
-            for result_id, result in enumerate(results):
-                result_score = result.score
-                result_mse = result.get_weighted_mse()
+        return target
 
-                get_internal_afi().info(Verbosity.INFO_VERBOSE, f"Result #{result_id + 1} has score {result_score}.")
+    def extract_target_features(self, target: np.ndarray, /) -> TargetFeatures:
 
-                if result_score > best_result_score or result_score == best_result_score and result_mse < best_result_mse:
-                    best_result_mse = result_mse
-                    best_result_score = result_score
-                    best_result = result
+        target_features_key = self.get_target_features_key()
+        assert target_features_key is not None
 
-            get_internal_afi().info(Verbosity.INFO_VERBOSE, f"Best result has score {best_result_score} and MSE {best_result_mse}.")
+        target = self._prepare_target(target)
 
-            return best_result
+        get_internal_afi().update_status("Extracting target features...")
 
-        raise ErrInvalidIdentifier(
-            "while running supervisor.",
-            f"Invalid supervision result choice engine '{supervision_result_choice_engine}'."
-        )
+        return TargetFeatures(target_features_key, self.get_matcher().extract_target_features(target))
 
     def do_detect(self, target: np.ndarray, /) -> InternalSupervisionResult:
         # find all patterns in the target image
+        target = self._prepare_target(target)
+        return self._do_detect(lambda matcher: matcher.setup(target, self))
 
-        # prepare target image
-        get_internal_afi().update_status("Preparing target image...")
+    def do_detect_with_target_features(self, target_features: TargetFeatures, /) -> InternalSupervisionResult:
+        # find all patterns in the target image, whose features have already been extracted
+        assert target_features.key == self.get_target_features_key()
+        return self._do_detect(lambda matcher: matcher.setup_with_target_features(target_features.features, self))
 
-        # apply mutators to the target image
-        for mutator in self._target_mutators:
-            target = mutator.mutate(target)
+    def _do_detect(self, setup_matcher: Callable[[IMatcher], None], /) -> InternalSupervisionResult:
 
         get_internal_afi().update_status("Running matching phase...")
 
@@ -326,9 +448,10 @@ class InternalTemplate(ITemplate):
         with _timer:
             # start matching
             matcher: IMatcher = self.get_matcher()
-            matcher.setup(target, self)
+            setup_matcher(matcher)
 
             for keypoint in self.keypoints:
+                get_internal_context().check_cancelled()
                 get_internal_afi().info(Verbosity.DEBUG, f"Running matcher '{matcher}' for keypoint '{keypoint.identifier}'.")
                 assert isinstance(keypoint, InternalKeypoint)
                 matcher.match(keypoint)
@@ -336,9 +459,8 @@ class InternalTemplate(ITemplate):
             keypoint_matching_result = InternalMatchingResult(self)
 
             for keypoint in self.keypoints:
-                for match in matcher.get_matches_for_keypoint(keypoint):
-                    assert isinstance(match, IMatch)
-                    keypoint_matching_result.add_match(match)
+                keypoint_points, target_points, scores = matcher.get_match_arrays_for_keypoint(keypoint)
+                keypoint_matching_result.add_matches(keypoint.identifier, keypoint_points, target_points, scores)
 
             keypoint_matching_result.validate()
             assert keypoint_matching_result.get_total_match_count() > 0
@@ -349,6 +471,8 @@ class InternalTemplate(ITemplate):
             f"and {_timer.get_cpu_time():.2f} seconds of CPU time."
         )
 
+        get_internal_context().check_cancelled()
+
         get_internal_afi().update_status("Running supervision phase...")
 
         with _timer:
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Tuple
 
 # noinspection PyProtectedMember
 from officialeye._api.template.keypoint import IKeypoint
@@ -36,6 +36,30 @@ class InternalKeypoint(InternalRegion, IKeypoint):
 
         assert 0 <= self._matches_min <= self._matches_max
 
+        self._search_region: Tuple[float, float, float, float] | None = None
+
+        if "search" in keypoint_dict:
+            search_dict = keypoint_dict["search"]
+
+            self._search_region = (
+                float(search_dict["x"]), float(search_dict["y"]), float(search_dict["w"]), float(search_dict["h"])
+            )
+
+            search_x, search_y, search_w, search_h = self._search_region
+
+            if search_w <= 0.0 or search_h <= 0.0:
+                raise ErrTemplateInvalidKeypoint(
+                    f"while loading template keypoint '{self.identifier}'",
+                    f"the search region must have a positive size, got {search_w} by {search_h}"
+                )
+
+            # tolerate the rounding errors of the sums
+            if search_x < 0.0 or search_y < 0.0 or search_x + search_w > 1.0 + 1e-9 or search_y + search_h > 1.0 + 1e-9:
+                raise ErrTemplateInvalidKeypoint(
+                    f"while loading template keypoint '{self.identifier}'",
+                    "the search region must lie within the target image, i.e., its coordinates must be between 0 and 1"
+                )
+
     @property
     def matches_min(self) -> int:
         return self._matches_min
@@ -44,6 +68,10 @@ class InternalKeypoint(InternalRegion, IKeypoint):
     def matches_max(self) -> int:
         return self._matches_max
 
+    @property
+    def search_region(self) -> Tuple[float, float, float, float] | None:
+        return self._search_region
+
 
 class ExternalKeypoint(ExternalRegion, IKeypoint, IApiInterfaceImplementation):
 
@@ -52,6 +80,7 @@ class ExternalKeypoint(ExternalRegion, IKeypoint, IApiInterfaceImplementation):
 
         self._matches_min = internal_keypoint.matches_min
         self._matches_max = internal_keypoint.matches_max
+        self._search_region = internal_keypoint.search_region
 
     @property
     def matches_min(self) -> int:
@@ -61,6 +90,10 @@ class ExternalKeypoint(ExternalRegion, IKeypoint, IApiInterfaceImplementation):
     def matches_max(self) -> int:
         return self._matches_max
 
+    @property
+    def search_region(self) -> Tuple[float, float, float, float] | None:
+        return self._search_region
+
     def set_api_context(self, context: Context, /) -> None:
         # no methods of this class require any contextual information to work, nothing to do
         pass
@@ -35,6 +35,12 @@ def generate_template_schema() -> yml.Map:
         "matches": yml.Map({
             "min": yml.Int(),
             "max": yml.Int()
+        }),
+        yml.Optional("search"): yml.Map({
+            "x": yml.Float(),
+            "y": yml.Float(),
+            "w": yml.Float(),
+            "h": yml.Float()
         })
     })
 
@@ -70,7 +76,11 @@ def generate_template_schema() -> yml.Map:
                 _alphanumeric_id_validator,
                 yml.EmptyDict() | yml.MapPattern(_alphanumeric_id_validator, yml.Any())
             ),
-            "result": yml.Regex(r"^(first|random|best_mse|best_score)$")
+            "result": yml.Regex(r"^(first|random|best_mse|best_score)$"),
+            yml.Optional("accept"): yml.Map({
+                yml.Optional("score"): yml.Float(),
+                yml.Optional("mse"): yml.Float()
+            })
         }),
         "feature_classes": yml.MapPattern(_alphanumeric_id_validator, _feature_class_validator),
         "features": yml.MapPattern(_alphanumeric_id_validator, _oe_template_schema_feature_validator)
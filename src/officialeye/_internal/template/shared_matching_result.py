@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from abc import ABC
-from typing import TYPE_CHECKING, Dict, Iterable, List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+import numpy as np
 
 # noinspection PyProtectedMember
-from officialeye._api.template.match import IMatch
+from officialeye._api.template.match import IMatch, Match
 
 # noinspection PyProtectedMember
 from officialeye._api.template.matching_result import IMatchingResult
@@ -23,58 +25,215 @@ class SharedMatchingResult(IMatchingResult, ABC):
     The parent process uses the internal representation, whereas the external representation is only for the child process.
     This class represents the aspects that both representations have in common.
     Therefore, it is important that this class operates only on the interface level and is picklable.
+
+    The matches are stored in a columnar form, i.e., as a couple of arrays whose i-th rows all describe the i-th match.
+    The matches are ordered by keypoint, so that the matches of a single keypoint occupy a contiguous range of rows.
+    IMatch instances are only created on demand, when the matches are accessed one by one.
     """
 
     def __init__(self, template: ITemplate, /):
+
+        self._keypoint_ids: List[str] = [keypoint.identifier for keypoint in template.keypoints]
+
         # keys: keypoint ids
-        # values: matches with this keypoint
-        self._matches_dict: Dict[str, List[IMatch]] = {}
+        # values: indices of the keypoints in the list above
+        self._keypoint_index: Dict[str, int] = {keypoint_id: i for i, keypoint_id in enumerate(self._keypoint_ids)}
+
+        # positions of the keypoints in the template, used to translate keypoint points into template points
+        self._keypoint_top_lefts = np.array([keypoint.top_left for keypoint in template.keypoints], dtype=np.int32).reshape(-1, 2)
+
+        self._keypoint_points = np.empty((0, 2), dtype=np.int32)
+        self._template_points = np.empty((0, 2), dtype=np.int32)
+        self._target_points = np.empty((0, 2), dtype=np.int32)
+        self._scores = np.empty(0, dtype=np.float64)
+        self._keypoint_indices = np.empty(0, dtype=np.int32)
+
+        # the matches of the i-th keypoint occupy the rows in range(self._keypoint_offsets[i], self._keypoint_offsets[i + 1])
+        self._keypoint_offsets = np.zeros(len(self._keypoint_ids) + 1, dtype=np.int64)
+
+        # matches that have been added, but not yet merged into the arrays above
+        # each chunk consists of the keypoint index, keypoint points, target points and scores
+        self._pending_chunks: List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]] = []
+
+        self._match_count = 0
+
+    def _copy_matches_from(self, other: SharedMatchingResult, /):
+        # noinspection PyProtectedMember
+        other._merge_pending_chunks()
+
+        assert self._keypoint_ids == other._keypoint_ids
 
-        for keypoint in template.keypoints:
-            self._matches_dict[keypoint.identifier] = []
+        self._keypoint_points = other._keypoint_points
+        self._template_points = other._template_points
+        self._target_points = other._target_points
+        self._scores = other._scores
+        self._keypoint_indices = other._keypoint_indices
+        self._keypoint_offsets = other._keypoint_offsets
+        self._pending_chunks = []
+        self._match_count = other._match_count
+
+    def _merge_pending_chunks(self):
+
+        if len(self._pending_chunks) == 0:
+            return
+
+        pending_chunks = self._pending_chunks
+        self._pending_chunks = []
+
+        keypoint_points = np.concatenate([self._keypoint_points] + [chunk[1] for chunk in pending_chunks], axis=0)
+        target_points = np.concatenate([self._target_points] + [chunk[2] for chunk in pending_chunks], axis=0)
+        scores = np.concatenate([self._scores] + [chunk[3] for chunk in pending_chunks], axis=0)
+        keypoint_indices = np.concatenate([self._keypoint_indices] + [
+            np.full(chunk[3].shape[0], chunk[0], dtype=np.int32) for chunk in pending_chunks
+        ], axis=0)
+
+        self._set_arrays(keypoint_points, target_points, scores, keypoint_indices)
+
+    def _set_arrays(self, keypoint_points: np.ndarray, target_points: np.ndarray, scores: np.ndarray, keypoint_indices: np.ndarray, /):
+
+        # group the matches by keypoint, preserving the order in which they have been added
+        order = np.argsort(keypoint_indices, kind="stable")
+
+        self._keypoint_points = keypoint_points[order]
+        self._target_points = target_points[order]
+        self._scores = scores[order]
+        self._keypoint_indices = keypoint_indices[order]
+        self._template_points = self._keypoint_points + self._keypoint_top_lefts[self._keypoint_indices]
+
+        keypoint_match_counts = np.bincount(self._keypoint_indices, minlength=len(self._keypoint_ids))
+        self._keypoint_offsets = np.concatenate(([0], np.cumsum(keypoint_match_counts)))
+
+        self._match_count = self._scores.shape[0]
 
     def remove_all_matches(self):
-        self._matches_dict = {}
+        self._pending_chunks = []
+        self._set_arrays(
+            np.empty((0, 2), dtype=np.int32),
+            np.empty((0, 2), dtype=np.int32),
+            np.empty(0, dtype=np.float64),
+            np.empty(0, dtype=np.int32)
+        )
 
     def add_match(self, match: IMatch, /):
-        assert match.keypoint.identifier in self._matches_dict
-        self._matches_dict[match.keypoint.identifier].append(match)
+        self.add_matches(
+            match.keypoint.identifier,
+            match.keypoint_point.reshape(1, 2),
+            match.target_point.reshape(1, 2),
+            np.array([match.get_score()], dtype=np.float64)
+        )
+
+    def add_matches(self, keypoint_id: str, keypoint_points: np.ndarray, target_points: np.ndarray, scores: np.ndarray, /):
+        """
+        Adds matches of the given keypoint, specified by the (N, 2) array of points lying in the keypoint,
+        the (N, 2) array of the corresponding points in the target image and the array of the N scores of the matches.
+        """
+
+        assert keypoint_id in self._keypoint_index
+        assert keypoint_points.shape == target_points.shape == (scores.shape[0], 2)
+
+        self._pending_chunks.append((
+            self._keypoint_index[keypoint_id],
+            keypoint_points.astype(np.int32, copy=False),
+            target_points.astype(np.int32, copy=False),
+            scores.astype(np.float64, copy=False)
+        ))
+
+        self._match_count += scores.shape[0]
+
+    def _get_match(self, match_index: int, /) -> IMatch:
+        keypoint_id = self._keypoint_ids[self._keypoint_indices[match_index]]
+
+        return Match(
+            self.template,
+            self.template.get_keypoint(keypoint_id),
+            keypoint_point=self._keypoint_points[match_index],
+            target_point=self._target_points[match_index],
+            score=float(self._scores[match_index])
+        )
 
     def get_all_matches(self) -> Iterable[IMatch]:
-        for keypoint_id in self._matches_dict:
-            for match in self._matches_dict[keypoint_id]:
-                yield match
+        self._merge_pending_chunks()
+        for match_index in range(self._match_count):
+            yield self._get_match(match_index)
 
     def get_total_match_count(self) -> int:
-        match_count = 0
-        for keypoint_id in self._matches_dict:
-            match_count += len(self._matches_dict[keypoint_id])
-        return match_count
+        return self._match_count
 
-    def get_keypoint_ids(self) -> Iterable[str]:
-        for keypoint_id in self._matches_dict:
-            yield keypoint_id
+    def get_keypoint_ids(self) -> List[str]:
+        return list(self._keypoint_ids)
 
     def get_matches_for_keypoint(self, keypoint_id: str, /) -> Iterable[IMatch]:
-        for match in self._matches_dict[keypoint_id]:
-            yield match
+        self._merge_pending_chunks()
+
+        keypoint_index = self._keypoint_index[keypoint_id]
+
+        for match_index in range(self._keypoint_offsets[keypoint_index], self._keypoint_offsets[keypoint_index + 1]):
+            yield self._get_match(match_index)
+
+    def get_keypoint_match_range(self, keypoint_id: str, /) -> Tuple[int, int]:
+        """ Returns the range of rows of the match arrays occupied by the matches of the given keypoint. """
+        self._merge_pending_chunks()
+        keypoint_index = self._keypoint_index[keypoint_id]
+        return int(self._keypoint_offsets[keypoint_index]), int(self._keypoint_offsets[keypoint_index + 1])
+
+    def get_match_index(self, match: IMatch, /) -> int | None:
+        """ Finds the row of the match arrays describing the given match, or returns None if there is no such row. """
+
+        if match.keypoint.identifier not in self._keypoint_index:
+            return None
+
+        first, last = self.get_keypoint_match_range(match.keypoint.identifier)
+
+        candidates = np.flatnonzero(
+            np.all(self._keypoint_points[first:last] == match.keypoint_point, axis=1)
+            & np.all(self._target_points[first:last] == match.target_point, axis=1)
+        )
+
+        if candidates.shape[0] == 0:
+            return None
+
+        return first + int(candidates[0])
+
+    def get_keypoint_indices(self) -> np.ndarray:
+        self._merge_pending_chunks()
+        return self._keypoint_indices
+
+    def get_template_points(self) -> np.ndarray:
+        self._merge_pending_chunks()
+        return self._template_points
+
+    def get_target_points(self) -> np.ndarray:
+        self._merge_pending_chunks()
+        return self._target_points
+
+    def get_scores(self) -> np.ndarray:
+        self._merge_pending_chunks()
+        return self._scores
 
     def validate(self):
 
         get_internal_afi().info(Verbosity.DEBUG, "Validating the keypoint matching result.")
 
-        assert len(self._matches_dict) > 0
+        assert len(self._keypoint_ids) > 0
+
+        self._merge_pending_chunks()
 
         total_match_count = 0
 
+        # rows of the match arrays that survive the validation
+        keep = np.ones(self._match_count, dtype=bool)
+
         # verify that for every keypoint, it has been matched a number of times that is in the desired bounds
-        for keypoint_id in self._matches_dict:
+        for keypoint_index, keypoint_id in enumerate(self._keypoint_ids):
             keypoint = self.template.get_keypoint(keypoint_id)
 
             keypoint_matches_min = keypoint.matches_min
             keypoint_matches_max = keypoint.matches_max
 
-            keypoint_matches_count = len(self._matches_dict[keypoint_id])
+            first = self._keypoint_offsets[keypoint_index]
+            last = self._keypoint_offsets[keypoint_index + 1]
+
+            keypoint_matches_count = int(last - first)
 
             if keypoint_matches_count < keypoint_matches_min:
                 raise ErrMatchingMatchCountOutOfBounds(
@@ -90,7 +249,8 @@ class SharedMatchingResult(IMatchingResult, ABC):
                     f"Keypoint '{keypoint_id}' of template '{self.template.identifier}' has too many matches "
                     f"(matches: {keypoint_matches_count} max: {keypoint_matches_max}). Cherry-picking the best matches.")
                 # cherry-pick the best matches
-                self._matches_dict[keypoint_id] = sorted(self._matches_dict[keypoint_id])[-keypoint_matches_max:]
+                worst_matches = np.argsort(self._scores[first:last], kind="stable")[:keypoint_matches_count - keypoint_matches_max]
+                keep[first + worst_matches] = False
                 keypoint_matches_count = keypoint_matches_max
             else:
                 get_internal_afi().info(
@@ -101,6 +261,9 @@ class SharedMatchingResult(IMatchingResult, ABC):
 
             total_match_count += keypoint_matches_count
 
+        if not np.all(keep):
+            self._set_arrays(self._keypoint_points[keep], self._target_points[keep], self._scores[keep], self._keypoint_indices[keep])
+
         assert total_match_count >= 0
         if total_match_count == 0:
             raise ErrMatchingMatchCountOutOfBounds(
@@ -0,0 +1,121 @@
+"""
+Module implementing coarse signatures of images, used to rank the templates by their similarity to a target image before the
+full detection is run. A signature consists of a small number of SIFT features extracted from a downscaled copy of an image.
+The similarity of a template to a target image is the fraction of the template signature features that can be matched to the target
+signature features in a geometrically consistent way, i.e., such that the matched features agree on a single homography.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import cv2
+import numpy as np
+
+from officialeye._internal.feature_cache import FeatureCache, get_file_digest, make_cache_key
+
+if TYPE_CHECKING:
+    from officialeye._internal.template.internal_template import InternalTemplate
+
+# the number of features and the size of the longer side of the downscaled image, for templates and for target images
+# the target images get more features, since the documents usually occupy only a part of them
+_TEMPLATE_MAX_FEATURES = 500
+_TEMPLATE_MAX_SIDE = 640
+_TARGET_MAX_FEATURES = 1000
+_TARGET_MAX_SIDE = 1024
+
+# the ratio test threshold used to discard ambiguous matches
+_RATIO = 0.8
+
+# the maximal reprojection error, in pixels of the downscaled target image, of the matches agreeing on a homography
+_REPROJECTION_THRESHOLD = 3.0
+
+# the minimal number of matches needed to estimate a homography
+_MIN_MATCHES = 8
+
+# the signatures of the templates, shared by all templates of the process with the same source image
+_template_signatures = FeatureCache(capacity=1024)
+
+
+class ImageSignature:
+
+    def __init__(self, points: np.ndarray, descriptors: np.ndarray, /):
+        # locations of the features in the downscaled image
+        self.points = points
+        self.descriptors = descriptors
+
+    def __len__(self) -> int:
+        return self.points.shape[0]
+
+
+def compute_image_signature(img: np.ndarray, /, *, max_features: int, max_side: int) -> ImageSignature:
+
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    scale = max_side / max(img.shape)
+
+    if scale < 1.0:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    keypoints, descriptors = cv2.SIFT_create(nfeatures=max_features).detectAndCompute(img, None)
+
+    points = np.array([kp.pt for kp in keypoints], dtype=np.float32).reshape(-1, 2)
+
+    if descriptors is None:
+        descriptors = np.zeros((0, 128), dtype=np.float32)
+
+    return ImageSignature(points, descriptors)
+
+
+def get_template_signature(template: InternalTemplate, /) -> ImageSignature:
+    """
+    Returns the signature of the source image of the given template. The signature is computed only once per process and,
+    if the matcher of the template persists its data in a cache directory, stored there as well, so that it survives restarts of the workers.
+    """
+
+    cache_key = make_cache_key("signature", get_file_digest(template.get_source_image_path()), _TEMPLATE_MAX_FEATURES, _TEMPLATE_MAX_SIDE)
+
+    cache_dir = template.get_matcher().get_cache_dir()
+
+    cached_signature = _template_signatures.get(cache_key, directory=cache_dir)
+
+    if cached_signature is not None:
+        points, descriptors = cached_signature
+        return ImageSignature(points, descriptors)
+
+    signature = compute_image_signature(template.get_image().load(), max_features=_TEMPLATE_MAX_FEATURES, max_side=_TEMPLATE_MAX_SIDE)
+
+    _template_signatures.put(cache_key, (signature.points, signature.descriptors), directory=cache_dir)
+
+    return signature
+
+
+def get_target_signature(target: np.ndarray, /) -> ImageSignature:
+    return compute_image_signature(target, max_features=_TARGET_MAX_FEATURES, max_side=_TARGET_MAX_SIDE)
+
+
+def get_signature_similarity(template_signature: ImageSignature, target_signature: ImageSignature, /) -> float:
+    """
+    Computes the similarity of a template to a target image, a number between 0 and 1, given their signatures.
+    """
+
+    if len(template_signature) < _MIN_MATCHES or len(target_signature) < 2:
+        return 0.0
+
+    matches = cv2.BFMatcher(cv2.NORM_L2).knnMatch(template_signature.descriptors, target_signature.descriptors, k=2)
+
+    matches = [m[0] for m in matches if len(m) == 2 and m[0].distance < _RATIO * m[1].distance]
+
+    if len(matches) < _MIN_MATCHES:
+        return 0.0
+
+    template_points = template_signature.points[[m.queryIdx for m in matches]]
+    target_points = target_signature.points[[m.trainIdx for m in matches]]
+
+    _, mask = cv2.findHomography(template_points, target_points, cv2.RANSAC, _REPROJECTION_THRESHOLD)
+
+    if mask is None:
+        return 0.0
+
+    return float(np.count_nonzero(mask)) / len(template_signature)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from officialeye._internal.api_implementation import IApiInterfaceImplementation
+
+if TYPE_CHECKING:
+    # noinspection PyProtectedMember
+    from officialeye._api.context import Context
+
+
+class TargetFeatures(IApiInterfaceImplementation):
+    """
+    Features of a target image extracted by a matcher, which can be shared between all templates whose target features key is the same.
+    It is very important that this class is picklable!
+    """
+
+    def __init__(self, key: str, features: Any, /):
+        super().__init__()
+
+        self._key = key
+        self._features = features
+
+    def set_api_context(self, context: Context, /) -> None:
+        pass
+
+    def clear_api_context(self) -> None:
+        pass
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    @property
+    def features(self) -> Any:
+        return self._features
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict
+
+from officialeye._internal.api_implementation import IApiInterfaceImplementation
+
+if TYPE_CHECKING:
+    # noinspection PyProtectedMember
+    from officialeye._api.context import Context
+
+
+class TemplateRanking(IApiInterfaceImplementation):
+    """
+    The similarities of multiple templates to a target image, computed from their coarse signatures.
+    It is very important that this class is picklable!
+    """
+
+    def __init__(self, similarities: Dict[str, float | None], /):
+        super().__init__()
+
+        # keys: template paths
+        # values: similarities of the templates to the target image, None if the similarity could not be computed
+        self._similarities = similarities
+
+    def set_api_context(self, context: Context, /) -> None:
+        pass
+
+    def clear_api_context(self) -> None:
+        pass
+
+    def get_similarity(self, template_path: str, /) -> float | None:
+        return self._similarities.get(template_path, None)
@@ -1,7 +1,7 @@
-from typing import Dict
+from typing import Dict, Iterable
 
 # noinspection PyProtectedMember
-from officialeye._api.mutator import IMutator
+from officialeye._api.mutator import IMutator, Mutator
 from officialeye._internal.context.singleton import get_internal_context
 
 
@@ -14,3 +14,22 @@ def load_mutator_from_dict(mutator_dict: Dict[str, any], /) -> IMutator:
     mutator_config = mutator_dict.get("config", {})
 
     return get_internal_context().get_mutator(mutator_id, mutator_config)
+
+
+def get_mutators_description(mutators: Iterable[IMutator], /) -> list | None:
+    """
+    Describes the given chain of mutators in a serializable form, suitable for building cache keys.
+    Returns None if some of the mutators cannot be described, i.e., if they do not extend the Mutator class.
+    """
+
+    description = []
+
+    for mutator in mutators:
+
+        if not isinstance(mutator, Mutator):
+            return None
+
+        # noinspection PyProtectedMember
+        description.append([mutator.mutator_id, dict(mutator.config._config_dict)])
+
+    return description
@@ -67,3 +67,14 @@ class ErrInvalidImage(ErrGeneral):
 
     def __reduce__(self):
         return self.__class__, self._init_args
+
+
+class ErrOperationCancelled(ErrGeneral):
+
+    def __init__(self, while_text: str, problem_text: str, /):
+        super().__init__(while_text, problem_text)
+
+        self._init_args = while_text, problem_text
+
+    def __reduce__(self):
+        return self.__class__, self._init_args
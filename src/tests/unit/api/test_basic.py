@@ -1,6 +1,9 @@
+import numpy as np
 import pytest
-from officialeye import Context, Template
+from officialeye import Context, Image, Template
+from officialeye.error.errors.general import ErrInvalidIdentifier
 from officialeye.error.errors.internal import ErrInvalidState
+from officialeye.error.errors.io import ErrIOInvalidImage
 
 
 def test_context_reenter():
@@ -38,6 +41,38 @@ def test_template_load():
         assert template.name == "Driver License RU"
 
 
+@pytest.mark.parametrize("executor", ["thread", "inline"])
+def test_in_process_executors(executor: str):
+
+    with Context(executor=executor, workers=2) as context:
+        context.warm_up("docs/assets/templates/driver_license_ru_01/driver_license_ru.yml")
+
+        template = Template(context, path="docs/assets/templates/driver_license_ru_01/driver_license_ru.yml")
+        assert template.identifier == "driver_license_ru"
+        assert len([f for f in template.features]) == 15
+
+        h, w, _ = template.get_image().load().shape
+        assert template.width == w
+        assert template.height == h
+
+
+def test_invalid_executor():
+
+    with pytest.raises(ErrInvalidIdentifier):
+        Context(executor="cluster")
+
+
+def test_warm_up():
+
+    with Context(workers=2) as context:
+        template = Template(context, path="docs/assets/templates/driver_license_ru_01/driver_license_ru.yml")
+
+        # templates that cannot be loaded must not break the worker processes
+        context.warm_up(template, "docs/assets/templates/nonexistent.yml")
+
+        assert template.identifier == "driver_license_ru"
+
+
 def test_image_dimensions():
 
     with Context() as context:
@@ -48,6 +83,24 @@ def test_image_dimensions():
         assert template.height == h
 
 
+def test_in_memory_images():
+
+    with Context() as context:
+        img = Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg").load()
+
+        assert np.array_equal(Image(context, array=img).load(), img)
+        assert Image(context, array=img[:, :, 0]).load().shape == img.shape
+
+        with open("docs/assets/templates/driver_license_ru_01/examples/01.jpg", "rb") as fh:
+            assert np.array_equal(Image(context, data=fh.read()).load(), img)
+
+        with pytest.raises(ErrIOInvalidImage):
+            Image(context, data=b"not an image").load()
+
+        with pytest.raises(ErrIOInvalidImage):
+            Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg", array=img)
+
+
 def test_mutated_image_dimensions():
     with Context() as context:
         template = Template(context, path="docs/assets/templates/driver_license_ru_01/driver_license_ru.yml")
@@ -55,3 +108,78 @@ def test_mutated_image_dimensions():
         h, w, _ = img.shape
         assert template.width == w
         assert template.height == h
+
+
+def test_template_subclass_defaults():
+    from officialeye import ITemplate
+
+    class _SupervisionResult:
+
+        def interpret(self, /, *, target):
+            return "interpretation", target
+
+    class _Template(ITemplate):
+        """ A template implementing only the members that have always been abstract. """
+
+        def load(self):
+            pass
+
+        def detect_async(self, /, *, target):
+            raise NotImplementedError()
+
+        def detect(self, /, **kwargs):
+            return _SupervisionResult()
+
+        def get_image(self):
+            raise NotImplementedError()
+
+        def get_mutated_image(self):
+            raise NotImplementedError()
+
+        identifier = "template"
+        name = "Template"
+        width = 1
+        height = 1
+        keypoints = []
+        features = []
+
+        def get_feature(self, feature_id: str, /):
+            return None
+
+        def get_keypoint(self, keypoint_id: str, /):
+            return None
+
+    template = _Template()
+
+    assert template.detect_and_interpret(target="target") == ("interpretation", "target")
+    assert template.detect_and_interpret(target="target", interpretation_target="other") == ("interpretation", "other")
+
+
+def test_interpretation_threads_default():
+    import os
+
+    cpu_count = os.cpu_count() or 1
+
+    # the processors are split among the workers, each of which interprets the features of a different document
+    assert Context(workers=cpu_count)._interpretation_threads == 1
+    assert Context(workers=1)._interpretation_threads == cpu_count
+    assert Context(workers=1, interpretation_threads=3)._interpretation_threads == 3
+
+
+def test_keypoint_subclass_defaults():
+    from officialeye import IKeypoint
+
+    class _Keypoint(IKeypoint):
+        """ A keypoint implementing only the members that have always been abstract. """
+
+        identifier = "keypoint"
+        x = 0
+        y = 0
+        w = 1
+        h = 1
+        template = None
+        matches_min = 0
+        matches_max = 1
+
+    # the entire target image is searched
+    assert _Keypoint().search_region is None
@@ -1,13 +1,86 @@
+import asyncio
+import os
 from difflib import SequenceMatcher
 
-from officialeye import Context, IImage, IInterpretationResult, Image, ISupervisionResult, Template
-from officialeye.detection import detect
+import cv2
+import numpy as np
+import pytest
+
+from officialeye import Context, IImage, IInterpretationResult, Image, Interpretation, ISupervisionResult, Mutator, Template
+
+# noinspection PyProtectedMember
+from officialeye._api.detection import _DetectionJob
+
+# noinspection PyProtectedMember
+from officialeye._internal.feature_cache import get_file_digest, make_cache_key
+
+# noinspection PyProtectedMember
+from officialeye._internal.template.signature import _TEMPLATE_MAX_FEATURES, _TEMPLATE_MAX_SIDE
+from officialeye.detection import async_detect, detect, detect_and_interpret, detect_many
+from officialeye.error.errors.general import ErrOperationCancelled
+from officialeye.error.errors.io import ErrIOInvalidPath
+from officialeye.error.errors.template import ErrTemplateInvalidKeypoint, ErrTemplateInvalidSyntax
+
+
+class _FeatureShapeInterpretation(Interpretation):
+    """
+    Interprets a feature as the shape of its image, which does not require any OCR engine to be installed.
+    """
+
+    def __init__(self, config_dict, /):
+        super().__init__("feature_shape", config_dict)
+
+    def interpret(self, feature_img, feature, /):
+        return feature_img.shape[:2]
+
+
+class _InPlaceMutator(Mutator):
+    """
+    Modifies the image in place, which mutators are allowed to do.
+    """
+
+    def __init__(self, config_dict, /):
+        super().__init__("in_place", config_dict)
+
+    def mutate(self, img, /):
+        img[0, 0] = 0
+        return img
 
 
 def sequence_similarity_measure(str_1: str, str_2: str, /) -> float:
     return SequenceMatcher(None, str_1, str_2).ratio()
 
 
+def _create_ransac_template(directory, /, *, interpretation_method: str | None = None,
+                            identifier: str = "driver_license_ru_ransac", source: str | None = None) -> str:
+    """
+    Creates a copy of the bundled driver license template using the RANSAC supervisor, which is much faster than the default one.
+    Optionally, the features are interpreted by the given method instead of the Tesseract OCR, and the source image is replaced.
+    """
+
+    template_dir = os.path.abspath("docs/assets/templates/driver_license_ru_01")
+
+    if source is None:
+        source = os.path.join(template_dir, "driver_license_ru.jpg")
+
+    with open(os.path.join(template_dir, "driver_license_ru.yml"), "r") as fh:
+        template_yml = fh.read()
+
+    template_yml = template_yml.replace('id: "driver_license_ru"', f'id: "{identifier}"')
+    template_yml = template_yml.replace('source: "driver_license_ru.jpg"', f'source: "{source}"')
+    template_yml = template_yml.replace("engine: combinatorial", "engine: ransac")
+
+    if interpretation_method is not None:
+        template_yml = template_yml.replace("method: ocr_tesseract", f"method: {interpretation_method}")
+
+    template_path = os.path.join(directory, f"{identifier}.yml")
+
+    with open(template_path, "w") as fh:
+        fh.write(template_yml)
+
+    return template_path
+
+
 def test_driver_license_ru():
 
     with Context() as context:
@@ -32,3 +105,354 @@ def test_driver_license_ru():
         assert sequence_similarity_measure(feature_interpretation_dict["last_name_ru"], "СУРГУТСКИЙ") >= 0.6
         assert sequence_similarity_measure(feature_interpretation_dict["name_ru"], "ИГОРЬ ВЛАДИСЛАВОВИЧ") >= 0.6
         assert sequence_similarity_measure(feature_interpretation_dict["birthday"], "16.10.1986") >= 0.8
+
+
+def test_detect_many_invalid_targets():
+
+    with Context() as context:
+        template = Template(context, path="docs/assets/templates/driver_license_ru_01/driver_license_ru.yml")
+
+        images = [Image(context, path=f"docs/assets/templates/driver_license_ru_01/examples/missing_{i}.jpg") for i in range(5)]
+
+        results = list(detect_many(context, template, targets=images, max_in_flight=2))
+
+        assert [target for target, _ in results] == images
+        assert all(isinstance(error, ErrIOInvalidPath) for _, error in results)
+
+
+def test_detect_and_interpret_invalid_target():
+
+    with Context() as context:
+        template = Template(context, path="docs/assets/templates/driver_license_ru_01/driver_license_ru.yml")
+        image = Image(context, path="docs/assets/templates/driver_license_ru_01/examples/missing.jpg")
+
+        with pytest.raises(ErrIOInvalidPath):
+            detect_and_interpret(context, template, target=image)
+
+
+def test_async_detect_invalid_target():
+
+    async def _detect():
+        with Context() as context:
+            template = Template(context, path="docs/assets/templates/driver_license_ru_01/driver_license_ru.yml")
+            image = Image(context, path="docs/assets/templates/driver_license_ru_01/examples/missing.jpg")
+
+            with pytest.raises(ErrIOInvalidPath):
+                await async_detect(context, template, target=image)
+
+            # the template has been loaded without blocking
+            assert template.identifier == "driver_license_ru"
+
+    asyncio.run(_detect())
+
+
+def _create_targets(context: Context, /):
+    # the missing images fail immediately, while the others need to be analyzed
+    return [
+        Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg"),
+        Image(context, path="docs/assets/templates/driver_license_ru_01/examples/missing_0.jpg"),
+        Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg"),
+        Image(context, path="docs/assets/templates/driver_license_ru_01/examples/missing_1.jpg"),
+    ]
+
+
+def test_detect_many(tmp_path):
+
+    with Context() as context:
+        template = Template(context, path=_create_ransac_template(tmp_path))
+        targets = _create_targets(context)
+
+        consumed_targets = []
+
+        def _targets():
+            for target in targets:
+                consumed_targets.append(target)
+                yield target
+
+        results = []
+
+        for target, result in detect_many(context, template, targets=_targets(), max_in_flight=2):
+            # the target images are consumed lazily, such that at most two of them are being analyzed at the same time
+            assert len(consumed_targets) - len(results) <= 2
+            results.append((target, result))
+
+        assert [target for target, _ in results] == targets
+
+        for (_, result), analyzed in zip(results, [True, False, True, False], strict=True):
+            if analyzed:
+                assert isinstance(result, ISupervisionResult)
+                assert result.template.identifier == "driver_license_ru_ransac"
+            else:
+                assert isinstance(result, ErrIOInvalidPath)
+
+
+def test_detect_many_unordered(tmp_path):
+
+    with Context() as context:
+        template = Template(context, path=_create_ransac_template(tmp_path))
+        targets = _create_targets(context)
+
+        results = list(detect_many(context, template, targets=targets, ordered=False, max_in_flight=3))
+
+        assert len(results) == len(targets)
+        assert sorted(id(target) for target, _ in results) == sorted(id(target) for target in targets)
+
+        # the failures are reported as soon as they occur, i.e., before the analysis of the first image ends
+        assert isinstance(results[0][1], ErrIOInvalidPath)
+
+
+def test_async_detect(tmp_path):
+
+    template_path = _create_ransac_template(tmp_path)
+
+    async def _detect():
+        with Context() as context:
+            template = Template(context, path=template_path)
+            image = Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg")
+
+            async_result = await async_detect(context, template, target=image)
+
+            # futures can be awaited directly
+            future_result = await template.detect_async(target=image)
+
+            template_height, template_width = template.get_image().load().shape[:2]
+
+            return async_result, future_result, detect(context, template, target=image), template_width, template_height
+
+    async_result, future_result, result, template_width, template_height = asyncio.run(_detect())
+
+    # the matching is randomized, hence the results are compared by the positions of the corners of the template they predict
+    template_image_corners = np.array([[0, 0], [template_width, 0], [template_width, template_height], [0, template_height]])
+
+    for other_result in (async_result, future_result):
+        assert isinstance(other_result, ISupervisionResult)
+        assert other_result.template.identifier == result.template.identifier
+        assert np.allclose(other_result.translate(template_image_corners), result.translate(template_image_corners), atol=10.0)
+
+
+def test_detect_and_interpret(tmp_path):
+
+    with Context() as context:
+        context.register_interpretation("feature_shape", _FeatureShapeInterpretation)
+
+        template = Template(context, path=_create_ransac_template(tmp_path, interpretation_method="feature_shape"))
+        image = Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg")
+
+        interpretation = detect_and_interpret(context, template, target=image)
+
+        assert isinstance(interpretation, IInterpretationResult)
+        assert isinstance(interpretation.supervision_result, ISupervisionResult)
+        assert interpretation.supervision_result.template.identifier == "driver_license_ru_ransac"
+
+        # the features are warped to their sizes in the template
+        feature = next(f for f in template.features if f.identifier == "last_name_ru")
+        assert interpretation.get_feature_interpretation(feature) == (feature.h, feature.w)
+
+        # interpreting a supervision result attaches the very same supervision result to the interpretation result
+        supervision_result = interpretation.supervision_result
+        assert supervision_result.interpret(target=image).supervision_result is supervision_result
+
+
+def test_rank_templates(tmp_path):
+
+    template_img = cv2.imread("docs/assets/templates/driver_license_ru_01/driver_license_ru.jpg")
+
+    noise_path = str(tmp_path / "noise.png")
+    cv2.imwrite(noise_path, np.random.default_rng(0).integers(0, 256, size=template_img.shape, dtype=np.uint8))
+
+    noise_template_path = _create_ransac_template(tmp_path, identifier="noise", source=noise_path)
+    template_path = _create_ransac_template(tmp_path)
+
+    with Context() as context:
+        noise_template = Template(context, path=noise_template_path)
+        template = Template(context, path=template_path)
+        image = Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg")
+
+        templates = [noise_template, template]
+
+        # the templates are reordered by their similarity to the target image
+        # noinspection PyProtectedMember
+        ranking_job = _DetectionJob(context, templates, image, top_k=len(templates))
+        # noinspection PyProtectedMember
+        ranking = ranking_job._ranking_future.result()
+
+        # noinspection PyProtectedMember
+        assert ranking_job._prune(ranking) == [template, noise_template]
+
+        noise_similarity = ranking.get_similarity(noise_template_path)
+        similarity = ranking.get_similarity(template_path)
+        assert noise_similarity < similarity
+
+        min_similarity = (noise_similarity + similarity) / 2.0
+
+        # the templates below the cut-off are dropped
+        pruning_job = _DetectionJob(context, templates, image, min_similarity=min_similarity)
+        # noinspection PyProtectedMember
+        assert pruning_job._prune(pruning_job._ranking_future.result()) == [template]
+
+        assert detect(context, *templates, target=image, min_similarity=min_similarity).template.identifier == template.identifier
+
+
+def test_warm_up_persists_template_signatures(tmp_path):
+
+    # the source image is re-encoded, so that its signature has not been cached in memory by any of the other tests
+    source_path = str(tmp_path / "source.png")
+    cv2.imwrite(source_path, cv2.imread("docs/assets/templates/driver_license_ru_01/driver_license_ru.jpg"))
+
+    cache_dir = str(tmp_path / "cache")
+    template_path = _create_ransac_template(tmp_path, source=source_path)
+
+    with open(template_path, "r") as fh:
+        template_yml = fh.read()
+
+    with open(template_path, "w") as fh:
+        fh.write(template_yml.replace("sensitivity: 0.7", f'sensitivity: 0.7\n      cache_dir: "{cache_dir}"'))
+
+    with Context(workers=1) as context:
+        context.warm_up(template_path)
+
+        # the worker warms up before it runs its first task
+        Template(context, path=template_path).load()
+
+    cache_key = make_cache_key("signature", get_file_digest(source_path), _TEMPLATE_MAX_FEATURES, _TEMPLATE_MAX_SIDE)
+
+    assert os.path.isfile(os.path.join(cache_dir, f"{cache_key}.npz"))
+
+
+def test_coarse_scale(tmp_path):
+
+    # the coarse matching pays off for large target images
+    target_path = str(tmp_path / "target.png")
+    target_img = cv2.imread("docs/assets/templates/driver_license_ru_01/examples/01.jpg")
+    cv2.imwrite(target_path, cv2.resize(target_img, None, fx=2.0, fy=2.0, interpolation=cv2.INTER_CUBIC))
+
+    template_path = _create_ransac_template(tmp_path)
+    coarse_template_path = _create_ransac_template(tmp_path, identifier="driver_license_ru_coarse")
+
+    with open(coarse_template_path, "r") as fh:
+        template_yml = fh.read()
+
+    with open(coarse_template_path, "w") as fh:
+        fh.write(template_yml.replace("sensitivity: 0.7", "sensitivity: 0.7\n      coarse_scale: 0.5"))
+
+    with Context() as context:
+        image = Image(context, path=target_path)
+
+        result = detect(context, Template(context, path=template_path), target=image)
+        coarse_result = detect(context, Template(context, path=coarse_template_path), target=image)
+
+    assert isinstance(coarse_result, ISupervisionResult)
+    assert coarse_result.template.identifier == "driver_license_ru_coarse"
+
+    full_matching_result = result.matching_result
+    coarse_matching_result = coarse_result.matching_result
+
+    # the coarse matches are refined at full resolution, hence they are about as many and as precise as the matches found at full resolution,
+    # i.e., they agree with the transformation found at full resolution just as well as the full resolution matches themselves
+    assert coarse_matching_result.get_total_match_count() >= 0.8 * full_matching_result.get_total_match_count()
+
+    for matching_result in (full_matching_result, coarse_matching_result):
+        errors = np.linalg.norm(result.translate(matching_result.get_template_points()) - matching_result.get_target_points(), axis=1)
+        assert np.median(errors) < 12.0
+
+
+def _set_title_search_region(template_path: str, search_region: str, /) -> None:
+
+    with open(template_path, "r") as fh:
+        template_yml = fh.read()
+
+    title_keypoint_yml = "  title:\n    x: 453\n    y: 55\n    w: 792\n    h: 70\n"
+    assert title_keypoint_yml in template_yml
+
+    with open(template_path, "w") as fh:
+        fh.write(template_yml.replace(title_keypoint_yml, f"{title_keypoint_yml}    search:\n{search_region}"))
+
+
+def test_keypoint_search_region(tmp_path):
+
+    template_path = _create_ransac_template(tmp_path)
+
+    # the title is located in the upper half of the target image, but only its left part may be matched
+    _set_title_search_region(template_path, "      x: 0.0\n      y: 0.0\n      w: 0.45\n      h: 0.5\n")
+
+    with Context() as context:
+        image = Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg")
+        matching_result = detect(context, Template(context, path=template_path), target=image).matching_result
+
+        target_height, target_width = image.load().shape[:2]
+
+    title_index = matching_result.get_keypoint_ids().index("title")
+    title_target_points = matching_result.get_target_points()[matching_result.get_keypoint_indices() == title_index]
+
+    assert title_target_points.shape[0] > 0
+    assert np.all(title_target_points[:, 0] <= 0.45 * target_width)
+    assert np.all(title_target_points[:, 1] <= 0.5 * target_height)
+
+
+@pytest.mark.parametrize("search_region, error_type", [
+    # not a number
+    ("      x: left\n      y: 0.0\n      w: 0.5\n      h: 0.5\n", ErrTemplateInvalidSyntax),
+    # missing coordinate
+    ("      x: 0.0\n      y: 0.0\n      w: 0.5\n", ErrTemplateInvalidSyntax),
+    # empty region
+    ("      x: 0.0\n      y: 0.0\n      w: 0.0\n      h: 0.5\n", ErrTemplateInvalidKeypoint),
+    # regions exceeding the target image
+    ("      x: 0.75\n      y: 0.0\n      w: 0.5\n      h: 0.5\n", ErrTemplateInvalidKeypoint),
+    ("      x: -0.25\n      y: 0.0\n      w: 0.5\n      h: 0.5\n", ErrTemplateInvalidKeypoint),
+])
+def test_keypoint_invalid_search_region(tmp_path, search_region, error_type):
+
+    template_path = _create_ransac_template(tmp_path)
+    _set_title_search_region(template_path, search_region)
+
+    with Context() as context, pytest.raises(error_type):
+        Template(context, path=template_path).load()
+
+
+def test_in_place_target_mutator(tmp_path):
+
+    template_path = _create_ransac_template(tmp_path)
+
+    with open(template_path, "r") as fh:
+        template_yml = fh.read()
+
+    with open(template_path, "w") as fh:
+        fh.write(template_yml.replace("  target:\n", "  target:\n    - id: in_place\n", 1))
+
+    with Context() as context:
+        context.register_mutator("in_place", _InPlaceMutator)
+
+        template = Template(context, path=template_path)
+        image = Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg")
+
+        # the target image is passed to the workers through read-only shared memory
+        result = detect(context, template, target=image)
+
+    assert isinstance(result, ISupervisionResult)
+    assert result.template.identifier == "driver_license_ru_ransac"
+
+
+def test_cancel_awaiting_task():
+
+    async def _detect_and_cancel():
+        with Context() as context:
+            # the combinatorial supervisor takes long enough for the call to be cancelled while it is running
+            template = Template(context, path="docs/assets/templates/driver_license_ru_01/driver_license_ru.yml")
+            template.load()
+
+            future = template.detect_async(target=Image(context, path="docs/assets/templates/driver_license_ru_01/examples/01.jpg"))
+
+            while not future.running():
+                await asyncio.sleep(0.01)
+
+            awaiting_task = asyncio.ensure_future(future)
+            await asyncio.sleep(0.1)
+
+            awaiting_task.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await awaiting_task
+
+            return future.exception()
+
+    assert isinstance(asyncio.run(_detect_and_cancel()), ErrOperationCancelled)
@@ -0,0 +1,20 @@
+import pickle
+
+
+def test_cancellation_flag():
+    from officialeye._internal.cancellation import CancellationFlag
+
+    flag = CancellationFlag()
+
+    # the task receives a pickled copy of the token
+    token = pickle.loads(pickle.dumps(flag.token))
+    assert not token.is_cancelled()
+
+    flag.set()
+    assert token.is_cancelled()
+
+    token.close()
+    flag.release()
+
+    # a task whose flag has already been destroyed is not needed anymore
+    assert pickle.loads(pickle.dumps(flag.token)).is_cancelled()
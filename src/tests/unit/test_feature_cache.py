@@ -0,0 +1,67 @@
+import numpy as np
+
+
+def test_memory_eviction():
+    from officialeye._internal.feature_cache import FeatureCache
+
+    cache = FeatureCache(capacity=2)
+
+    cache.put("a", (np.zeros(1),))
+    cache.put("b", (np.ones(1),))
+
+    # touch "a", so that "b" becomes the least recently used entry
+    assert cache.get("a") is not None
+
+    cache.put("c", (np.ones(2),))
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_disk_roundtrip(tmp_path):
+    from officialeye._internal.feature_cache import FeatureCache, make_cache_key
+
+    key = make_cache_key("test", [1, 2, 3], {"b": 1, "a": 2})
+    assert key == make_cache_key("test", [1, 2, 3], {"a": 2, "b": 1})
+
+    points = np.arange(10, dtype=np.float32).reshape(-1, 2)
+    descriptors = np.ones((5, 128), dtype=np.float32)
+
+    FeatureCache(capacity=1).put(key, (points, descriptors), directory=str(tmp_path))
+
+    entry = FeatureCache(capacity=1).get(key, directory=str(tmp_path))
+
+    assert entry is not None
+    assert np.array_equal(entry[0], points)
+    assert np.array_equal(entry[1], descriptors)
+
+
+def test_mutated_source_image_crops_are_views():
+    from officialeye._api_builtins.mutator.crop import CropMutator
+    from officialeye._internal.template.image import InternalMutatedSourceImage
+
+    raster = np.arange(60, dtype=np.uint8).reshape(6, 10)
+    raster.flags.writeable = False
+
+    img = InternalMutatedSourceImage(lambda: raster)
+    img.apply_mutators(CropMutator(dict(x=2, y=1, w=3, h=4)))
+
+    crop = img.load()
+
+    assert np.array_equal(crop, raster[1:5, 2:5])
+    assert np.shares_memory(crop, raster)
+    assert not crop.flags.writeable
+
+
+def test_failed_write_leaves_no_files(tmp_path, monkeypatch):
+    from officialeye._internal.feature_cache import FeatureCache
+
+    def _failing_replace(*_args, **_kwargs):
+        raise OSError("simulated failure")
+
+    monkeypatch.setattr("os.replace", _failing_replace)
+
+    FeatureCache(capacity=1).put("key", (np.zeros(3),), directory=str(tmp_path))
+
+    assert list(tmp_path.iterdir()) == []
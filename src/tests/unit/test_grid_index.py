@@ -0,0 +1,16 @@
+import numpy as np
+
+# noinspection PyProtectedMember
+from officialeye._api_builtins.matcher.grid_index import GridIndex
+
+
+def test_grid_index_query():
+
+    rng = np.random.default_rng(0)
+    points = rng.uniform(0, [640, 480], size=(5000, 2)).astype(np.float32)
+
+    grid_index = GridIndex(points, 640, 480)
+
+    for x, y, w, h in [(0, 0, 640, 480), (100, 50, 200, 120), (630, 470, 50, 50), (-10, -10, 30, 30), (320, 240, 0.5, 0.5)]:
+        inside = (points[:, 0] >= x) & (points[:, 0] <= x + w) & (points[:, 1] >= y) & (points[:, 1] <= y + h)
+        assert np.array_equal(grid_index.query(x, y, w, h), np.flatnonzero(inside))
@@ -0,0 +1,43 @@
+import numpy as np
+
+from officialeye import IMutator
+
+
+class _FillMutator(IMutator):
+    """ A mutator that does not extend the Mutator class, hence cannot be fingerprinted. """
+
+    def __init__(self, value: int, /):
+        self._value = value
+
+    def mutate(self, img: np.ndarray, /) -> np.ndarray:
+        return np.full_like(img, self._value)
+
+
+def _create_template(value: int, /):
+    from officialeye._internal.template.internal_template import InternalTemplate
+
+    # avoid loading the whole template, since only the source image and its mutators are needed
+    template = object.__new__(InternalTemplate)
+    template._path_to_template = "docs/assets/templates/driver_license_ru_01/driver_license_ru.yml"
+    template._source = "driver_license_ru.jpg"
+    template._source_mutators = [_FillMutator(value)]
+    template._mutated_source_image = None
+
+    return template
+
+
+def test_mutated_source_image_without_fingerprint():
+
+    template = _create_template(1)
+    assert template.get_source_fingerprint() is None
+
+    img = template.load_mutated_source_image()
+    assert np.all(img == 1)
+    assert not img.flags.writeable
+
+    # the raster is reused by the template itself
+    assert template.load_mutated_source_image() is img
+
+    # a template loaded from the same path with different mutators never observes the raster of the previous one
+    del template
+    assert np.all(_create_template(2).load_mutated_source_image() == 2)
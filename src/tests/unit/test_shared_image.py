@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def test_shared_image():
+    from officialeye._internal.shared_image import SharedImageSegment
+
+    img = np.random.default_rng(0).integers(0, 256, size=(40, 30, 3), dtype=np.uint8)
+
+    segment = SharedImageSegment(img)
+    assert segment.acquire()
+
+    with segment.handle.attach() as shared_img:
+        assert np.array_equal(shared_img, img)
+        assert not shared_img.flags.writeable
+
+    # the last reference destroys the segment, which cannot be acquired anymore
+    segment.release_reference()
+
+    assert segment.released
+    assert not segment.acquire()
+
+
+def test_share_image_without_constructor_call():
+    from officialeye import Context
+    from officialeye._api.image import IImage
+
+    img = np.zeros((10, 10, 3), dtype=np.uint8)
+
+    class _Image(IImage):
+
+        # noinspection PyMissingConstructor
+        def __init__(self):
+            # deliberately does not call the constructor of the base class
+            pass
+
+        def load(self) -> np.ndarray:
+            return img
+
+        def apply_mutators(self, *mutators):
+            raise NotImplementedError()
+
+    with Context() as context:
+        image = _Image()
+
+        # noinspection PyProtectedMember
+        segment = context._share_image(image)
+
+        # the image is shared only once
+        # noinspection PyProtectedMember
+        assert context._share_image(image) is segment
+
+        segment.release_reference()
+        segment.release_reference()
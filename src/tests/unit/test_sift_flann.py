@@ -0,0 +1,15 @@
+import pytest
+
+from officialeye.error.errors.matching import ErrMatchingInvalidEngineConfig
+
+
+def test_coarse_scale_config():
+    from officialeye._api_builtins.matcher.sift_flann import SiftFlannMatcher
+
+    # the configuration values are read from the template files as strings
+    SiftFlannMatcher({"coarse_scale": "0.25", "refinement_margin": "0"})
+    SiftFlannMatcher({"coarse_scale": "1"})
+
+    for invalid_config in ({"coarse_scale": "0"}, {"coarse_scale": "-0.5"}, {"coarse_scale": "1.5"}, {"refinement_margin": "-0.1"}):
+        with pytest.raises(ErrMatchingInvalidEngineConfig):
+            SiftFlannMatcher(invalid_config)
@@ -0,0 +1,19 @@
+import cv2
+import numpy as np
+
+# noinspection PyProtectedMember
+from officialeye._internal.template.signature import get_signature_similarity, get_target_signature
+
+
+def test_signature_similarity():
+
+    template_img = cv2.imread("docs/assets/templates/driver_license_ru_01/driver_license_ru.jpg")
+    target_img = cv2.imread("docs/assets/templates/driver_license_ru_01/examples/01.jpg")
+    noise_img = np.random.default_rng(0).integers(0, 256, size=(800, 1200, 3), dtype=np.uint8)
+
+    template_signature = get_target_signature(template_img)
+
+    target_similarity = get_signature_similarity(template_signature, get_target_signature(target_img))
+    noise_similarity = get_signature_similarity(template_signature, get_target_signature(noise_img))
+
+    assert 0.0 <= noise_similarity < target_similarity <= 1.0
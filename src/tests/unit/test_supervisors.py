@@ -0,0 +1,245 @@
+import numpy as np
+
+
+def _create_matching_result(template_points: np.ndarray, target_points: np.ndarray, /, *,
+                            keypoint_indices: np.ndarray | None = None, scores: np.ndarray | None = None):
+    from officialeye._api.template.matching_result import IMatchingResult
+
+    if keypoint_indices is None:
+        keypoint_indices = np.zeros(template_points.shape[0], dtype=np.int32)
+
+    if scores is None:
+        scores = np.ones(template_points.shape[0], dtype=np.float64)
+
+    class _ArrayMatchingResult(IMatchingResult):
+
+        @property
+        def template(self):
+            raise NotImplementedError()
+
+        def get_all_matches(self):
+            raise NotImplementedError()
+
+        def get_total_match_count(self) -> int:
+            return template_points.shape[0]
+
+        def get_matches_for_keypoint(self, keypoint_id: str, /):
+            raise NotImplementedError()
+
+        def get_keypoint_ids(self):
+            return [f"keypoint{i}" for i in range(int(np.max(keypoint_indices, initial=0)) + 1)]
+
+        def get_keypoint_indices(self) -> np.ndarray:
+            return keypoint_indices
+
+        def get_template_points(self) -> np.ndarray:
+            return template_points
+
+        def get_target_points(self) -> np.ndarray:
+            return target_points
+
+        def get_scores(self) -> np.ndarray:
+            return scores
+
+    return _ArrayMatchingResult()
+
+
+def _generate_affine_matches(match_count: int, /):
+    rng = np.random.default_rng(0)
+
+    transformation_matrix = np.array([[0.8, 0.1], [-0.05, 1.2]])
+    offset = np.array([30.0, -12.0])
+
+    template_points = rng.integers(0, 1000, size=(match_count, 2))
+    target_points = template_points @ transformation_matrix.T + offset
+
+    return template_points, target_points, transformation_matrix
+
+
+def test_least_squares_regression():
+    from officialeye._api_builtins.supervisor.least_squares_regression import LeastSquaresRegressionSupervisor
+
+    template_points, target_points, transformation_matrix = _generate_affine_matches(50)
+    matching_result = _create_matching_result(template_points, target_points)
+
+    supervisor = LeastSquaresRegressionSupervisor({})
+    supervisor.setup(None, matching_result)
+
+    results = list(supervisor.supervise(None, matching_result))
+
+    assert len(results) == 50
+
+    for result in results:
+        assert np.allclose(result.transformation_matrix, transformation_matrix)
+
+        predicted_points = (template_points - result.delta) @ result.transformation_matrix.T + result.delta_prime
+        assert np.allclose(predicted_points, target_points)
+
+
+def test_least_squares_regression_collinear():
+    from officialeye._api_builtins.supervisor.least_squares_regression import LeastSquaresRegressionSupervisor
+
+    template_points = np.array([[0, 0], [1, 1], [2, 2], [3, 3]])
+    matching_result = _create_matching_result(template_points, template_points)
+
+    supervisor = LeastSquaresRegressionSupervisor({})
+    supervisor.setup(None, matching_result)
+
+    # no anchor can determine the transformation uniquely
+    assert len(list(supervisor.supervise(None, matching_result))) == 0
+
+
+def test_anchor_strategies():
+    from officialeye._api_builtins.supervisor.anchors import select_anchors
+
+    template_points = np.array([[0, 0], [1, 0], [100, 100], [99, 100], [0, 100]])
+    keypoint_indices = np.array([0, 0, 1, 1, 2], dtype=np.int32)
+    scores = np.array([0.1, 0.5, 0.9, 0.2, 0.3])
+
+    matching_result = _create_matching_result(template_points, template_points, keypoint_indices=keypoint_indices, scores=scores)
+
+    assert select_anchors(matching_result, "all") == [0, 1, 2, 3, 4]
+    assert select_anchors(matching_result, "best_score") == [2, 1, 4]
+    # starting with the best scored match, each further anchor lies as far away from the previous ones as possible
+    assert select_anchors(matching_result, "spread") == [2, 0, 4]
+
+    random_anchors = select_anchors(matching_result, "random")
+    assert sorted(keypoint_indices[random_anchors]) == [0, 1, 2]
+
+
+def test_least_squares_regression_best_score_anchors():
+    from officialeye._api_builtins.supervisor.least_squares_regression import LeastSquaresRegressionSupervisor
+
+    template_points, target_points, transformation_matrix = _generate_affine_matches(50)
+    matching_result = _create_matching_result(template_points, target_points)
+
+    supervisor = LeastSquaresRegressionSupervisor({"anchors": "best_score"})
+    supervisor.setup(None, matching_result)
+
+    # there is a single keypoint, hence a single anchor
+    results = list(supervisor.supervise(None, matching_result))
+
+    assert len(results) == 1
+    assert np.allclose(results[0].transformation_matrix, transformation_matrix)
+
+
+def test_ransac():
+    from officialeye._api_builtins.supervisor.ransac import RansacSupervisor
+
+    template_points, target_points, transformation_matrix = _generate_affine_matches(200)
+
+    # corrupt a third of the matches
+    rng = np.random.default_rng(1)
+    outliers = rng.choice(200, size=70, replace=False)
+    target_points[outliers] = rng.integers(0, 1000, size=(70, 2))
+
+    matching_result = _create_matching_result(template_points, target_points)
+
+    for sampling in ("uniform", "prosac"):
+        supervisor = RansacSupervisor({"sampling": sampling, "seed": 42})
+        supervisor.setup(None, matching_result)
+
+        results = list(supervisor.supervise(None, matching_result))
+
+        assert len(results) == 1
+        assert np.allclose(results[0].transformation_matrix, transformation_matrix)
+        assert results[0].get_score() >= 130
+
+        match_weights = results[0].get_match_weights(matching_result)
+        assert np.all(match_weights[outliers] == 0.0)
+
+
+def test_supervision_result_subclass_without_constructor_call():
+    from officialeye._api.template.supervision_result import ISupervisionResult
+
+    template_points, target_points, _ = _generate_affine_matches(20)
+    array_matching_result = _create_matching_result(template_points, target_points)
+
+    class _SupervisionResult(ISupervisionResult):
+
+        # noinspection PyMissingConstructor
+        def __init__(self):
+            # deliberately does not call the constructor of the base class
+            pass
+
+        template = None
+        matching_result = array_matching_result
+        score = 0.0
+        delta = np.zeros(2)
+        delta_prime = np.array([30.0, -12.0])
+        transformation_matrix = np.array([[0.8, 0.1], [-0.05, 1.2]])
+
+        def get_match_weight(self, match, /) -> float:
+            return 1.0
+
+        def get_match_weights(self) -> np.ndarray:
+            return np.ones(template_points.shape[0])
+
+        def interpret_async(self, /, *, target):
+            raise NotImplementedError()
+
+        def interpret(self, /, **kwargs):
+            raise NotImplementedError()
+
+    assert np.isclose(_SupervisionResult().get_weighted_mse(), 0.0)
+
+
+def test_combinatorial():
+    from officialeye._api_builtins.supervisor.combinatorial import CombinatorialSupervisor
+
+    template_points, target_points, transformation_matrix = _generate_affine_matches(30)
+
+    # corrupt a few matches
+    outliers = np.array([3, 11, 17, 25])
+    target_points[outliers] += 200
+
+    keypoint_indices = np.arange(30, dtype=np.int32) % 3
+    scores = np.ones(30, dtype=np.float64)
+    scores[outliers] = 0.0
+
+    matching_result = _create_matching_result(template_points, target_points, keypoint_indices=keypoint_indices, scores=scores)
+
+    supervisor = CombinatorialSupervisor({"min_match_factor": 0.5, "max_transformation_error": 2, "anchors": "best_score"})
+    supervisor.setup(None, matching_result)
+
+    # one anchor per keypoint
+    results = list(supervisor.supervise(None, matching_result))
+
+    assert len(results) == 3
+
+    for result in results:
+        assert result.get_score() == 26
+        assert np.allclose(result.transformation_matrix, transformation_matrix, atol=0.01)
+
+        match_weights = result.get_match_weights(matching_result)
+        assert np.all(match_weights[outliers] == 0.0)
+
+
+def test_combinatorial_parallel_early_exit():
+    from officialeye._api_builtins.supervisor.combinatorial import CombinatorialSupervisor
+
+    template_points, target_points, transformation_matrix = _generate_affine_matches(30)
+    matching_result = _create_matching_result(template_points, target_points)
+
+    supervisor = CombinatorialSupervisor({"min_match_factor": 0.5, "max_transformation_error": 2, "anchors": "all", "workers": 2})
+    supervisor.setup(None, matching_result)
+
+    solved_anchors = []
+
+    # noinspection PyProtectedMember
+    solve_anchor = supervisor._solve_anchor
+
+    def _solve_anchor(*args):
+        solved_anchors.append(args[3])
+        return solve_anchor(*args)
+
+    supervisor._solve_anchor = _solve_anchor
+
+    results = supervisor.supervise(None, matching_result)
+
+    # the first result is available before all anchors have been solved
+    assert np.allclose(next(results).transformation_matrix, transformation_matrix, atol=0.01)
+
+    results.close()
+
+    assert len(solved_anchors) < 30
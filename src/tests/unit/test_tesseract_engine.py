@@ -0,0 +1,47 @@
+def test_parse_tesseract_config():
+    from officialeye._api_builtins.interpretation.tesseract_engine import parse_tesseract_config
+
+    options = parse_tesseract_config("rus", "--dpi 1000 --psm 7 -c tessedit_char_whitelist=0123456789. -cpreserve_interword_spaces=1")
+
+    assert options is not None
+    assert options.lang == "rus"
+    assert options.psm == 7
+    assert options.oem is None
+    assert options.variables == {
+        "user_defined_dpi": "1000",
+        "tessedit_char_whitelist": "0123456789.",
+        "preserve_interword_spaces": "1"
+    }
+
+    assert parse_tesseract_config("eng", "").variables == {}
+
+    # options that cannot be reproduced by an engine
+    assert parse_tesseract_config("eng", "--psm") is None
+    assert parse_tesseract_config("eng", "--user-words words.txt") is None
+    assert parse_tesseract_config("eng", "-c tessedit_char_whitelist") is None
+
+
+def test_feature_canvas():
+    import numpy as np
+
+    from officialeye._api_builtins.interpretation.tesseract_batch import FeatureCanvas, get_batch_config
+
+    assert get_batch_config("--psm 7 --dpi 300") == "--dpi 300 --psm 4"
+
+    canvas = FeatureCanvas([np.zeros((20, 50), dtype=np.uint8), np.zeros((30, 80, 3), dtype=np.uint8)])
+
+    assert canvas.image.shape == (10 + 20 + 15 + 30 + 10, 100, 3)
+
+    def _word(block: int, line: int, top: int, text: str) -> str:
+        return "\t".join(map(str, (5, 1, block, 1, line, 1, 10, top, 30, 15, 90, text)))
+
+    tsv = "\n".join([
+        "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext",
+        _word(1, 1, 12, "first"),
+        _word(1, 1, 12, "line"),
+        _word(2, 1, 46, "second"),
+        _word(2, 2, 60, "feature"),
+        "4\t1\t2\t1\t2\t0\t10\t60\t30\t15\t-1\t"
+    ])
+
+    assert canvas.split_tsv(tsv) == ["first line", "second\nfeature"]